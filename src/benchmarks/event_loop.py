@@ -0,0 +1,103 @@
+"""
+事件循环基准：asyncio 默认循环 vs uvloop，对本地模拟交易所发起大量小请求
+
+用法（在 src 目录下，uvloop 需要 pip install "clx-etl[uvloop]"）：
+    python -m benchmarks.event_loop
+    python -m benchmarks.event_loop --requests 20000 --concurrency 200 --latency-ms 5
+
+模拟交易所（benchmarks.mock_exchange）在独立进程中运行并固定使用默认循环，
+客户端使用与生产相同的 session 配置，只比较客户端侧事件循环的吞吐。
+"""
+
+import argparse
+import asyncio
+import itertools
+import multiprocessing
+import socket
+import sys
+import time
+
+import aiohttp
+from aiohttp import ClientTimeout
+
+from benchmarks.mock_exchange import serve
+from utils.http_session import DEFAULT_API_HEADERS
+from utils.runtime import loop_factory
+
+# 与实际轮询任务接近的请求组合：资金费率、多空比、K 线增量
+ENDPOINTS = [
+    "/fapi/v1/premiumIndex?symbol=BTCUSDT",
+    "/futures/data/globalLongShortAccountRatio?symbol=BTCUSDT&period=5m&limit=30",
+    "/fapi/v1/klines?symbol=BTCUSDT&interval=1m&limit=100",
+]
+
+
+async def drive(base_url: str, requests: int, concurrency: int) -> float:
+    """并发 concurrency 个 worker 共发出 requests 个请求，返回每秒请求数"""
+    counter = itertools.count()
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(
+        connector=connector, timeout=ClientTimeout(total=15), headers=DEFAULT_API_HEADERS
+    ) as session:
+
+        async def worker():
+            while (i := next(counter)) < requests:
+                async with session.get(base_url + ENDPOINTS[i % len(ENDPOINTS)]) as resp:
+                    await resp.json()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return requests / (time.perf_counter() - start)
+
+
+def measure(kind: str, base_url: str, requests: int, concurrency: int, runs: int) -> float:
+    """最好一次的吞吐（req/s），第一次运行用于预热连接，不计入"""
+    with asyncio.Runner(loop_factory=loop_factory(kind)) as runner:
+        runner.run(drive(base_url, min(requests, 500), concurrency))
+        return max(runner.run(drive(base_url, requests, concurrency)) for _ in range(runs))
+
+
+def wait_port(port: int, timeout: float = 10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"mock exchange not listening on {port}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Event loop throughput: asyncio vs uvloop")
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=2, help="模拟交易所处理耗时")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server = multiprocessing.get_context("spawn").Process(target=serve, args=(args.port, args.latency_ms), daemon=True)
+    server.start()
+    try:
+        wait_port(args.port)
+        base_url = f"http://127.0.0.1:{args.port}"
+
+        results = {}
+        for kind in ("asyncio", "uvloop"):
+            try:
+                results[kind] = measure(kind, base_url, args.requests, args.concurrency, args.runs)
+            except ImportError as e:
+                print(f"skip {kind}: {e}")
+
+        base = results.get("asyncio")
+        for kind, rps in results.items():
+            print(f"{kind:<8} {rps:>10.0f} req/s  x{rps / base:.2f}" if base else f"{kind:<8} {rps:>10.0f} req/s")
+    finally:
+        server.terminate()
+        server.join()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
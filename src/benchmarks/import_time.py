@@ -0,0 +1,95 @@
+"""
+Import-time 回归基准（基于 python -X importtime）
+
+用法（在 src 目录下）：
+    python -m benchmarks.import_time            # 检查全部入口是否超出预算
+    python -m benchmarks.import_time --top 15   # 同时打印最重的 15 个依赖
+
+每个入口在独立子进程中冷启动导入多次取中位数，超出 基线 × 余量 时以非 0 退出码结束，可直接用于 CI。
+pytest 中由 tests/test_import_time.py 执行（CLX_BENCHMARKS=1 时启用）。
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+# 入口模块 → 基线导入耗时（毫秒，开发机中位数）
+IMPORT_BASELINE_MS = {
+    "exchanges.registry": 45,
+    "metadata": 600,
+    "flows.sync_kalshi": 2400,
+    "flows.sync_macro_indicators": 2200,
+    "flows.sync_onchain_tx": 2400,
+    "flows.sync_funding_rate": 2200,
+    "flows.sync_symbols": 2300,
+}
+# 预算 = 基线 × 余量：冷启动耗时受磁盘缓存 / CPU 负载影响，只拦截明显的回归（如顶层引入重依赖）
+IMPORT_HEADROOM = float(os.getenv("CLX_IMPORT_HEADROOM", "1.5"))
+IMPORT_RUNS = 5
+
+
+def budget_ms(module: str) -> float | None:
+    baseline = IMPORT_BASELINE_MS.get(module)
+    return None if baseline is None else baseline * IMPORT_HEADROOM
+
+# import time:  self [us] | cumulative | imported package
+LINE_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def measure(module: str, runs: int = IMPORT_RUNS) -> tuple[float, list[tuple[int, str]]]:
+    """返回 (多次冷启动累计导入耗时的中位数 ms, 中位数那次各模块 cumulative 明细)"""
+    samples: list[tuple[float, list[tuple[int, str]]]] = []
+    src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True,
+            text=True,
+            cwd=src_dir,
+            check=False,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+        detail = []
+        total_us = 0
+        for line in proc.stderr.splitlines():
+            m = LINE_RE.match(line)
+            if not m:
+                continue
+            cumulative, indent, name = int(m.group(2)), len(m.group(3)), m.group(4)
+            detail.append((cumulative, name))
+            if indent <= 1:  # 顶层导入
+                total_us += cumulative
+        samples.append((total_us / 1000, detail))
+
+    median_ms = statistics.median_low(ms for ms, _ in samples)
+    return median_ms, next(detail for ms, detail in samples if ms == median_ms)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Import-time budget check")
+    parser.add_argument("modules", nargs="*", help="只检查这些入口（默认全部）")
+    parser.add_argument("--runs", type=int, default=IMPORT_RUNS)
+    parser.add_argument("--top", type=int, default=0, help="打印最重的 N 个依赖")
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules or IMPORT_BASELINE_MS:
+        budget = budget_ms(module)
+        elapsed, detail = measure(module, args.runs)
+        over = budget is not None and elapsed > budget
+        failed |= over
+        limit = "no budget" if budget is None else f"budget {budget:.0f} ms"
+        print(f"{'FAIL' if over else 'ok  '} {module:<32} {elapsed:8.1f} ms  ({limit})")
+        for cumulative, name in sorted(detail, reverse=True)[: args.top]:
+            print(f"       {cumulative / 1000:8.1f} ms  {name}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+本地模拟交易所：返回 Binance USDⓈ-M 格式的公共接口数据，供基准测试使用，不访问外网
+
+用法（在 src 目录下）：
+    python -m benchmarks.mock_exchange --port 8765 --latency-ms 2
+
+支持的接口：
+    /fapi/v1/klines                               K 线（按 limit 返回，最多 1500 根）
+    /fapi/v1/premiumIndex                         资金费率
+    /futures/data/globalLongShortAccountRatio     多空比（按 limit 返回，最多 500 条）
+"""
+
+import argparse
+import asyncio
+from functools import lru_cache
+import json
+import time
+
+from aiohttp import web
+
+START_MS = 1735689600000
+
+
+@lru_cache
+def klines_body(limit: int) -> bytes:
+    rows = [
+        [
+            START_MS + i * 60_000,
+            "94000.10",
+            "94010.20",
+            "93990.30",
+            "94005.40",
+            "12.345",
+            START_MS + i * 60_000 + 59_999,
+            "1160500.12",
+            321,
+            "6.123",
+            "575600.34",
+            "0",
+        ]
+        for i in range(limit)
+    ]
+    return json.dumps(rows).encode()
+
+
+@lru_cache
+def ratio_body(symbol: str, limit: int) -> bytes:
+    rows = [
+        {
+            "symbol": symbol,
+            "longShortRatio": "1.8105",
+            "longAccount": "0.6442",
+            "shortAccount": "0.3558",
+            "timestamp": START_MS + i * 300_000,
+        }
+        for i in range(limit)
+    ]
+    return json.dumps(rows).encode()
+
+
+async def klines(request: web.Request) -> web.Response:
+    limit = min(int(request.query.get("limit", 500)), 1500)
+    return web.Response(body=klines_body(limit), content_type="application/json")
+
+
+async def premium_index(request: web.Request) -> web.Response:
+    now = int(time.time() * 1000)
+    return web.json_response(
+        {
+            "symbol": request.query.get("symbol", "BTCUSDT"),
+            "markPrice": "94005.40",
+            "indexPrice": "94001.12",
+            "lastFundingRate": "0.00010000",
+            "nextFundingTime": now - now % 28_800_000 + 28_800_000,
+            "time": now,
+        }
+    )
+
+
+async def long_short_ratio(request: web.Request) -> web.Response:
+    limit = min(int(request.query.get("limit", 30)), 500)
+    return web.Response(body=ratio_body(request.query.get("symbol", "BTCUSDT"), limit), content_type="application/json")
+
+
+def build_app(latency_ms: float = 0) -> web.Application:
+    """latency_ms 模拟交易所侧处理耗时"""
+
+    @web.middleware
+    async def latency(request, handler):
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        return await handler(request)
+
+    app = web.Application(middlewares=[latency])
+    app.router.add_get("/fapi/v1/klines", klines)
+    app.router.add_get("/fapi/v1/premiumIndex", premium_index)
+    app.router.add_get("/futures/data/globalLongShortAccountRatio", long_short_ratio)
+    return app
+
+
+def serve(port: int = 8765, latency_ms: float = 0):
+    web.run_app(build_app(latency_ms), host="127.0.0.1", port=port, print=None, access_log=None)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock exchange server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    print(f"Mock exchange listening on http://127.0.0.1:{args.port}")
+    serve(args.port, args.latency_ms)
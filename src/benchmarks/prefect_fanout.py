@@ -0,0 +1,75 @@
+"""
+Prefect fan-out 开销基准：每个单元 submit 一个 task vs 单个 task 内 run_batch
+
+用法（在 src 目录下，需要可用的 Prefect API，未配置时使用临时本地 server）：
+    python -m benchmarks.prefect_fanout                    # 10 / 50 个单元，每个模拟 50ms 请求
+    python -m benchmarks.prefect_fanout --units 5 20 100 --work-ms 20
+
+两种布局执行相同的模拟 HTTP 工作，耗时差即为逐 task 的调度 / 状态上报开销。
+"""
+
+import argparse
+import asyncio
+import time
+
+from prefect import flow, task
+from prefect.cache_policies import NO_CACHE
+from prefect.futures import wait
+
+from utils.prefect_decorators import run_batch
+
+
+async def fake_unit(name: str, work_ms: int) -> str:
+    await asyncio.sleep(work_ms / 1000)
+    return f"{name} ok"
+
+
+@task(name="bench-unit", cache_policy=NO_CACHE)
+async def bench_unit(name: str, work_ms: int) -> str:
+    return await fake_unit(name, work_ms)
+
+
+@task(name="bench-batch", cache_policy=NO_CACHE)
+async def bench_batch(names: list[str], work_ms: int) -> list[dict]:
+    return await run_batch("bench", names, lambda n: fake_unit(n, work_ms))
+
+
+@flow(name="bench-fanout-submit")
+async def fanout_submit(names: list[str], work_ms: int):
+    # prefect wait 是同步阻塞的，放到线程里等待，与正式 flow 一致，不阻塞事件循环
+    await asyncio.to_thread(wait, [bench_unit.submit(n, work_ms) for n in names])
+
+
+@flow(name="bench-fanout-batch")
+async def fanout_batch(names: list[str], work_ms: int):
+    await bench_batch(names, work_ms)
+
+
+def measure(fn, names: list[str], work_ms: int, runs: int) -> float:
+    """最快一次 flow run 的耗时（秒），第一次运行不计入（预热 API / 注册 flow）"""
+    asyncio.run(fn(names, work_ms))
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        asyncio.run(fn(names, work_ms))
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prefect per-task overhead: submit vs batch")
+    parser.add_argument("--units", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--work-ms", type=int, default=50, help="每个单元模拟的请求耗时")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'units':>6} {'submit':>10} {'batch':>10} {'saved/unit':>12}")
+    for n in args.units:
+        names = [f"exchange_{i}" for i in range(n)]
+        submit = measure(fanout_submit, names, args.work_ms, args.runs)
+        batch = measure(fanout_batch, names, args.work_ms, args.runs)
+        print(f"{n:>6} {submit:>9.3f}s {batch:>9.3f}s {(submit - batch) / n * 1000:>10.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+from .lease import Lease, LeaseLostError, job_lock_name, lease_lock, singleton
+from .sharding import HashRing, MySQLMembership, ShardManager, WorkUnit, get_shard_manager
+
+__all__ = [
+    "HashRing",
+    "Lease",
+    "LeaseLostError",
+    "MySQLMembership",
+    "ShardManager",
+    "WorkUnit",
+    "get_shard_manager",
+    "job_lock_name",
+    "lease_lock",
+    "singleton",
+]
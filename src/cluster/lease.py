@@ -0,0 +1,189 @@
+import asyncio
+from contextlib import asynccontextmanager
+import functools
+import os
+import time
+
+from sqlalchemy import select, text, update
+from sqlalchemy.dialects.mysql import insert
+
+from databases.mysql import JobLease, async_engine, ensure_tables
+from utils.logger import logger as _logger
+
+from .sharding import get_shard_manager
+
+__all__ = ["Lease", "LeaseLostError", "job_lock_name", "lease_lock", "singleton"]
+
+logger = _logger.bind(job_id="LEASE")
+
+LEASE_TTL = int(os.getenv("CLX_LEASE_TTL", "60"))
+LOCKS_ENABLED = os.getenv("CLX_JOB_LOCKS", "1") == "1"
+
+_table_ready = False
+
+
+class LeaseLostError(Exception):
+    pass
+
+
+class Lease:
+    """
+    基于 MySQL job_lease 表的 TTL 租约：
+    - 获取时 token +1，续约 / 释放都带 token 条件，过期后被他人接管的旧持有者无法再续约或释放
+    - 持有期间后台每 ttl/3 秒续约一次；续约失败即标记 lost
+    - 本地按最后一次成功续约的时间推算到期（事件循环被阻塞、续约没跑上时同样视为失效）
+    调用方在每次请求交易所 / 写入前用 ensure() 检查，失效时抛 LeaseLostError 中止。
+    只是客户端检查：token 不会写入 Doris，检查之后、写入完成之前失效的那一次写入无法被拒绝
+    （写入按 label 幂等，重复写同一批数据没有副作用）
+    """
+
+    def __init__(self, name: str, owner: str, ttl: int = LEASE_TTL):
+        self.name = name
+        self.owner = owner
+        self.ttl = ttl
+        self.token: int | None = None
+        self.lost = False
+        self._valid_until = 0.0  # time.monotonic()
+        self._task: asyncio.Task | None = None
+
+    async def acquire(self) -> bool:
+        global _table_ready
+        if not _table_ready:
+            await ensure_tables(JobLease)
+            _table_ready = True
+
+        started = time.monotonic()
+        async with async_engine.begin() as conn:
+            # 行不存在先插入一条已过期的占位行，之后统一走行锁判断
+            stmt = insert(JobLease).values(name=self.name, owner="", token=0, expires_at=text("NOW()"))
+            await conn.execute(stmt.on_duplicate_key_update(name=stmt.inserted.name))
+
+            row = (
+                await conn.execute(
+                    select(JobLease.owner, JobLease.token, JobLease.expires_at > text("NOW()"))
+                    .where(JobLease.name == self.name)
+                    .with_for_update()
+                )
+            ).one()
+            owner, token, alive = row
+            if alive:
+                logger.info(f"Lease {self.name} held by {owner} (token={token}), skip")
+                return False
+
+            await conn.execute(
+                update(JobLease)
+                .where(JobLease.name == self.name)
+                .values(
+                    owner=self.owner,
+                    token=JobLease.token + 1,
+                    expires_at=text(f"NOW() + INTERVAL {int(self.ttl)} SECOND"),
+                )
+            )
+            self.token = token + 1
+
+        self._valid_until = started + self.ttl
+        self._task = asyncio.get_running_loop().create_task(self._renew_loop())
+        return True
+
+    async def renew(self) -> bool:
+        started = time.monotonic()
+        async with async_engine.begin() as conn:
+            result = await conn.execute(
+                update(JobLease)
+                .where(JobLease.name == self.name, JobLease.owner == self.owner, JobLease.token == self.token)
+                .values(expires_at=text(f"NOW() + INTERVAL {int(self.ttl)} SECOND"))
+            )
+        if result.rowcount > 0:
+            self._valid_until = started + self.ttl
+            return True
+        return False
+
+    async def _renew_loop(self):
+        while True:
+            await asyncio.sleep(self.ttl / 3)
+            try:
+                if not await self.renew():
+                    self.lost = True
+                    logger.error(f"Lease {self.name} lost (token={self.token})")
+                    return
+            except Exception as e:
+                # 续约暂时失败不立即放弃，租约到期前仍有两次机会
+                logger.warning(f"Lease {self.name} renew failed: {e}")
+
+    @property
+    def expired(self) -> bool:
+        return self.token is not None and time.monotonic() >= self._valid_until
+
+    def ensure(self):
+        """写入 / 调用外部 API 前检查租约仍然有效；未落库的租约（CLX_JOB_LOCKS=0）始终有效"""
+        if not self.lost and self.expired:
+            self.lost = True
+            logger.error(f"Lease {self.name} expired locally (token={self.token})")
+        if self.lost:
+            raise LeaseLostError(f"Lease {self.name} lost (token={self.token})")
+
+    async def release(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self.token is None or self.lost:
+            return
+        async with async_engine.begin() as conn:
+            await conn.execute(
+                update(JobLease)
+                .where(JobLease.name == self.name, JobLease.owner == self.owner, JobLease.token == self.token)
+                .values(expires_at=text("NOW()"))
+            )
+
+
+@asynccontextmanager
+async def lease_lock(name: str, ttl: int = LEASE_TTL):
+    """
+    async with lease_lock("kline_1m:binance:1:BTCUSDT") as lease:
+        if lease is None: 已被其他 worker / 运行持有，跳过
+    未开启（CLX_JOB_LOCKS=0）时直接返回一个不落库的租约
+    """
+    lease = Lease(name, get_shard_manager().worker_id, ttl)
+    if not LOCKS_ENABLED:
+        yield lease
+        return
+
+    if not await lease.acquire():
+        yield None
+        return
+    try:
+        yield lease
+    finally:
+        try:
+            await lease.release()
+        except Exception as e:
+            logger.warning(f"Lease {name} release failed, expires in {ttl}s: {e}")
+
+
+def job_lock_name(name: str) -> str:
+    """
+    flow 级单例锁名。开启分片时按 worker 区分：每个 worker 只处理哈希环分给自己的工作单元，
+    若全集群只允许一个运行，其余 worker 的分片在这一轮无人处理；工作单元之间的互斥由 lease_lock(unit.key) 保证
+    """
+    shard = get_shard_manager()
+    return f"job:{name}:{shard.worker_id}" if shard.enabled else f"job:{name}"
+
+
+def singleton(name: str | None = None, ttl: int = LEASE_TTL):
+    """
+    flow / 任务单例：同一时刻只有一个运行（开启分片时为每个 worker 一个），其余直接跳过（返回 None）。
+    运行期间同时持有分片成员会话（见 ShardManager.session）
+    """
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            async with lease_lock(job_lock_name(name or fn.__name__), ttl) as lease:
+                if lease is None:
+                    return None
+                async with get_shard_manager().session():
+                    return await fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,193 @@
+import asyncio
+from bisect import bisect
+from contextlib import asynccontextmanager
+from functools import lru_cache
+import hashlib
+import os
+import socket
+from typing import NamedTuple
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.dialects.mysql import insert
+
+from databases.mysql import WorkerMember, async_engine, ensure_tables
+from utils.logger import logger as _logger
+
+__all__ = ["HashRing", "MySQLMembership", "ShardManager", "WorkUnit", "get_shard_manager"]
+
+
+class WorkUnit(NamedTuple):
+    exchange: str
+    inst_type: int
+    symbol: str
+    job: str
+
+    @property
+    def key(self) -> str:
+        return f"{self.job}:{self.exchange}:{int(self.inst_type)}:{self.symbol}"
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """一致性哈希环（虚拟节点），成员增减时只迁移约 1/N 的工作单元"""
+
+    def __init__(self, nodes: list[str] | None = None, vnodes: int = 64):
+        self.vnodes = vnodes
+        self.nodes: frozenset[str] = frozenset()
+        self._hashes: list[int] = []
+        self._owners: list[str] = []
+        self.rebuild(nodes or [])
+
+    def rebuild(self, nodes: list[str]):
+        points = sorted((_hash(f"{node}#{i}"), node) for node in nodes for i in range(self.vnodes))
+        self._hashes = [h for h, _ in points]
+        self._owners = [n for _, n in points]
+        self.nodes = frozenset(nodes)
+
+    def owner(self, key: str) -> str | None:
+        if not self._hashes:
+            return None
+        idx = bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._owners[idx]
+
+
+class MySQLMembership:
+    """
+    基于 MySQL 的成员表：worker 定期心跳，超过 ttl 未心跳视为离开。
+    时间统一使用数据库 NOW()，避免各节点时钟偏差。
+    """
+
+    def __init__(self, worker_id: str, ttl: int = 30):
+        self.worker_id = worker_id
+        self.ttl = ttl
+        self._table_ready = False
+
+    async def heartbeat(self):
+        if not self._table_ready:
+            await ensure_tables(WorkerMember)
+            self._table_ready = True
+        stmt = insert(WorkerMember).values(worker_id=self.worker_id, heartbeat_at=text("NOW()"))
+        stmt = stmt.on_duplicate_key_update(heartbeat_at=text("NOW()"))
+        async with async_engine.begin() as conn:
+            await conn.execute(stmt)
+
+    async def members(self) -> list[str]:
+        stmt = select(WorkerMember.worker_id).where(
+            WorkerMember.heartbeat_at >= text(f"NOW() - INTERVAL {int(self.ttl)} SECOND")
+        )
+        async with async_engine.connect() as conn:
+            return sorted((await conn.execute(stmt)).scalars().all())
+
+    async def leave(self):
+        async with async_engine.begin() as conn:
+            await conn.execute(delete(WorkerMember).where(WorkerMember.worker_id == self.worker_id))
+
+
+class ShardManager:
+    """
+    将 (exchange, inst_type, symbol, job) 工作单元按一致性哈希分配给 N 个 worker。
+    未开启（CLX_SHARDING != 1）时单机运行，拥有全部工作单元。
+    开启时必须配置稳定的 CLX_WORKER_ID：按次启动的 flow 进程每次都是新 pid，
+    用 hostname-pid 会在成员表里留下大量幽灵成员，分配给它们的工作单元在 TTL 内无人处理。
+    """
+
+    def __init__(
+        self,
+        worker_id: str | None = None,
+        enabled: bool | None = None,
+        membership=None,
+        heartbeat_interval: float | None = None,
+        vnodes: int = 64,
+    ):
+        self.enabled = enabled if enabled is not None else os.getenv("CLX_SHARDING", "0") == "1"
+        worker_id = worker_id or os.getenv("CLX_WORKER_ID")
+        if self.enabled and not worker_id:
+            raise RuntimeError("CLX_SHARDING=1 requires a stable CLX_WORKER_ID")
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.heartbeat_interval = heartbeat_interval or float(os.getenv("CLX_SHARD_HEARTBEAT", "10"))
+        self.membership = membership or MySQLMembership(self.worker_id, ttl=int(self.heartbeat_interval * 3))
+        self.ring = HashRing([self.worker_id], vnodes=vnodes)
+        self.logger = _logger.bind(job_id="SHARDING", worker_id=self.worker_id)
+        self._task: asyncio.Task | None = None
+
+    async def sync(self):
+        """心跳 + 拉取成员，成员变化时重建哈希环（自动再平衡）"""
+        await self.membership.heartbeat()
+        members = await self.membership.members()
+        if self.worker_id not in members:
+            members.append(self.worker_id)
+        if frozenset(members) != self.ring.nodes:
+            self.logger.info(f"Rebalance: {sorted(self.ring.nodes)} → {sorted(members)}")
+            self.ring.rebuild(members)
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await self.sync()
+            except Exception as e:
+                self.logger.warning(f"Shard membership sync failed: {e}")
+
+    @property
+    def heartbeat_running(self) -> bool:
+        return self._task is not None and not self._task.done() and not self._task.get_loop().is_closed()
+
+    async def start(self) -> "ShardManager":
+        """
+        加入集群并在当前事件循环上启动后台心跳。
+        只在长期存活的循环上调用：常驻 worker 启动时，或按次启动的 flow run 开始时（见 session）
+        """
+        if self.enabled and not self.heartbeat_running:
+            await self.sync()
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+        return self
+
+    async def ready(self) -> "ShardManager":
+        """
+        flow / task 内获取分片视图（可在任意事件循环上重复调用，不启动心跳）：
+        心跳已在运行时直接使用其维护的哈希环，否则同步一次成员
+        """
+        if self.enabled and not self.heartbeat_running:
+            await self.sync()
+        return self
+
+    @asynccontextmanager
+    async def session(self):
+        """
+        flow run 级别的成员关系：常驻 worker 已在运行心跳时不做任何事；
+        按次启动的 flow 进程在开始时加入、结束时退出，不留下幽灵成员
+        """
+        if not self.enabled or self.heartbeat_running:
+            yield self
+            return
+        await self.start()
+        try:
+            yield self
+        finally:
+            try:
+                await self.stop()
+            except Exception as e:
+                self.logger.warning(f"Shard leave failed, expires in {self.membership.ttl}s: {e}")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self.enabled:
+            await self.membership.leave()
+
+    def owns(self, unit: WorkUnit) -> bool:
+        if not self.enabled:
+            return True
+        return self.ring.owner(unit.key) == self.worker_id
+
+    def filter(self, units):
+        return [u for u in units if self.owns(u)]
+
+
+@lru_cache
+def get_shard_manager() -> ShardManager:
+    return ShardManager()
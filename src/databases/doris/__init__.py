@@ -1,32 +1,109 @@
+import asyncio
+from dataclasses import dataclass, field
 from functools import lru_cache
-from io import BytesIO
+import hashlib
+import itertools
 import json
 import os
+import re
+import time
 from urllib.parse import quote
 
 import aiohttp
 from dotenv import load_dotenv
-from prefect import get_run_logger
-from sqlalchemy import text
+from sqlalchemy import TextClause, text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
+from utils.lanes import LaneGate
+
+from .spool import DorisSpool, SpoolFullError
+
 load_dotenv()
 
+# StreamLoad 失败信息中出现这些关键字说明是数据/表结构问题，重试无意义
+FATAL_MESSAGE_MARKERS = (
+    "too many filtered rows",
+    "data_quality_error",
+    "unknown table",
+    "unknown column",
+    "access denied",
+)
+# 4xx 中只有请求超时 / 限流值得重试，其余（认证失败、库表不存在、请求非法）重试也不会成功
+RETRYABLE_HTTP_STATUS = (408, 429)
+
+
+class StreamLoadError(Exception):
+    def __init__(self, message: str, label: str | None = None, result: dict | None = None, retryable: bool = True):
+        super().__init__(message)
+        self.label = label
+        self.result = result or {}
+        self.retryable = retryable
+
+
+@dataclass
+class StreamLoadOutcome:
+    """
+    单次 StreamLoad 的结果
+    status: success（本次导入）/ duplicate（label 已存在，之前已导入）/ spooled（已落盘，稍后重放）
+    """
+
+    table: str
+    label: str
+    status: str
+    attempts: int
+    rows: int
+    result: dict = field(default_factory=dict)
+
+
+@dataclass
+class BulkLoadStats:
+    """
+    分区并行 StreamLoad 的汇总统计
+    """
+
+    table: str
+    loads: int = 0
+    rows: int = 0
+    duplicates: int = 0
+    spooled: int = 0  # 已落盘待重放的子导入，不计入 loads / rows
+    spooled_rows: int = 0
+    elapsed: float = 0.0
+    outcomes: list[StreamLoadOutcome] = field(default_factory=list)
+    failed: list[str] = field(default_factory=list)
+
+
+def _run_logger():
+    """Prefect 运行上下文中使用 run logger，否则退回应用 logger；prefect 按需导入"""
+    try:
+        from prefect import get_run_logger
+
+        return get_run_logger()
+    except Exception:
+        from utils.logger import logger
+
+        return logger.bind(job_id="DORIS")
+
 
 class DorisAsyncDB:
     def __init__(self):
-        self.logger = get_run_logger()
+        self.logger = _run_logger()
         db_host = os.getenv("DORIS_HOST", "127.0.0.1")
         db_user = os.getenv("DORIS_USER", "root")
         db_pass = os.getenv("DORIS_PASSWORD", "")
         db_name = os.getenv("DORIS_DB", "default")
 
-        self.DATABASE_URL = f"mysql+aiomysql://{db_user}:{db_pass}@{db_host}:9030/{db_name}"
+        db_port = os.getenv("DORIS_QUERY_PORT", "9030")
+
+        self.DATABASE_URL = f"mysql+aiomysql://{db_user}:{db_pass}@{db_host}:{db_port}/{db_name}"
         self.engine = create_async_engine(
             self.DATABASE_URL,
             echo=False,
             pool_pre_ping=True,
+            pool_size=int(os.getenv("DORIS_POOL_SIZE", "5")),
+            max_overflow=int(os.getenv("DORIS_POOL_MAX_OVERFLOW", "10")),
+            pool_timeout=float(os.getenv("DORIS_POOL_TIMEOUT", "30")),
+            pool_recycle=int(os.getenv("DORIS_POOL_RECYCLE", "3600")),
         )
 
         self.SessionLocal = sessionmaker(
@@ -41,33 +118,79 @@ class DorisAsyncDB:
         async with self.SessionLocal() as session:
             yield session
 
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _statement(sql: str) -> TextClause:
+        """
+        复用 TextClause：同一条 SQL 模板只解析一次绑定参数，并命中 SQLAlchemy 编译缓存。
+        SQL 中的变量请使用 :name 绑定参数，不要字符串拼接。
+        """
+        return text(sql)
+
     async def query(self, sql: str, params: dict | None = None):
         """
         执行查询语句，返回与 ClickHouse client 相同风格的结构：
         result.result_rows = [(...), (...)]
         """
         async with self.engine.connect() as conn:
-            result = await conn.execute(text(sql), params or {})
+            result = await conn.execute(self._statement(sql), params or {})
             rows = result.fetchall()
             return rows
 
+    async def stream(self, sql: str, params: dict | None = None, chunk_size: int = 10000):
+        """
+        服务端游标流式查询，每次 yield 至多 chunk_size 行，不把整个结果集加载到内存
+        """
+        async with self.engine.connect() as conn:
+            result = await conn.stream(self._statement(sql), params or {})
+            async for rows in result.partitions(chunk_size):
+                yield rows
+
     async def execute(self, sql: str, params: dict | None = None):
         """
         执行写入类语句 (INSERT/UPDATE/DELETE)
         """
         async with self.engine.begin() as conn:
-            await conn.execute(text(sql), params or {})
+            await conn.execute(self._statement(sql), params or {})
 
 
 class DorisStreamLoader:
     def __init__(self):
-        self.logger = get_run_logger()
+        self.logger = _run_logger()
         self.host = os.environ.get("DORIS_HOST")
         self.http_port = os.environ.get("DORIS_HTTP_PORT", "8030")  # FE HTTP PORT
         self.user = os.environ.get("DORIS_USER")
         self.password = quote(os.environ.get("DORIS_PASSWORD", ""))
         self.database = os.getenv("DORIS_DB", "default")
 
+        self.retries = int(os.getenv("DORIS_STREAM_LOAD_RETRIES", "5"))
+        self.retry_backoff = float(os.getenv("DORIS_STREAM_LOAD_BACKOFF", "1"))
+        self.retry_backoff_max = float(os.getenv("DORIS_STREAM_LOAD_BACKOFF_MAX", "30"))
+        self.timeout = aiohttp.ClientTimeout(total=float(os.getenv("DORIS_STREAM_LOAD_TIMEOUT", "300")))
+
+        # 大批量导入：按分区/行数拆分后并发写入
+        self.bulk_max_rows = int(os.getenv("DORIS_BULK_MAX_ROWS", "50000"))
+        self.bulk_concurrency = int(os.getenv("DORIS_BULK_CONCURRENCY", "4"))
+        # 进程内 StreamLoad 并发槽位，按优先级通道分配（回补最多占一半，实时写入优先）
+        self.lane_gate = LaneGate(int(os.getenv("DORIS_LOAD_SLOTS", "8")))
+        # 可选：直接写 BE（host:port,host:port），不配置则由 FE 重定向分配 BE
+        be_hosts = [h.strip() for h in os.getenv("DORIS_BE_HOSTS", "").split(",") if h.strip()]
+        self._be_cycle = itertools.cycle(be_hosts) if be_hosts else None
+
+        # 可选：Doris 不可用时落盘，恢复后后台重放
+        spool_dir = os.getenv("DORIS_SPOOL_DIR")
+        self.spool = (
+            DorisSpool(
+                spool_dir,
+                max_bytes=int(os.getenv("DORIS_SPOOL_MAX_BYTES", str(1024**3))),
+                segment_bytes=int(os.getenv("DORIS_SPOOL_SEGMENT_BYTES", str(64 * 1024**2))),
+                logger=self.logger,
+            )
+            if spool_dir
+            else None
+        )
+        self.spool_replay_interval = float(os.getenv("DORIS_SPOOL_REPLAY_INTERVAL", "10"))
+
         if not self.host or not self.user:
             raise Exception("DORIS_HOST and DORIS_USER must be set")
 
@@ -88,7 +211,7 @@ class DorisStreamLoader:
 
         username, password = auth
 
-        async with aiohttp.ClientSession() as session:
+        async with aiohttp.ClientSession(timeout=self.timeout) as session:
             # aiohttp 的 BasicAuth
             aio_auth = aiohttp.BasicAuth(username, password)
 
@@ -101,11 +224,14 @@ class DorisStreamLoader:
                 headers=headers,
                 auth=aio_auth,
             ) as resp:
+                text = await resp.text()
                 try:
-                    text = await resp.text()
                     result = json.loads(text)
-                except Exception as e:
-                    raise Exception(f"StreamLoad response not JSON: {resp.text}") from e
+                except ValueError as e:
+                    raise StreamLoadError(
+                        f"StreamLoad response not JSON (HTTP {resp.status}): {text}",
+                        retryable=self._classify_status(resp.status) != "fatal",
+                    ) from e
                 return resp, result
 
     # -----------------------------
@@ -153,14 +279,13 @@ class DorisStreamLoader:
     #     else:
     #         raise Exception(f"StreamLoad to {database}.{table} failed: {result}")
 
-    async def send_rows(self, rows, table: str, column_names: list[str] | None = None, **kwargs):
+    @staticmethod
+    def _encode_rows(rows, column_names: list[str] | None = None) -> tuple[list[str], str]:
         """
-        写入 Doris StreamLoad:
+        rows → (column_names, csv_data)
         - rows: list[dict] or list[list]
         - column_names: required for list[list]，可选 for list[dict]
         """
-        if not rows:
-            return
         # -------------------
         # 1. 处理 list[dict]
         # -------------------
@@ -200,11 +325,91 @@ class DorisStreamLoader:
         else:
             raise ValueError("rows must be list[dict], list[list], or DataFrame")
 
+        return column_names, csv_data
+
+    def make_label(self, table: str, payload: bytes, column_names: list[str], batch_id: str | None = None) -> str:
+        """
+        生成确定性的 StreamLoad label（Doris 用 label 做导入去重）：
+        - 指定 batch_id 时：{db}_{table}_{batch_id}
+        - 否则：{db}_{table}_{sha1(columns + payload)}
+        同一批数据重试时 label 不变，Doris 会拒绝重复导入。
+        """
+        if batch_id is not None:
+            suffix = re.sub(r"[^-_A-Za-z0-9:]", "_", str(batch_id))
+        else:
+            digest = hashlib.sha1(",".join(column_names).encode("utf-8"))
+            digest.update(b"\0")
+            digest.update(payload)
+            suffix = digest.hexdigest()
+        label = f"{self.database}_{table}_{suffix}"
+        # Doris label 最长 128 字符
+        if len(label) > 128:
+            label = f"{table[:60]}_{hashlib.sha1(label.encode('utf-8')).hexdigest()}"
+        return label
+
+    def _streamload_url(self, table: str) -> str:
+        if self._be_cycle is not None:
+            return f"http://{next(self._be_cycle)}/api/{self.database}/{table}/_stream_load"
+        return f"http://{self.host}:{self.http_port}/api/{self.database}/{table}/_stream_load"
+
+    @staticmethod
+    def _classify_status(status: int) -> str:
+        """
+        非 200 的 HTTP 状态 → transient / fatal
+        """
+        if 400 <= status < 500 and status not in RETRYABLE_HTTP_STATUS:
+            return "fatal"
+        return "transient"
+
+    @staticmethod
+    def _classify_result(result: dict) -> str:
+        """
+        StreamLoad 返回 → success / duplicate / transient / fatal
+        """
+        status = result.get("Status")
+        if status in ("Success", "Publish Timeout"):
+            # Publish Timeout：导入已提交，只是可见性延迟，无需重试
+            return "success"
+        if status == "Label Already Exists":
+            # 同 label 已导入完成 → 视为成功；仍在导入中 → 稍后重试确认结果
+            if result.get("ExistingJobStatus") == "FINISHED":
+                return "duplicate"
+            return "transient"
+        message = str(result.get("Message", "")).lower()
+        if any(marker in message for marker in FATAL_MESSAGE_MARKERS):
+            return "fatal"
+        return "transient"
+
+    async def load(
+        self,
+        table: str,
+        payload: bytes,
+        column_names: list[str],
+        label: str,
+        retries: int | None = None,
+        spool: bool = True,
+        **kwargs,
+    ) -> StreamLoadOutcome:
+        """
+        带 label 的 StreamLoad，瞬时错误指数退避重试。
+        label 保证重试幂等，因此可以放心重试超时等结果未知的请求。
+        启用 spool 时：重试耗尽的批次、以及该表仍有待重放批次时的新批次（保持顺序）写入本地 spool。
+        """
+        # retries 为总尝试次数，至少尝试一次
+        retries = max(1, self.retries if retries is None else retries)
+
+        if spool and self.spool is not None and self.spool.pending:
+            # 进程重启后遗留的待重放批次也在这里恢复重放
+            self.spool.start_replay(self, interval=self.spool_replay_interval)
+            if self.spool.pending[table]:
+                return self._spool_batch(table, payload, column_names, label, kwargs, attempts=0)
+
         # -------------------
         # StreamLoad headers
         # -------------------
         headers = {
             "Expect": "100-continue",
+            "label": label,
             "column_separator": r"\t",
             "enclose": '"',
             "trim_double_quotes": "true",
@@ -213,22 +418,173 @@ class DorisStreamLoader:
         }
         headers.update(kwargs)
 
-        streamload_url = f"http://{self.host}:{self.http_port}/api/{self.database}/{table}/_stream_load"
-
-        resp, result = await self._send_streamload_request_async(
-            streamload_url,
-            data=BytesIO(csv_data.encode("utf-8")),
-            headers=headers,
-            auth=(self.user, self.password),
+        result: dict = {}
+        for attempt in range(1, retries + 1):
+            # 配置了 DORIS_BE_HOSTS 时每次尝试换一个 BE，不在故障 BE 上重试
+            streamload_url = self._streamload_url(table)
+            try:
+                async with self.lane_gate.slot():
+                    resp, result = await self._send_streamload_request_async(
+                        streamload_url,
+                        data=payload,
+                        headers=headers,
+                        auth=(self.user, self.password),
+                    )
+                if resp.status == 200:
+                    kind = self._classify_result(result)
+                else:
+                    kind = self._classify_status(resp.status)
+                    result = {"HttpStatus": resp.status, **result}
+            except (aiohttp.ClientError, TimeoutError, StreamLoadError) as e:
+                result = {"Status": "Error", "Message": str(e)}
+                kind = "transient" if getattr(e, "retryable", True) else "fatal"
+
+            if kind in ("success", "duplicate"):
+                return StreamLoadOutcome(
+                    table=table,
+                    label=label,
+                    status=kind,
+                    attempts=attempt,
+                    rows=int(result.get("NumberLoadedRows", 0) or 0),
+                    result=result,
+                )
+
+            if kind == "fatal":
+                break
+
+            if attempt < retries:
+                delay = min(self.retry_backoff * 2 ** (attempt - 1), self.retry_backoff_max)
+                self.logger.warning(
+                    f"StreamLoad to {self.database}.{table} label={label} failed "
+                    f"(attempt {attempt}/{retries}), retrying in {delay}s: {result}"
+                )
+                await asyncio.sleep(delay)
+
+        if kind != "fatal" and spool and self.spool is not None:
+            return self._spool_batch(table, payload, column_names, label, kwargs, attempts=retries)
+
+        self.logger.error(f"StreamLoad to {self.database}.{table} label={label} failed: {result}")
+        raise StreamLoadError(
+            f"StreamLoad to {self.database}.{table} failed: {result}",
+            label=label,
+            result=result,
+            retryable=kind != "fatal",
         )
 
-        if resp.status == 200 and result.get("Status") == "Success":
-            return result
-        else:
-            self.logger.info(column_names)
-            self.logger.info(csv_data)
-            self.logger.error(f"StreamLoad to {self.database}.{table} failed: {result}")
-            raise Exception(f"StreamLoad to {self.database}.{table} failed: {result}")
+    def _spool_batch(
+        self, table: str, payload: bytes, column_names: list[str], label: str, headers: dict, attempts: int
+    ) -> StreamLoadOutcome:
+        try:
+            self.spool.append(table, label, column_names, payload, headers)
+        except SpoolFullError as e:
+            raise StreamLoadError(str(e), label=label) from e
+        self.logger.warning(f"StreamLoad to {self.database}.{table} label={label} spooled for replay")
+        self.spool.start_replay(self, interval=self.spool_replay_interval)
+        return StreamLoadOutcome(table=table, label=label, status="spooled", attempts=attempts, rows=0)
+
+    async def send_rows(
+        self,
+        rows,
+        table: str,
+        column_names: list[str] | None = None,
+        batch_id: str | None = None,
+        retries: int | None = None,
+        **kwargs,
+    ) -> StreamLoadOutcome | None:
+        """
+        写入 Doris StreamLoad:
+        - rows: list[dict] or list[list]
+        - column_names: required for list[list]，可选 for list[dict]
+        - batch_id: 指定时用作 label 后缀，否则按内容哈希生成 label
+        """
+        if rows is None or len(rows) == 0:
+            return None
+
+        column_names, csv_data = self._encode_rows(rows, column_names)
+        payload = csv_data.encode("utf-8")
+        label = self.make_label(table, payload, column_names, batch_id)
+
+        outcome = await self.load(table, payload, column_names, label, retries=retries, **kwargs)
+        if outcome.status == "duplicate":
+            self.logger.info(f"StreamLoad to {self.database}.{table} label={label} already loaded, skipped")
+        return outcome
+
+    @staticmethod
+    def split_rows(rows: list[dict], partition_key: str | None = "dt", max_rows: int = 50000) -> list[list[dict]]:
+        """
+        按分区（partition_key 的日期部分）和行数拆分，保持分区内原有顺序
+        """
+        groups: dict[str, list[dict]] = {}
+        for row in rows:
+            value = row.get(partition_key) if partition_key else None
+            key = str(value)[:10] if value is not None else ""
+            groups.setdefault(key, []).append(row)
+
+        chunks = []
+        for key in sorted(groups):
+            group = groups[key]
+            for i in range(0, len(group), max_rows):
+                chunks.append(group[i : i + max_rows])
+        return chunks
+
+    async def send_rows_partitioned(
+        self,
+        rows: list[dict],
+        table: str,
+        column_names: list[str] | None = None,
+        partition_key: str | None = "dt",
+        max_rows: int | None = None,
+        concurrency: int | None = None,
+        **kwargs,
+    ) -> BulkLoadStats:
+        """
+        大批量写入（回补场景）：
+        按日期分区 / 行数拆成多个 StreamLoad，限制并发后并行写入多个 BE。
+        每个子导入按内容生成 label，部分失败后整体重试不会重复导入。
+        """
+        stats = BulkLoadStats(table=table)
+        if not rows:
+            return stats
+
+        if column_names is None:
+            column_names = list(rows[0].keys())
+
+        chunks = self.split_rows(rows, partition_key, max_rows or self.bulk_max_rows)
+        semaphore = asyncio.Semaphore(concurrency or self.bulk_concurrency)
+        start = time.monotonic()
+
+        async def _load_chunk(chunk: list[dict]) -> StreamLoadOutcome:
+            async with semaphore:
+                return await self.send_rows(chunk, table, column_names=column_names, **kwargs)
+
+        results = await asyncio.gather(*(_load_chunk(c) for c in chunks), return_exceptions=True)
+
+        for chunk, result in zip(chunks, results, strict=True):
+            if isinstance(result, BaseException):
+                stats.failed.append(getattr(result, "label", None) or str(result))
+                continue
+            stats.outcomes.append(result)
+            if result.status == "spooled":
+                stats.spooled += 1
+                stats.spooled_rows += len(chunk)
+                continue
+            stats.loads += 1
+            stats.rows += len(chunk)
+            if result.status == "duplicate":
+                stats.duplicates += 1
+        stats.elapsed = round(time.monotonic() - start, 3)
+
+        self.logger.info(
+            f"Bulk StreamLoad to {self.database}.{table}: {stats.loads}/{len(chunks)} loads, "
+            f"{stats.rows} rows, {stats.duplicates} duplicates, "
+            f"{stats.spooled} spooled ({stats.spooled_rows} rows), elapsed={stats.elapsed}s"
+        )
+        if stats.failed:
+            raise StreamLoadError(
+                f"Bulk StreamLoad to {self.database}.{table}: {len(stats.failed)}/{len(chunks)} loads failed",
+                result={"failed": stats.failed},
+            )
+        return stats
 
 
 # ------------------
@@ -0,0 +1,189 @@
+from collections.abc import Iterator, Sequence
+from datetime import datetime
+from functools import lru_cache
+import os
+import re
+
+from dotenv import load_dotenv
+
+__all__ = ["DorisFlightReader", "get_flight_reader", "read_klines"]
+
+load_dotenv()
+
+SENTIMENT_INTERVALS = ("5m", "1h", "1d")
+KLINE_INTERVALS = ("1m", "1h", "1d")
+COLUMN_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _to_dt(value: datetime | str | int) -> str:
+    """毫秒时间戳 / datetime → "YYYY-mm-dd HH:MM:SS"，字符串原样返回"""
+    if isinstance(value, int):
+        value = datetime.fromtimestamp(value / 1000)
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return value
+
+
+class DorisFlightReader:
+    """
+    通过 Doris Arrow Flight SQL 批量读取（列式传输），用于研究任务读取大量 kline / 资金费率 / 多空比数据。
+    依赖可选包：pip install "clx-etl[flight]"（adbc-driver-flightsql, pyarrow）
+    """
+
+    def __init__(self):
+        self.host = os.getenv("DORIS_HOST", "127.0.0.1")
+        self.port = os.getenv("DORIS_FLIGHT_PORT", "8070")  # FE arrow_flight_sql_port
+        self.user = os.getenv("DORIS_USER", "root")
+        self.password = os.getenv("DORIS_PASSWORD", "")
+        self.database = os.getenv("DORIS_DB", "default")
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            try:
+                import adbc_driver_flightsql.dbapi as flight_sql
+                from adbc_driver_manager import DatabaseOptions
+            except ImportError as e:
+                raise ImportError('Arrow Flight reader requires: pip install "clx-etl[flight]"') from e
+
+            self._conn = flight_sql.connect(
+                uri=f"grpc://{self.host}:{self.port}",
+                db_kwargs={
+                    DatabaseOptions.USERNAME.value: self.user,
+                    DatabaseOptions.PASSWORD.value: self.password,
+                },
+                autocommit=True,
+            )
+            with self._conn.cursor() as cursor:
+                cursor.execute(f"USE `{self.database}`")
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # -----------------------------
+    # Generic
+    # -----------------------------
+    def iter_batches(self, sql: str, parameters: Sequence | None = None) -> Iterator:
+        """
+        按 Arrow RecordBatch 分块读取，不一次性物化整个结果；parameters 按 ? 占位符绑定
+        """
+        with self._connect().cursor() as cursor:
+            cursor.execute(sql, parameters)
+            yield from cursor.fetch_record_batch()
+
+    def read(self, sql: str, parameters: Sequence | None = None):
+        """查询结果 → pyarrow.Table"""
+        with self._connect().cursor() as cursor:
+            cursor.execute(sql, parameters)
+            return cursor.fetch_arrow_table()
+
+    def read_numpy(self, sql: str, parameters: Sequence | None = None) -> dict:
+        """查询结果 → {column: numpy.ndarray}"""
+        table = self.read(sql, parameters)
+        return {name: table.column(name).to_numpy() for name in table.column_names}
+
+    @staticmethod
+    def _exchange_id(exchange: str) -> int:
+        from metadata import get_exchange_registry
+
+        registry = get_exchange_registry()
+        # Flight 读取本身是同步阻塞的，未预先加载时在这里显式同步加载一次
+        if not registry.loaded:
+            registry.refresh_sync()
+        return registry.id_of(exchange)
+
+    def _select(
+        self,
+        table: str,
+        exchange: str,
+        symbol: str,
+        start: datetime | str | int,
+        end: datetime | str | int,
+        inst_type: int | None = None,
+        columns: list[str] | None = None,
+    ) -> tuple[str, list]:
+        """
+        → (sql, parameters)：条件值全部走 ADBC 参数绑定，列名只允许标识符
+        """
+        where = ["exchange_id = ?", "symbol = ?", "dt >= ?", "dt < ?"]
+        params = [self._exchange_id(exchange), symbol, _to_dt(start), _to_dt(end)]
+        if inst_type is not None:
+            where.append("inst_type = ?")
+            params.append(int(inst_type))
+        for c in columns or ():
+            if not COLUMN_NAME.match(c):
+                raise ValueError(f"Invalid column name: {c!r}")
+        cols = ", ".join(f"`{c}`" for c in columns) if columns else "*"
+        return f"SELECT {cols} FROM {table} WHERE {' AND '.join(where)} ORDER BY dt", params
+
+    def _read_table(self, query: tuple[str, list], as_numpy: bool):
+        return self.read_numpy(*query) if as_numpy else self.read(*query)
+
+    # -----------------------------
+    # Tables
+    # -----------------------------
+    def read_klines(
+        self,
+        exchange: str,
+        symbol: str,
+        interval: str,
+        start: datetime | str | int,
+        end: datetime | str | int,
+        inst_type: int | None = None,
+        columns: list[str] | None = None,
+        as_numpy: bool = False,
+    ):
+        """
+        读取 kline_{interval}，时间区间 [start, end)，start/end 支持 datetime、字符串或毫秒时间戳
+        """
+        if interval not in KLINE_INTERVALS:
+            raise ValueError(f"interval must be one of {KLINE_INTERVALS}")
+        query = self._select(f"kline_{interval}", exchange, symbol, start, end, inst_type, columns)
+        return self._read_table(query, as_numpy)
+
+    def read_funding_settlements(
+        self,
+        exchange: str,
+        symbol: str,
+        start: datetime | str | int,
+        end: datetime | str | int,
+        columns: list[str] | None = None,
+        as_numpy: bool = False,
+    ):
+        query = self._select("funding_settlement", exchange, symbol, start, end, columns=columns)
+        return self._read_table(query, as_numpy)
+
+    def read_market_sentiment(
+        self,
+        exchange: str,
+        symbol: str,
+        interval: str,
+        start: datetime | str | int,
+        end: datetime | str | int,
+        columns: list[str] | None = None,
+        as_numpy: bool = False,
+    ):
+        if interval not in SENTIMENT_INTERVALS:
+            raise ValueError(f"interval must be one of {SENTIMENT_INTERVALS}")
+        query = self._select(f"market_sentiment_{interval}", exchange, symbol, start, end, columns=columns)
+        return self._read_table(query, as_numpy)
+
+
+@lru_cache
+def get_flight_reader() -> DorisFlightReader:
+    return DorisFlightReader()
+
+
+def read_klines(
+    exchange: str,
+    symbol: str,
+    interval: str,
+    start: datetime | str | int,
+    end: datetime | str | int,
+    **kwargs,
+):
+    return get_flight_reader().read_klines(exchange, symbol, interval, start, end, **kwargs)
+
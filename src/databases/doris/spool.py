@@ -0,0 +1,240 @@
+import asyncio
+from collections import Counter
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+
+from utils.lanes import Lane, use_lane
+
+__all__ = ["DorisSpool", "SpoolFullError"]
+
+# 记录格式：[length:uint32][crc32:uint32][zlib(header_json + "\n" + payload)]
+RECORD_HEADER = struct.Struct(">II")
+SEGMENT_PREFIX = "seg-"
+SEGMENT_SUFFIX = ".spool"
+CURSOR_FILE = "cursor.json"
+
+
+class SpoolFullError(Exception):
+    pass
+
+
+class DorisSpool:
+    """
+    Doris 不可用时的本地落盘队列：
+    - append：写入失败 / 被背压的 StreamLoad 批次，按段文件（segment）顺序追加，zlib 压缩
+    - replay：后台按写入顺序重放（mmap 读取），成功后推进 cursor，整段完成后删除段文件
+    - 批次保留原 label，重放与原导入之间天然幂等
+    StreamLoader 是进程级单例，prefect 工作线程里的多个事件循环会同时 append / 触发重放，
+    活动段、大小、pending 计数和段切换都在 _lock 内修改（不跨 await 持有）
+    """
+
+    def __init__(self, directory: str, max_bytes: int, segment_bytes: int, logger):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes
+        self.logger = logger
+        os.makedirs(directory, exist_ok=True)
+
+        self.metrics = Counter()
+        self._lock = threading.Lock()
+        self._active: str | None = None
+        self._active_bytes = 0
+        self._replay_task: asyncio.Task | None = None
+        self._cursor = self._read_cursor()
+        # 段文件总大小只在启动时统计一次，之后随追加 / 删除增量维护，append 不再逐次 listdir + stat
+        self._size_bytes = sum(os.path.getsize(p) for p in self._segments())
+        # 每张表待重放的批次数，用于判断新批次是否需要排队到 spool 之后
+        self.pending = Counter()
+        for _, _, record in self._iter_records():
+            self.pending[record["table"]] += 1
+
+    # -----------------------------
+    # Segments & cursor
+    # -----------------------------
+    def _segments(self) -> list[str]:
+        names = sorted(
+            n for n in os.listdir(self.directory) if n.startswith(SEGMENT_PREFIX) and n.endswith(SEGMENT_SUFFIX)
+        )
+        return [os.path.join(self.directory, n) for n in names]
+
+    def _new_segment_path(self) -> str:
+        segments = self._segments()
+        seq = int(os.path.basename(segments[-1])[len(SEGMENT_PREFIX) : -len(SEGMENT_SUFFIX)]) + 1 if segments else 0
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{seq:012d}{SEGMENT_SUFFIX}")
+
+    def _read_cursor(self) -> dict:
+        try:
+            with open(os.path.join(self.directory, CURSOR_FILE)) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {"segment": None, "offset": 0}
+
+    def _write_cursor(self, segment: str | None, offset: int):
+        self._cursor = {"segment": os.path.basename(segment) if segment else None, "offset": offset}
+        tmp = os.path.join(self.directory, CURSOR_FILE + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self._cursor, f)
+        os.replace(tmp, os.path.join(self.directory, CURSOR_FILE))
+
+    def _remove_segment(self, path: str):
+        with self._lock:
+            self._size_bytes -= os.path.getsize(path)
+            os.remove(path)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size_bytes
+
+    # -----------------------------
+    # Append
+    # -----------------------------
+    def append(self, table: str, label: str, column_names: list[str], payload: bytes, headers: dict | None = None):
+        header = json.dumps({"table": table, "label": label, "columns": column_names, "headers": headers or {}})
+        body = zlib.compress(header.encode("utf-8") + b"\n" + payload)
+        record = RECORD_HEADER.pack(len(body), zlib.crc32(body)) + body
+
+        with self._lock:
+            if self._size_bytes + len(record) > self.max_bytes:
+                self.metrics["dropped_records"] += 1
+                raise SpoolFullError(f"Doris spool full ({self.max_bytes} bytes), dropped {table} label={label}")
+
+            if self._active is None or self._active_bytes >= self.segment_bytes:
+                self._active = self._new_segment_path()
+                self._active_bytes = 0
+
+            # 写入也在锁内：同一段的记录不会交错，重放读到的封存段也不会有写了一半的记录
+            with open(self._active, "ab") as f:
+                f.write(record)
+                f.flush()
+                os.fsync(f.fileno())
+
+            self._active_bytes += len(record)
+            self._size_bytes += len(record)
+            self.pending[table] += 1
+            self.metrics["spooled_records"] += 1
+            self.metrics["spooled_bytes"] += len(payload)
+
+    # -----------------------------
+    # Replay
+    # -----------------------------
+    def _iter_records(self, segments: list[str] | None = None):
+        """
+        从 cursor 开始按顺序读取 → (segment, end_offset, record)
+        """
+        cursor_segment = self._cursor.get("segment")
+        for path in self._segments() if segments is None else segments:
+            name = os.path.basename(path)
+            if cursor_segment and name < cursor_segment:
+                continue
+            offset = self._cursor.get("offset", 0) if name == cursor_segment else 0
+            if os.path.getsize(path) <= offset:
+                continue
+
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                while offset + RECORD_HEADER.size <= len(mm):
+                    length, crc = RECORD_HEADER.unpack_from(mm, offset)
+                    start = offset + RECORD_HEADER.size
+                    body = mm[start : start + length]
+                    if len(body) < length or zlib.crc32(body) != crc:
+                        # 写入中断导致的尾部残缺记录，丢弃该段剩余部分
+                        self.logger.warning(f"Doris spool: truncated record in {name} at offset {offset}")
+                        self.metrics["corrupt_records"] += 1
+                        break
+                    header, payload = zlib.decompress(body).split(b"\n", 1)
+                    offset = start + length
+                    yield path, offset, {**json.loads(header), "payload": payload}
+
+    async def replay(self, loader) -> int:
+        """
+        按顺序重放，遇到失败即停止（保持顺序），返回本次重放的批次数
+        """
+        # 封存当前活动段，之后的新批次写入新段；本轮只重放已封存的段
+        with self._lock:
+            self._active = None
+            sealed = self._segments()
+
+        replayed = 0
+        last_segment = None
+        for segment, offset, record in self._iter_records(sealed):
+            if last_segment and segment != last_segment:
+                self._remove_segment(last_segment)
+            last_segment = segment
+
+            try:
+                await loader.load(
+                    record["table"],
+                    record["payload"],
+                    record["columns"],
+                    record["label"],
+                    spool=False,
+                    **record["headers"],
+                )
+            except Exception as e:
+                if getattr(e, "retryable", True):
+                    raise
+                # 数据本身有问题，重放也不会成功，跳过避免阻塞后续批次
+                self.logger.error(f"Doris spool: discarded {record['table']} label={record['label']}: {e}")
+                with self._lock:
+                    self.metrics["discarded_records"] += 1
+            self._write_cursor(segment, offset)
+            with self._lock:
+                self.pending[record["table"]] -= 1
+                if self.pending[record["table"]] <= 0:
+                    del self.pending[record["table"]]
+                self.metrics["replayed_records"] += 1
+            replayed += 1
+
+        if last_segment:
+            self._remove_segment(last_segment)
+            self._write_cursor(None, 0)
+        return replayed
+
+    async def _replay_loop(self, loader, interval: float, max_interval: float):
+        with use_lane(Lane.BACKFILL):
+            await self._replay_until_empty(loader, interval, max_interval)
+        if self._replay_task is asyncio.current_task():
+            self._replay_task = None
+
+    async def _replay_until_empty(self, loader, interval: float, max_interval: float):
+        # 重放属于补数据，只占用回补通道的写入槽位
+        delay = interval
+        while self.pending:
+            try:
+                replayed = await self.replay(loader)
+                if replayed:
+                    self.logger.info(f"Doris spool: replayed {replayed} batches")
+                delay = interval
+            except Exception as e:
+                with self._lock:
+                    self.metrics["replay_failures"] += 1
+                self.logger.warning(f"Doris spool: replay failed, retrying in {delay}s: {e}")
+                delay = min(delay * 2, max_interval)
+            await asyncio.sleep(delay)
+
+    @property
+    def replay_running(self) -> bool:
+        """重放任务所在的事件循环已关闭（短生命周期的 asyncio.run）时，任务不会再被调度，视为未运行"""
+        task = self._replay_task
+        return task is not None and not task.done() and not task.get_loop().is_closed()
+
+    def start_replay(self, loader, interval: float = 10, max_interval: float = 300):
+        # 多个线程同时触发时只启动一个重放任务
+        with self._lock:
+            if not self.replay_running:
+                self._replay_task = asyncio.get_running_loop().create_task(
+                    self._replay_loop(loader, interval, max_interval)
+                )
+            return self._replay_task
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self.metrics,
+                "pending_records": sum(self.pending.values()),
+                "pending_bytes": self._size_bytes,
+                "segments": len(self._segments()),
+            }
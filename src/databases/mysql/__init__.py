@@ -1,16 +1,32 @@
 from contextlib import asynccontextmanager
 import os
+from typing import TYPE_CHECKING
 
 from dotenv import load_dotenv
-import pandas as pd
 from sqlalchemy import create_engine, text
 from sqlalchemy.dialects.mysql import insert
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base
 
-from .models import ExchangeInfo, ExchangeSymbol
-
-__all__ = ["ExchangeInfo", "ExchangeSymbol", "async_engine", "async_upsert_dataframe", "get_session", "sync_engine"]
+from .models import ExchangeInfo, ExchangeSymbol, JobLease, KlineBackfillQueue, RateLimitWindow, WorkerMember
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+__all__ = [
+    "ExchangeInfo",
+    "ExchangeSymbol",
+    "JobLease",
+    "KlineBackfillQueue",
+    "RateLimitWindow",
+    "WorkerMember",
+    "async_engine",
+    "async_upsert",
+    "async_upsert_dataframe",
+    "ensure_tables",
+    "get_session",
+    "sync_engine",
+]
 
 load_dotenv()
 
@@ -39,7 +55,13 @@ async def get_session():
         yield session
 
 
-async def async_upsert_dataframe(df: pd.DataFrame, model, update_fields: list[str]):
+async def ensure_tables(*models):
+    """创建服务自身维护的表（如集群协调表），已存在则跳过"""
+    async with async_engine.begin() as conn:
+        await conn.run_sync(lambda c: models[0].metadata.create_all(c, tables=[m.__table__ for m in models]))
+
+
+async def async_upsert_dataframe(df: "pd.DataFrame", model, update_fields: list[str]):
     """
     异步批量 upsert DataFrame 到 MySQL 表中（支持 ON DUPLICATE KEY UPDATE）
     """
@@ -61,9 +83,10 @@ async def async_upsert_dataframe(df: pd.DataFrame, model, update_fields: list[st
         await conn.execute(upsert_stmt, insert_values)
 
 
-async def async_upsert(values: list[dict], model, update_fields: list[str]):
+async def async_upsert(values: list[dict], model, update_fields: list[str], chunk_size: int = 500):
     """
     异步批量 upsert 到 MySQL 表中（支持 ON DUPLICATE KEY UPDATE）
+    按 chunk_size 分批 executemany，避免单条超大语句
     """
     if not values:
         print("⚠️ Empty values, skip upsert.")
@@ -71,7 +94,8 @@ async def async_upsert(values: list[dict], model, update_fields: list[str]):
 
     table = model.__table__
     valid_cols = [c.name for c in table.columns]
-    insert_values = [{k: v for k, v in row.items() if k in valid_cols} for row in values]
+    cols = [c for c in valid_cols if any(c in row for row in values)]
+    insert_values = [{k: row.get(k) for k in cols} for row in values]
 
     insert_stmt = insert(table)
 
@@ -79,4 +103,5 @@ async def async_upsert(values: list[dict], model, update_fields: list[str]):
     upsert_stmt = insert_stmt.on_duplicate_key_update(**update_dict)
 
     async with async_engine.begin() as conn:
-        await conn.execute(upsert_stmt, insert_values)
+        for i in range(0, len(insert_values), chunk_size):
+            await conn.execute(upsert_stmt, insert_values[i : i + chunk_size])
@@ -1,6 +1,6 @@
 import datetime
 
-from sqlalchemy import BigInteger, DateTime, ForeignKeyConstraint, Index, String, text
+from sqlalchemy import BigInteger, DateTime, ForeignKeyConstraint, Index, Integer, String, text
 from sqlalchemy.dialects.mysql import SMALLINT, TINYINT
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
@@ -64,3 +64,46 @@ class ExchangeSymbol(Base):
     )
 
     exchange: Mapped["ExchangeInfo"] = relationship("ExchangeInfo", back_populates="exchange_symbol")
+
+
+class WorkerMember(Base):
+    __tablename__ = "worker_member"
+    __table_args__ = {"comment": "worker 集群成员（一致性哈希分片）"}
+
+    worker_id: Mapped[str] = mapped_column(String(64), primary_key=True, comment="worker 标识")
+    heartbeat_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=False, comment="最后心跳时间")
+    started_at: Mapped[datetime.datetime | None] = mapped_column(
+        DateTime, server_default=text("CURRENT_TIMESTAMP"), comment="加入时间"
+    )
+
+
+class JobLease(Base):
+    __tablename__ = "job_lease"
+    __table_args__ = {"comment": "分布式任务租约（单例锁 + 持有者 token）"}
+
+    name: Mapped[str] = mapped_column(String(191), primary_key=True, comment="锁名：flow 名或工作单元 key")
+    owner: Mapped[str] = mapped_column(String(64), nullable=False, comment="当前持有者 worker 标识")
+    token: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0, comment="持有者 token，每次获取 +1")
+    expires_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=False, comment="租约到期时间")
+
+
+class RateLimitWindow(Base):
+    __tablename__ = "rate_limit_window"
+    __table_args__ = {"comment": "集群共享限流额度（按固定时间窗口计数）"}
+
+    key: Mapped[str] = mapped_column(String(128), primary_key=True, comment="限流键，如 binance:fapi.binance.com")
+    window_start: Mapped[int] = mapped_column(BigInteger, primary_key=True, comment="窗口起始时间（秒）")
+    used: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0, comment="窗口内已发放的额度")
+
+
+class KlineBackfillQueue(Base):
+    __tablename__ = "kline_backfill_queue"
+    __table_args__ = {"comment": "新上架交易对的 K 线回补队列，回补完成后删除"}
+
+    client_name: Mapped[str] = mapped_column(String(64), primary_key=True, comment="客户端名称，如 binance_perp")
+    symbol: Mapped[str] = mapped_column(String(64), primary_key=True, comment="交易对")
+    interval: Mapped[str] = mapped_column(String(8), primary_key=True, comment="K 线周期")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0, comment="已失败次数")
+    created_at: Mapped[datetime.datetime | None] = mapped_column(
+        DateTime, server_default=text("CURRENT_TIMESTAMP"), comment="入队时间"
+    )
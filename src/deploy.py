@@ -1,8 +1,13 @@
 from datetime import UTC, datetime
 import os
 
+from prefect import deploy
+from prefect.client.schemas.schedules import IntervalSchedule, RRuleSchedule
+from prefect.types.entrypoint import EntrypointType
+
+from flows.backfill_klines import backfill_klines, backfill_new_listings
 from flows.sync_cex_inflow import sync_cex_inflow
-from flows.sync_funding_rate import sync_funding_rate
+from flows.sync_funding_rate import FUNDING_MINUTES, FUNDING_SECOND, sync_funding_rate
 from flows.sync_kalshi import sync_kalshi_flow
 from flows.sync_long_short_ratio import (
     sync_long_short_ratio_1d,
@@ -12,9 +17,7 @@ from flows.sync_long_short_ratio import (
 from flows.sync_macro_indicators import sync_macro_indicators
 from flows.sync_onchain_tx import sync_onchain_large_transfer
 from flows.sync_symbols import sync_symbols
-from prefect import deploy
-from prefect.client.schemas.schedules import IntervalSchedule, RRuleSchedule
-from prefect.types.entrypoint import EntrypointType
+from utils.stagger import JOB_OFFSET_WINDOW, stagger_seconds
 
 ENV = os.getenv("ENV")
 IMAGE_URL = os.getenv("REGISTRY") + "/" + os.getenv("IMAGE_NAME") + ":" + os.getenv("VERSION")
@@ -42,10 +45,16 @@ def expand_cron_field(value: str, max_value: int):
 # -------------------------------------------------------------------
 # Helper: 秒级 cron → Prefect RRuleSchedule（完全合法 RFC5545）
 # -------------------------------------------------------------------
-def cron_seconds_schedule(seconds: list[int], minutes="*", hours="*"):
+def cron_seconds_schedule(
+    seconds: list[int], minutes="*", hours="*", offset_key: str | None = None, offset_window: int = JOB_OFFSET_WINDOW
+):
+    """
+    offset_key / offset_window：按 key 确定性地把触发秒往后推 [0, offset_window) 秒，
+    让同一时刻触发的多个 job 错开（每次部署结果一致）
+    """
     minutes_list = expand_cron_field(minutes, 59)
     hours_list = expand_cron_field(hours, 23)
-    seconds_list = sorted(seconds)
+    seconds_list = stagger_seconds(seconds, offset_key, offset_window) if offset_key else sorted(seconds)
 
     minutes_str = ",".join(map(str, minutes_list))
     hours_str = ",".join(map(str, hours_list))
@@ -63,12 +72,28 @@ def cron_seconds_schedule(seconds: list[int], minutes="*", hours="*"):
 # -------------------------------------------------------------------
 if __name__ == "__main__":
     deployments = [
-        # sync_symbols: 每天一次
+        # sync_symbols: 每 10 分钟（只写入有变化的交易对）
         sync_symbols.to_deployment(
             name=f"{ENV}-sync-symbols",
             tags=[ENV],
             description="同步交易所交易对",
-            cron="0 0 * * *",
+            cron="*/10 * * * *",
+            entrypoint_type=EntrypointType.MODULE_PATH,
+        ),
+        # 新上架交易对回补：sync_symbols 之后 2 分钟消费 MySQL 回补队列，队列为空时立即结束
+        backfill_new_listings.to_deployment(
+            name=f"{ENV}-backfill-new-listings",
+            tags=[ENV],
+            description="新上架交易对 K 线回补",
+            cron="2-59/10 * * * *",
+            entrypoint_type=EntrypointType.MODULE_PATH,
+        ),
+        # 每天 03:30 全量缺口扫描回补
+        backfill_klines.to_deployment(
+            name=f"{ENV}-backfill-klines",
+            tags=[ENV],
+            description="K 线全量缺口回补",
+            cron="30 3 * * *",
             entrypoint_type=EntrypointType.MODULE_PATH,
         ),
         # 每 5 分钟，第 5 秒执行
@@ -76,7 +101,7 @@ if __name__ == "__main__":
             name=f"{ENV}-sync-long-short-ratio-5m",
             tags=[ENV],
             description="同步交易所多空比[5min]",
-            schedule=cron_seconds_schedule([5], minutes="*/5"),
+            schedule=cron_seconds_schedule([5], minutes="*/5", offset_key="sync-long-short-ratio-5m"),
             entrypoint_type=EntrypointType.MODULE_PATH,
         ),
         # 每小时 0 分，第 5 和 30 秒执行
@@ -84,7 +109,7 @@ if __name__ == "__main__":
             name=f"{ENV}-sync-long-short-ratio-1h",
             tags=[ENV],
             description="同步交易所多空比[1h]",
-            schedule=cron_seconds_schedule([5, 30], minutes="0"),
+            schedule=cron_seconds_schedule([5, 30], minutes="0", offset_key="sync-long-short-ratio-1h"),
             entrypoint_type=EntrypointType.MODULE_PATH,
         ),
         # 每天 00:00 的第 5 和 30 秒执行
@@ -92,7 +117,7 @@ if __name__ == "__main__":
             name=f"{ENV}-sync-long-short-ratio-1d",
             tags=[ENV],
             description="同步交易所多空比[1d]",
-            schedule=cron_seconds_schedule([5, 30], minutes="0", hours="0"),
+            schedule=cron_seconds_schedule([5, 30], minutes="0", hours="0", offset_key="sync-long-short-ratio-1d"),
             entrypoint_type=EntrypointType.MODULE_PATH,
         ),
         # 每分钟 0,1,5,30 分钟，第 5 秒执行
@@ -100,7 +125,9 @@ if __name__ == "__main__":
             name=f"{ENV}-sync-funding-rate",
             tags=[ENV],
             description="同步交易所资金费率",
-            schedule=cron_seconds_schedule([5], minutes="0,1,5,30"),
+            schedule=cron_seconds_schedule(
+                [FUNDING_SECOND], minutes=",".join(map(str, FUNDING_MINUTES)), offset_key="sync-funding-rate"
+            ),
             entrypoint_type=EntrypointType.MODULE_PATH,
         ),
         # onchain_large_transfer: 每 30 秒执行
@@ -116,7 +143,7 @@ if __name__ == "__main__":
             name=f"{ENV}-sync-cex-inflow",
             tags=[ENV],
             description="同步CEX资金流入",
-            schedule=cron_seconds_schedule([5, 30], minutes="0"),
+            schedule=cron_seconds_schedule([5, 30], minutes="0", offset_key="sync-cex-inflow"),
             entrypoint_type=EntrypointType.MODULE_PATH,
         ),
         sync_macro_indicators.to_deployment(
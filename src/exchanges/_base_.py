@@ -1,21 +1,69 @@
 from abc import ABC, abstractmethod
 import asyncio
-from datetime import datetime, timedelta
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from email.utils import parsedate_to_datetime
+import os
 import time
 import traceback
-from typing import Literal
-from urllib.parse import urlencode
+from typing import ClassVar, Literal
+from urllib.parse import urlencode, urlparse
 
+import aiohttp
 from aiohttp import ClientSession
-from constants import INTERVAL_TO_SECONDS
-from sqlalchemy import text
+from constants import INTERVAL_TO_SECONDS, SymbolStatus
 
+from cluster import Lease
 from databases.doris import get_doris, get_stream_loader
-from databases.mysql import ExchangeSymbol, async_upsert, sync_engine
-from utils.http_session import get_session
+from databases.mysql import ExchangeSymbol, async_upsert
+from metadata import SymbolEvent, SymbolEventType, get_exchange_registry, get_symbol_catalog, get_symbol_event_bus
+from metadata.symbols import SymbolDiff, diff_symbols
+from utils.egress import EgressProxy, get_egress_pool
+from utils.http_session import get_session, get_session_for
+from utils.lanes import Lane, demote_lane, use_lane
+from utils.logger import current_job
+from utils.offload import offload
+from utils.rate_limit import RateLimiter, get_rate_limiter
+
+SYMBOL_UPDATE_FIELDS = [
+    "tick_size",
+    "step_size",
+    "price_precision",
+    "quantity_precision",
+    "status",
+]
+
+
+# 实际使用交易所公布额度的比例，给手工调试 / 其他服务留余量
+RATE_LIMIT_SHARE = float(os.getenv("CLX_RATE_LIMIT_SHARE", "0.8"))
+
+# 按交易对分配出口时使用的请求参数
+STICKY_PARAM_KEYS = ("symbol", "instId", "currency_pair", "contract", "pair")
+
+
+def parse_retry_after(value: str | None, default: float) -> float:
+    """Retry-After 可以是秒数或 HTTP-date（RFC 9110），无法解析时使用默认退避"""
+    if not value:
+        return default
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    if at.tzinfo is None:
+        at = at.replace(tzinfo=UTC)
+    return max((at - datetime.now(UTC)).total_seconds(), 0.0)
 
 
 class BaseClient(ABC):
+    # 交易所按出口 IP 的限流额度：(权重, 窗口秒数)，None 表示不限流
+    rate_limit: ClassVar[tuple[int, float] | None] = None
+    # K 线接口单页最大根数，用于回补请求数估算
+    kline_page_limit: ClassVar[int] = 1000
+
     def __init__(self, _logger):
         self._exchange_id = None
         self.session: ClientSession | None = None
@@ -23,6 +71,22 @@ class BaseClient(ABC):
         self.doris_client = get_doris()
         self.doris_stream_loader = get_stream_loader()
 
+    @property
+    def logger(self):
+        """池化客户端被多个 flow 共用，按调用方的 use_job 上下文绑定 job_id（无上下文时为池的默认绑定）"""
+        job_id = current_job()
+        if job_id is None:
+            return self._logger
+        logger = self._job_loggers.get(job_id)
+        if logger is None:
+            logger = self._job_loggers[job_id] = self._logger.bind(job_id=job_id)
+        return logger
+
+    @logger.setter
+    def logger(self, logger):
+        self._logger = logger
+        self._job_loggers: dict[str, object] = {}
+
     @abstractmethod
     def base_url(self):
         raise NotImplementedError("base_url")
@@ -33,22 +97,53 @@ class BaseClient(ABC):
 
     @property
     def exchange_id(self):
-        if self._exchange_id:
-            return self._exchange_id
-        with sync_engine.begin() as conn:
-            result = conn.execute(text("SELECT id FROM exchange_info WHERE name = :name"), {"name": self.exchange_name})
-            row = result.scalar_one_or_none()
-            return row
+        if self._exchange_id is None:
+            self._exchange_id = get_exchange_registry().id_of(self.exchange_name)
+        return self._exchange_id
 
     @abstractmethod
     def inst_type(self):
         raise NotImplementedError("inst_type")
 
+    @property
+    def rate_limit_key(self) -> str:
+        """同一 API 域名共享额度（如 OKX spot / perp 都走 www.okx.com）"""
+        return f"{self.exchange_name}:{urlparse(self.base_url).netloc or self.inst_type.name}"
+
+    @property
+    def rate_limiter(self) -> RateLimiter | None:
+        if self.rate_limit is None:
+            return None
+        limit, window = self.rate_limit
+        return get_rate_limiter(self.rate_limit_key, max(1, int(limit * RATE_LIMIT_SHARE)), window)
+
+    def request_weight(self, endpoint: str, params: dict | None) -> int:
+        """单个请求消耗的额度，按交易所规则覆盖（如 Binance K 线按 limit 计权重）"""
+        return 1
+
     async def _get_session(self) -> ClientSession:
         if self.session is None or self.session.closed:
             self.session = await get_session()
         return self.session
 
+    def rate_limiter_for(self, proxy: EgressProxy | None) -> RateLimiter | None:
+        """每个出口 IP 单独计额度"""
+        if self.rate_limit is None:
+            return None
+        if proxy is None or proxy.url is None:
+            return self.rate_limiter
+        limit, window = self.rate_limit
+        return get_rate_limiter(f"{self.rate_limit_key}@{proxy.name}", max(1, int(limit * RATE_LIMIT_SHARE)), window)
+
+    @staticmethod
+    def _sticky_key(params) -> str | None:
+        """同一交易对固定走同一出口，便于交易所侧缓存命中"""
+        if isinstance(params, dict):
+            for k in STICKY_PARAM_KEYS:
+                if params.get(k):
+                    return str(params[k])
+        return None
+
     async def send_request(
         self,
         method: Literal["GET", "POST"],
@@ -57,7 +152,10 @@ class BaseClient(ABC):
         headers=None,
         retries: int = 3,  # 最大重试次数
         retry_delay: float = 1,  # 每次重试等待秒数
-    ) -> dict:
+        sticky_key: str | None = None,  # 出口分配键，默认取 params 中的交易对
+        transform: Callable | None = None,  # 模块级转换函数 transform(data, *transform_args)，大响应体在进程池执行
+        transform_args: tuple = (),
+    ):
         if endpoint.startswith("http"):
             url = endpoint
         else:
@@ -66,20 +164,57 @@ class BaseClient(ABC):
         if method == "GET" and params:
             url += "?" + urlencode(params)
 
-        session = await self._get_session()
-        final_headers = {**session.headers, **(headers or {})}
+        egress = get_egress_pool()
+        sticky_key = sticky_key or self._sticky_key(params)
+        weight = self.request_weight(endpoint, params)
+        tried: set[str] = set()
 
         for attempt in range(1, retries + 1):
-            if method == "GET":
-                self.logger.debug(f"Request: {method} {url}")
-                response = await session.get(url, headers=final_headers)
-
-            elif method == "POST":
-                self.logger.debug(f"Request: {method} {url}")
-                response = await session.post(url, json=params, headers=final_headers)
+            proxy = egress.pick(sticky_key, exclude=tried) if egress.enabled else None
+            if proxy is not None:
+                session, proxy_url = await get_session_for(proxy)
+            else:
+                session, proxy_url = await self._get_session(), None
+            final_headers = {**session.headers, **(headers or {})}
+
+            limiter = self.rate_limiter_for(proxy)
+            if limiter is not None:
+                await limiter.acquire(weight)
+
+            try:
+                if method == "GET":
+                    self.logger.debug(f"Request: {method} {url}")
+                    response = await session.get(url, headers=final_headers, proxy=proxy_url)
+
+                elif method == "POST":
+                    self.logger.debug(f"Request: {method} {url}")
+                    response = await session.post(url, json=params, headers=final_headers, proxy=proxy_url)
+            except (aiohttp.ClientError, TimeoutError) as e:
+                if proxy is None:
+                    raise
+                # 代理本身不可用：记入健康状态，换一个出口重试
+                egress.mark_failure(proxy, e)
+                tried.add(proxy.name)
+                if attempt == retries:
+                    raise
+                continue
 
             if response.status == 200:
-                return await response.json()
+                if proxy is not None:
+                    egress.mark_success(proxy)
+                return await offload(await response.read(), transform, *transform_args)
+
+            if response.status in (418, 429):
+                # 已被限流：按 Retry-After 退避，避免继续请求导致封禁；有代理池时该出口冷却，换出口重试
+                retry_after = parse_retry_after(response.headers.get("Retry-After"), retry_delay * 5)
+                self.logger.warning(f"HTTP {response.status} rate limited for {url}, backing off {retry_after}s")
+                if proxy is not None and len(egress) > 1:
+                    egress.mark_throttled(proxy, retry_after)
+                    tried.add(proxy.name)
+                elif attempt < retries:
+                    # 最后一次尝试后直接报错，不再空等
+                    await asyncio.sleep(retry_after)
+                continue
 
             self.logger.warning(
                 f"HTTP {response.status} for {method} {url} (attempt {attempt}/{retries}), retrying in {retry_delay}s..."
@@ -103,60 +238,108 @@ class BaseClient(ABC):
     async def get_all_symbols(self):
         raise NotImplementedError("get_all_symbols")
 
-    async def update_all_symbols(self):
+    async def update_all_symbols(self) -> SymbolDiff:
+        """
+        只写入新增 / 变化的交易对，交易所不再返回的交易对标记为 CLOSED
+        """
+        # 先保证交易所注册表 / catalog 已加载，get_all_symbols 格式化时需要 exchange_id
+        catalog = get_symbol_catalog()
+        await catalog.ensure_fresh()
         values = await self.get_all_symbols()
-        await async_upsert(
-            values,
-            ExchangeSymbol,
-            [
-                "tick_size",
-                "step_size",
-                "price_precision",
-                "quantity_precision",
-                "status",
-            ],
+
+        diff = diff_symbols(catalog.market(self.exchange_id, self.inst_type), values, SYMBOL_UPDATE_FIELDS)
+
+        if diff.withheld:
+            self.logger.warning(
+                f"{self.exchange_name}: {len(diff.withheld)} symbols missing from response, "
+                "looks truncated, skip delisting this round"
+            )
+        events = self._symbol_events(catalog, diff)
+
+        upserts = diff.added + diff.changed
+        if upserts:
+            await async_upsert(upserts, ExchangeSymbol, SYMBOL_UPDATE_FIELDS)
+            catalog.apply_values(upserts)
+
+        if diff.delisted:
+            closed = [
+                {
+                    "exchange_id": row.exchange_id,
+                    "inst_type": row.inst_type,
+                    "symbol": row.symbol,
+                    "status": SymbolStatus.CLOSED,
+                }
+                for row in diff.delisted
+            ]
+            await async_upsert(closed, ExchangeSymbol, ["status"])
+            catalog.apply_values(closed)
+
+        self.logger.info(f"{self.exchange_name}: Symbols updated ({diff.summary()})")
+
+        bus = get_symbol_event_bus()
+        for event in events:
+            await bus.publish(event)
+        return diff
+
+    def _symbol_events(self, catalog, diff: SymbolDiff) -> list[SymbolEvent]:
+        """根据 diff 生成生命周期事件（需在写入 catalog 之前调用，以拿到旧状态）"""
+
+        def event(event_type, row, old_status, new_status):
+            return SymbolEvent(
+                type=event_type,
+                exchange=self.exchange_name,
+                exchange_id=self.exchange_id,
+                inst_type=int(self.inst_type),
+                symbol=row["symbol"] if isinstance(row, dict) else row.symbol,
+                base_asset=row.get("base_asset") if isinstance(row, dict) else row.base_asset,
+                quote_asset=row.get("quote_asset") if isinstance(row, dict) else row.quote_asset,
+                old_status=old_status,
+                new_status=new_status,
+            )
+
+        events = [event(SymbolEventType.LISTED, row, None, row.get("status")) for row in diff.added]
+        for row in diff.changed:
+            old = catalog.get(self.exchange_id, self.inst_type, row["symbol"])
+            if old is not None and old.status != row.get("status"):
+                events.append(event(SymbolEventType.STATUS_CHANGED, row, old.status, row.get("status")))
+        events.extend(
+            event(SymbolEventType.DELISTED, row, row.status, SymbolStatus.CLOSED) for row in diff.delisted
         )
-        self.logger.info(f"{self.exchange_name}: Symbols updated")
+        return events
 
-    async def _get_kline(
+    async def find_kline_gaps(
         self,
-        url: str,
-        params: dict,
-        get_data,
-        format_item,
-        start_time_key: str,
-        limit: int,
         symbol: str,
-        end_time_key: str | None = None,
-        time_unit: Literal["ms", "s"] = "ms",
         interval: Literal["1m", "1h", "1d"] = "1m",
         start_ms: int | None = None,
         end_ms: int | None = None,
-        sleep_ms: int = 100,
         force_start: bool = False,
-        **kwargs,
-    ):
+        limit: int | None = None,
+        probe=None,
+    ) -> tuple[int, list[tuple[int, int]]]:
         """
-        Doris 版本的 Kline 缺口扫描 + 批量补齐
+        扫描 Doris 中 [start_ms, end_ms] 的 K 线缺口 → (实际起点, 合并后的缺口区间)。
+        probe 为空时（如回补规划）不请求交易所，无历史的交易对只按上架时间确定起点。
         """
         logger = self.logger.bind(symbol=symbol)
+        limit = limit or self.kline_page_limit
 
         now_ms = int(time.time() * 1000)
         end_ms = end_ms or now_ms
         interval_ms = INTERVAL_TO_SECONDS[interval] * 1000
-        second = 1 if time_unit == "s" else 1000
 
         # ----------------------------------------
         # 1) 查询 Doris 中当前最大 timestamp
         # ----------------------------------------
+        key_params = {"exchange_id": self.exchange_id, "inst_type": int(self.inst_type), "symbol": symbol}
         q = f"""
         SELECT MAX(dt)
         FROM kline_{interval}
-        WHERE exchange_id = {self.exchange_id}
-          AND inst_type = '{self.inst_type}'
-          AND symbol = '{symbol}'
+        WHERE exchange_id = :exchange_id
+          AND inst_type = :inst_type
+          AND symbol = :symbol
         """
-        r = await self.doris_client.query(q)
+        r = await self.doris_client.query(q, key_params)
         logger.info("max_ts_in_db: %s", r[0][0])
         max_ts_in_db = int(r[0][0].timestamp()) * 1000 if r and r[0][0] else 0
 
@@ -171,6 +354,10 @@ class BaseClient(ABC):
         if not force_start and max_ts_in_db > 0 and start_ms < max_ts_in_db:
             start_ms = max_ts_in_db + interval_ms
 
+        # 库中没有历史：从上架时间开始，避免逐页扫描上架前的空区间
+        if max_ts_in_db == 0:
+            start_ms = await self._plan_backfill_start(symbol, start_ms, end_ms, interval_ms, limit, probe)
+
         # --------------------------------------------------------------------
         # 2) Doris 扫描缺口（使用标准 SQL LAG 窗口函数）
         # --------------------------------------------------------------------
@@ -183,18 +370,21 @@ class BaseClient(ABC):
                 LAG(dt) OVER (ORDER BY dt) AS prev_ts,
                 dt AS curr_ts
             FROM kline_{interval}
-            WHERE exchange_id = {self.exchange_id}
-              AND inst_type = '{self.inst_type}'
-              AND symbol = '{symbol}'
-              AND dt BETWEEN ({start_ms} - {interval_ms}) AND {end_ms}
+            WHERE exchange_id = :exchange_id
+              AND inst_type = :inst_type
+              AND symbol = :symbol
+              AND dt BETWEEN (:start_ms - :interval_ms) AND :end_ms
         ) t
         WHERE prev_ts IS NOT NULL
-          AND curr_ts - prev_ts > {interval_ms}
+          AND curr_ts - prev_ts > :interval_ms
         ORDER BY prev_ts
         """
 
-        r = await self.doris_client.query(sql)
-        rows = [(row[0], row[1]) for row in r]
+        rows = []
+        async for chunk in self.doris_client.stream(
+            sql, {**key_params, "start_ms": start_ms, "end_ms": end_ms, "interval_ms": interval_ms}
+        ):
+            rows.extend((row[0], row[1]) for row in chunk)
 
         missing_ranges = []
 
@@ -241,7 +431,50 @@ class BaseClient(ABC):
             merged.append((cur_start, cur_end))
             return merged
 
-        missing_ranges = merge_missing_ranges(missing_ranges, interval_ms, limit)
+        return start_ms, merge_missing_ranges(missing_ranges, interval_ms, limit)
+
+    async def _get_kline(
+        self,
+        url: str,
+        params: dict,
+        get_data,
+        format_item,
+        start_time_key: str,
+        limit: int,
+        symbol: str,
+        end_time_key: str | None = None,
+        time_unit: Literal["ms", "s"] = "ms",
+        interval: Literal["1m", "1h", "1d"] = "1m",
+        start_ms: int | None = None,
+        end_ms: int | None = None,
+        sleep_ms: int = 100,
+        force_start: bool = False,
+        **kwargs,
+    ):
+        """
+        Doris 版本的 Kline 缺口扫描 + 批量补齐
+        """
+        logger = self.logger.bind(symbol=symbol)
+        interval_ms = INTERVAL_TO_SECONDS[interval] * 1000
+        second = 1 if time_unit == "s" else 1000
+
+        async def probe(window_start: int) -> bool:
+            """[window_start, window_start + limit 根] 内是否有 K 线"""
+            window_end = window_start + limit * interval_ms
+            probe_params = {**params, start_time_key: int(window_start // (1000 / second))}
+            if end_time_key:
+                probe_params[end_time_key] = int(window_end // (1000 / second))
+            data = await self.send_request("GET", url, params=probe_params)
+            await asyncio.sleep(sleep_ms / 1000)
+            for d in get_data(data):
+                ts = format_item(d)["timestamp"] * (1000 // second)
+                if window_start <= ts <= window_end:
+                    return True
+            return False
+
+        start_ms, missing_ranges = await self.find_kline_gaps(
+            symbol, interval, start_ms, end_ms, force_start=force_start, limit=limit, probe=probe
+        )
 
         # --------------------------------------------------------------------
         # 4) 打印缺口
@@ -296,18 +529,99 @@ class BaseClient(ABC):
                 }
             )
 
+    async def _plan_backfill_start(
+        self,
+        symbol: str,
+        start_ms: int,
+        end_ms: int,
+        interval_ms: int,
+        limit: int,
+        probe,
+        max_probes: int = 12,
+    ) -> int:
+        """
+        无历史数据时的回补起点：
+        1) ExchangeSymbol.onboard_time 存在 → max(start_ms, 上架时间)
+        2) 否则二分探测第一根 K 线所在的窗口（每次探测一个请求，最多 max_probes 次）
+        """
+        record = get_symbol_catalog().get(self.exchange_id, self.inst_type, symbol)
+        if record is not None and record.onboard_time:
+            onboard_ms = int(float(record.onboard_time)) // interval_ms * interval_ms
+            return max(start_ms, onboard_ms)
+
+        if probe is None:
+            return start_ms
+
+        span = limit * interval_ms
+        lo, hi = start_ms, end_ms
+        try:
+            if hi - lo <= span or await probe(lo):
+                return start_ms
+
+            probes = 1
+            while hi - lo > span and probes < max_probes:
+                mid = (lo + hi) // 2 // interval_ms * interval_ms
+                if await probe(mid):
+                    hi = mid
+                else:
+                    lo = mid
+                probes += 1
+        except Exception as e:
+            self.logger.warning(f"{symbol}: listing probe failed, falling back to {start_ms}: {e}")
+            return start_ms
+
+        self.logger.info(f"{symbol}: first kline after {lo} (probed {probes} times)")
+        return lo
+
     async def update_kline(
         self,
         symbol: str,
         interval: Literal["1m", "1h", "1d"] = "1m",
         start_ms: int | None = None,
         end_ms: int | None = None,
+        lease: Lease | None = None,
     ):
+        """
+        lease：工作单元租约，每次请求下一页和每次写入前检查，租约失效时抛 LeaseLostError，
+        已被其他 worker 接管的单元不再重复请求和写入
+        """
+        catalog = get_symbol_catalog()
+        await catalog.ensure_fresh()
+        record = catalog.get(self.exchange_id, self.inst_type, symbol)
+        if record is not None and record.status in (SymbolStatus.CLOSED, SymbolStatus.PENDING):
+            self.logger.info(f"Skip kline: [{self.exchange_name}] ({symbol}) status={SymbolStatus(record.status).name}")
+            return
+
         self.logger.info(f"Updating kline: {interval} [{self.exchange_name}] ({symbol})")
-        async for klines in self.get_kline(symbol, interval, start_ms, end_ms):
-            for kline in klines:
-                kline["dt"] = datetime.fromtimestamp(kline["timestamp"] / 1000).strftime("%Y-%m-%d %H:%M:%S")
-            await self.doris_stream_loader.send_rows(klines, "kline_" + interval)
+        table = "kline_" + interval
+        # 回补时多页合并，攒满一个 StreamLoad 批次就写入，内存占用不随回补区间增长
+        loader = self.doris_stream_loader
+        flush_rows = loader.bulk_max_rows
+        ensure = lease.ensure if lease is not None else lambda: None
+        buffer = []
+        pages = self.get_kline(symbol, interval, start_ms, end_ms)
+        with use_lane():
+            try:
+                while True:
+                    # 生成器在取下一页时才请求交易所
+                    ensure()
+                    try:
+                        klines = await anext(pages)
+                    except StopAsyncIteration:
+                        break
+                    for kline in klines:
+                        kline["dt"] = datetime.fromtimestamp(kline["timestamp"] / 1000).strftime("%Y-%m-%d %H:%M:%S")
+                    buffer.extend(klines)
+                    if len(buffer) >= flush_rows:
+                        # 一个批次都装不下，说明是大区间回补：之后的请求和写入降到回补通道
+                        demote_lane(Lane.BACKFILL)
+                        ensure()
+                        await loader.send_rows_partitioned(buffer, table)
+                        buffer = []
+            finally:
+                await pages.aclose()
+                if buffer and (lease is None or not (lease.lost or lease.expired)):
+                    await loader.send_rows_partitioned(buffer, table)
 
     async def get_funding_rate(self, next_funding_times_by_symbol: dict[str, int], *args, **kwargs):
         raise NotImplementedError("get_funding_rate not implemented")
@@ -11,6 +11,8 @@ class AsterPerpClient(BaseClient):
     exchange_name = "aster"
     inst_type = InstType.PERP
     base_url = "https://fapi.asterdex.com"
+    rate_limit = (2400, 60)  # REQUEST_WEIGHT 2400 / 分钟 / IP
+    kline_page_limit = 1000
 
     status_map: ClassVar[dict[str, SymbolStatus]] = {
         "TRADING": SymbolStatus.ACTIVE,
@@ -84,7 +86,7 @@ class AsterPerpClient(BaseClient):
           ]
         ]
         """
-        limit = 1000
+        limit = self.kline_page_limit
         async for results in self._get_kline(
             url="/fapi/v3/klines",
             params={"symbol": symbol, "interval": interval, "limit": limit},
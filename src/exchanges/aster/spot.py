@@ -11,6 +11,8 @@ class AsterSpotClient(BaseClient):
     exchange_name = "aster"
     inst_type = InstType.SPOT
     base_url = "https://sapi.asterdex.com"
+    rate_limit = (6000, 60)  # REQUEST_WEIGHT 6000 / 分钟 / IP
+    kline_page_limit = 1000
 
     status_map: ClassVar[dict[str, SymbolStatus]] = {
         "TRADING": SymbolStatus.ACTIVE,
@@ -83,7 +85,7 @@ class AsterSpotClient(BaseClient):
           ]
         ]
         """
-        limit = 1000
+        limit = self.kline_page_limit
         async for results in self._get_kline(
             url="/api/v1/klines",
             params={"symbol": symbol, "interval": interval, "limit": limit},
@@ -20,12 +20,42 @@ def get_quantity_precision(filters) -> int:
     return lot_size["stepSize"]
 
 
+def format_symbols(data: dict, exchange_id: int, inst_type: InstType, status_map: dict) -> list[dict]:
+    """exchangeInfo → 交易对行（模块级函数，可在进程池中执行）"""
+    rows = []
+    for sym in data["symbols"]:
+        if sym["contractType"] == "PERPETUAL":
+            tick = step = None
+            for f in sym["filters"]:
+                if f["filterType"] == "PRICE_FILTER":
+                    tick = f.get("tickSize")
+                elif f["filterType"] == "LOT_SIZE":
+                    step = f.get("stepSize")
+            rows.append(
+                {
+                    "symbol": sym["symbol"],
+                    "base_asset": sym["baseAsset"],
+                    "quote_asset": sym["quoteAsset"],
+                    "status": status_map.get(sym["status"]),
+                    "exchange_id": exchange_id,
+                    "inst_type": inst_type,
+                    "tick_size": tick,
+                    "step_size": step,
+                    "price_precision": sym["pricePrecision"],
+                    "quantity_precision": sym["quantityPrecision"],
+                }
+            )
+    return rows
+
+
 class BinancePerpClient(BaseClient):
     """https://developers.binance.com/docs/derivatives/usds-margined-futures/general-info"""
 
     exchange_name = "binance"
     inst_type = InstType.PERP
     base_url = "https://fapi.binance.com"
+    rate_limit = (2400, 60)  # REQUEST_WEIGHT 2400 / 分钟 / IP
+    kline_page_limit = 1000
 
     status_map: ClassVar[dict[str, SymbolStatus]] = {
         "TRADING": SymbolStatus.ACTIVE,
@@ -38,6 +68,13 @@ class BinancePerpClient(BaseClient):
         "CLOSE": SymbolStatus.CLOSED,
     }
 
+    def request_weight(self, endpoint: str, params: dict | None) -> int:
+        """K 线权重随 limit 变化：[1,100)=1, [100,500)=2, [500,1000]=5, >1000=10"""
+        if endpoint.endswith("/klines"):
+            limit = int((params or {}).get("limit", 500))
+            return 1 if limit < 100 else 2 if limit < 500 else 5 if limit <= 1000 else 10
+        return 1
+
     async def get_exchange_info(self):
         """
         https://developers.binance.com/docs/derivatives/usds-margined-futures/market-data/rest-api/Exchange-Information
@@ -45,31 +82,13 @@ class BinancePerpClient(BaseClient):
         return await self.send_request("GET", "/fapi/v1/exchangeInfo")
 
     async def get_all_symbols(self):
-        data = await self.get_exchange_info()
-        rows = []
-        for sym in data["symbols"]:
-            if sym["contractType"] == "PERPETUAL":
-                tick = step = None
-                for f in sym["filters"]:
-                    if f["filterType"] == "PRICE_FILTER":
-                        tick = f.get("tickSize")
-                    elif f["filterType"] == "LOT_SIZE":
-                        step = f.get("stepSize")
-                rows.append(
-                    {
-                        "symbol": sym["symbol"],
-                        "base_asset": sym["baseAsset"],
-                        "quote_asset": sym["quoteAsset"],
-                        "status": self.status_map.get(sym["status"]),
-                        "exchange_id": self.exchange_id,
-                        "inst_type": self.inst_type,
-                        "tick_size": tick,
-                        "step_size": step,
-                        "price_precision": sym["pricePrecision"],
-                        "quantity_precision": sym["quantityPrecision"],
-                    }
-                )
-        return rows
+        # exchangeInfo 响应数 MB，解析与 filters 遍历交给进程池
+        return await self.send_request(
+            "GET",
+            "/fapi/v1/exchangeInfo",
+            transform=format_symbols,
+            transform_args=(self.exchange_id, self.inst_type, self.status_map),
+        )
 
     async def get_kline(
         self,
@@ -99,7 +118,7 @@ class BinancePerpClient(BaseClient):
             ]
         ]
         """
-        limit = 1000
+        limit = self.kline_page_limit
         async for results in self._get_kline(
             url="/fapi/v1/klines",
             params={"symbol": symbol, "interval": interval, "limit": limit},
@@ -6,12 +6,41 @@ from utils import precision
 from exchanges._base_ import BaseClient
 
 
+def format_symbols(data: dict, exchange_id: int, inst_type: InstType, status_map: dict) -> list[dict]:
+    """exchangeInfo → 交易对行（模块级函数，可在进程池中执行）"""
+    rows = []
+    for sym in data["symbols"]:
+        tick = step = None
+        for f in sym["filters"]:
+            if f["filterType"] == "PRICE_FILTER":
+                tick = f.get("tickSize")
+            elif f["filterType"] == "LOT_SIZE":
+                step = f.get("stepSize")
+        rows.append(
+            {
+                "symbol": sym["symbol"],
+                "base_asset": sym["baseAsset"],
+                "quote_asset": sym["quoteAsset"],
+                "status": status_map.get(sym["status"]),
+                "exchange_id": exchange_id,
+                "inst_type": inst_type,
+                "tick_size": tick.rstrip("0"),
+                "step_size": step.rstrip("0"),
+                "price_precision": precision(tick),
+                "quantity_precision": precision(step),
+            }
+        )
+    return rows
+
+
 class BinanceSpotClient(BaseClient):
     """https://developers.binance.com/docs/binance-spot-api-docs"""
 
     exchange_name = "binance"
     inst_type = InstType.SPOT
     base_url = "https://api.binance.com"
+    rate_limit = (6000, 60)  # REQUEST_WEIGHT 6000 / 分钟 / IP
+    kline_page_limit = 1000
 
     status_map: ClassVar[dict[str, SymbolStatus]] = {
         "TRADING": SymbolStatus.ACTIVE,
@@ -20,6 +49,14 @@ class BinanceSpotClient(BaseClient):
         "BREAK": SymbolStatus.HALTED,
     }
 
+    def request_weight(self, endpoint: str, params: dict | None) -> int:
+        """K 线权重 2，exchangeInfo 权重 20"""
+        if endpoint.endswith("/klines"):
+            return 2
+        if endpoint.endswith("/exchangeInfo"):
+            return 20
+        return 1
+
     async def get_exchange_info(self):
         """
         https://developers.binance.com/docs/binance-spot-api-docs/rest-api/general-endpoints#exchange-information
@@ -27,31 +64,13 @@ class BinanceSpotClient(BaseClient):
         return await self.send_request("GET", "/api/v3/exchangeInfo")
 
     async def get_all_symbols(self):
-        data = await self.get_exchange_info()
-
-        rows = []
-        for sym in data["symbols"]:
-            tick = step = None
-            for f in sym["filters"]:
-                if f["filterType"] == "PRICE_FILTER":
-                    tick = f.get("tickSize")
-                elif f["filterType"] == "LOT_SIZE":
-                    step = f.get("stepSize")
-            rows.append(
-                {
-                    "symbol": sym["symbol"],
-                    "base_asset": sym["baseAsset"],
-                    "quote_asset": sym["quoteAsset"],
-                    "status": self.status_map.get(sym["status"]),
-                    "exchange_id": self.exchange_id,
-                    "inst_type": self.inst_type,
-                    "tick_size": tick.rstrip("0"),
-                    "step_size": step.rstrip("0"),
-                    "price_precision": precision(tick),
-                    "quantity_precision": precision(step),
-                }
-            )
-        return rows
+        # exchangeInfo 响应数 MB，解析与 filters 遍历交给进程池
+        return await self.send_request(
+            "GET",
+            "/api/v3/exchangeInfo",
+            transform=format_symbols,
+            transform_args=(self.exchange_id, self.inst_type, self.status_map),
+        )
 
     async def get_kline(
         self,
@@ -81,7 +100,7 @@ class BinanceSpotClient(BaseClient):
             ]
         ]
         """
-        limit = 1000
+        limit = self.kline_page_limit
         async for results in self._get_kline(
             url="/api/v3/klines",
             params={"symbol": symbol, "interval": interval, "limit": limit},
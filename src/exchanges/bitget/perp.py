@@ -15,6 +15,8 @@ class BitgetPerpClient(BaseClient):
     exchange_name = "bitget"
     inst_type = InstType.PERP
     base_url = "https://api.bitget.com"
+    rate_limit = (20, 1)  # 行情接口 20 次 / 秒 / IP
+    kline_page_limit = 1000
 
     status_map: ClassVar[dict[str, SymbolStatus]] = {
         "normal": SymbolStatus.ACTIVE,
@@ -84,7 +86,7 @@ class BitgetPerpClient(BaseClient):
             "1h": "1H",
             "1d": "1D",
         }
-        limit = 1000
+        limit = self.kline_page_limit
         async for results in self._get_kline(
             url="/api/v2/mix/market/candles",
             params={
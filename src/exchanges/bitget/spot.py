@@ -12,6 +12,8 @@ class BitgetSpotClient(BaseClient):
     exchange_name = "bitget"
     inst_type = InstType.SPOT
     base_url = "https://api.bitget.com"
+    rate_limit = (20, 1)  # 行情接口 20 次 / 秒 / IP
+    kline_page_limit = 1000
 
     status_map: ClassVar[dict[str, SymbolStatus]] = {
         "online": SymbolStatus.ACTIVE,
@@ -82,7 +84,7 @@ class BitgetSpotClient(BaseClient):
             ]
         }
         """
-        limit = 1000
+        limit = self.kline_page_limit
         interval_map = {
             "1m": "1min",
             "1h": "1h",
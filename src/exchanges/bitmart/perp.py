@@ -13,6 +13,8 @@ class BitmartPerpClient(BaseClient):
     exchange_name = "bitmart"
     inst_type = InstType.PERP
     base_url = "https://api-cloud-v2.bitmart.com"
+    rate_limit = (12, 2)  # K 线 12 次 / 2 秒 / IP
+    kline_page_limit = 200
 
     status_map: ClassVar[dict[str, SymbolStatus]] = {
         "Trading": SymbolStatus.ACTIVE,
@@ -79,7 +81,7 @@ class BitmartPerpClient(BaseClient):
             "1h": "60",
             "1d": "1440",
         }
-        limit = 200
+        limit = self.kline_page_limit
         async for results in self._get_kline(
             url="/contract/public/kline",
             params={
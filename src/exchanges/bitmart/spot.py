@@ -12,6 +12,8 @@ class BitmartSpotClient(BaseClient):
     exchange_name = "bitmart"
     inst_type = InstType.SPOT
     base_url = "https://api-cloud.bitmart.com/spot"
+    rate_limit = (12, 2)  # K 线 12 次 / 2 秒 / IP
+    kline_page_limit = 200
 
     status_map: ClassVar[dict[str, SymbolStatus]] = {
         "trading": SymbolStatus.ACTIVE,
@@ -80,7 +82,7 @@ class BitmartSpotClient(BaseClient):
             "1h": "60",
             "1d": "1440",
         }
-        limit = 200
+        limit = self.kline_page_limit
 
         def get_data(data):
             if isinstance(data.get("data"), list):
@@ -15,6 +15,8 @@ class BybitPerpClient(BaseClient):
     exchange_name = "bybit"
     inst_type = InstType.PERP
     base_url = "https://api.bybit.com"
+    rate_limit = (600, 5)  # 600 次 / 5 秒 / IP
+    kline_page_limit = 1000
 
     status_map: ClassVar[dict[str, SymbolStatus]] = {
         "Trading": SymbolStatus.ACTIVE,
@@ -85,7 +87,7 @@ class BybitPerpClient(BaseClient):
             "1h": "60",
             "1d": "D",
         }
-        limit = 1000
+        limit = self.kline_page_limit
         async for results in self._get_kline(
             url="/v5/market/kline",
             params={
@@ -12,6 +12,8 @@ class CoinbaseSpotClient(BaseClient):
     exchange_name = "coinbase"
     inst_type = InstType.SPOT
     base_url = "https://api.exchange.coinbase.com"
+    rate_limit = (10, 1)  # 公共接口 10 次 / 秒 / IP
+    kline_page_limit = 300
 
     status_map: ClassVar[dict[str, SymbolStatus]] = {
         "online": SymbolStatus.ACTIVE,
@@ -74,7 +76,7 @@ class CoinbaseSpotClient(BaseClient):
             "1h": "3600",
             "1d": "86400",
         }
-        limit = 300
+        limit = self.kline_page_limit
         async for results in self._get_kline(
             url=f"/products/{symbol}/candles",
             params={
@@ -12,6 +12,8 @@ class GatePerpClient(BaseClient):
     exchange_name = "gate"
     inst_type = InstType.PERP
     base_url = "https://api.gateio.ws/api/v4"
+    rate_limit = (200, 10)  # 公共接口 200 次 / 10 秒
+    kline_page_limit = 1000
 
     status_map: ClassVar[dict[str, SymbolStatus]] = {
         "prelaunch": SymbolStatus.PENDING,
@@ -71,7 +73,7 @@ class GatePerpClient(BaseClient):
             }
         ]
         """
-        limit = 1000
+        limit = self.kline_page_limit
         async for results in self._get_kline(
             url="/futures/usdt/candlesticks",
             params={
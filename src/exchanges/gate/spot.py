@@ -12,6 +12,8 @@ class GateSpotClient(BaseClient):
     exchange_name = "gate"
     inst_type = InstType.SPOT
     base_url = "https://api.gateio.ws/api/v4"
+    rate_limit = (200, 10)  # 公共接口 200 次 / 10 秒
+    kline_page_limit = 1000
 
     status_map: ClassVar[dict[str, SymbolStatus]] = {
         "untradable": SymbolStatus.CLOSED,
@@ -70,7 +72,7 @@ class GateSpotClient(BaseClient):
             ]
         ]
         """
-        limit = 1000
+        limit = self.kline_page_limit
 
         def get_data(data):
             if "message" not in data or "Candlestick too long ago" not in data["message"]:
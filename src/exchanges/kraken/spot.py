@@ -26,12 +26,37 @@ KRAKEN_NAME_MAP = {
 }
 
 
+def format_asset_pairs(data: dict, exchange_id: int, inst_type: InstType, status_map: dict) -> list[dict]:
+    """AssetPairs → 交易对行（模块级函数，可在进程池中执行）"""
+    rows = []
+    for sym in data["result"].values():
+        step_size = sym["lot_multiplier"] / (10 ** sym["lot_decimals"])
+
+        rows.append(
+            {
+                "symbol": sym["altname"],
+                "base_asset": KRAKEN_NAME_MAP.get(sym["base"], sym["base"]),
+                "quote_asset": KRAKEN_NAME_MAP.get(sym["quote"], sym["quote"]),
+                "status": status_map.get(sym["status"]),
+                "exchange_id": exchange_id,
+                "inst_type": inst_type,
+                "tick_size": sym["tick_size"],
+                "step_size": step_size,
+                "price_precision": sym["pair_decimals"],
+                "quantity_precision": sym["lot_decimals"],
+            }
+        )
+    return rows
+
+
 class KrakenSpotClient(BaseClient):
     """https://docs.kraken.com/api/docs/guides/global-intro"""
 
     exchange_name = "kraken"
     inst_type = InstType.SPOT
     base_url = "https://api.kraken.com/0"
+    rate_limit = (1, 1)  # 公共接口约 1 次 / 秒
+    kline_page_limit = 720
 
     status_map: ClassVar[dict[str, SymbolStatus]] = {
         "online": SymbolStatus.ACTIVE,
@@ -48,27 +73,12 @@ class KrakenSpotClient(BaseClient):
         return await self.send_request("GET", "/public/AssetPairs")
 
     async def get_all_symbols(self):
-        data = await self.get_exchange_info()
-
-        rows = []
-        for sym in data["result"].values():
-            step_size = sym["lot_multiplier"] / (10 ** sym["lot_decimals"])
-
-            rows.append(
-                {
-                    "symbol": sym["altname"],
-                    "base_asset": KRAKEN_NAME_MAP.get(sym["base"], sym["base"]),
-                    "quote_asset": KRAKEN_NAME_MAP.get(sym["quote"], sym["quote"]),
-                    "status": self.status_map.get(sym["status"]),
-                    "exchange_id": self.exchange_id,
-                    "inst_type": self.inst_type,
-                    "tick_size": sym["tick_size"],
-                    "step_size": step_size,
-                    "price_precision": sym["pair_decimals"],
-                    "quantity_precision": sym["lot_decimals"],
-                }
-            )
-        return rows
+        return await self.send_request(
+            "GET",
+            "/public/AssetPairs",
+            transform=format_asset_pairs,
+            transform_args=(self.exchange_id, self.inst_type, self.status_map),
+        )
 
     async def get_kline(
         self,
@@ -104,7 +114,7 @@ class KrakenSpotClient(BaseClient):
             "1h": "60",
             "1d": "1440",
         }
-        limit = 720
+        limit = self.kline_page_limit
         async for results in self._get_kline(
             url="/public/OHLC",
             params={
@@ -11,6 +11,8 @@ class MexcPerpClient(BaseClient):
     exchange_name = "mexc"
     inst_type = InstType.PERP
     base_url = "https://contract.mexc.com/api"
+    rate_limit = (20, 2)  # 行情接口 20 次 / 2 秒
+    kline_page_limit = 2000
 
     status_map: ClassVar[dict[str, SymbolStatus]] = {
         0: SymbolStatus.ACTIVE,
@@ -113,7 +115,7 @@ class MexcPerpClient(BaseClient):
             "1h": "60m",
             "1d": "1d",
         }
-        limit = 2000
+        limit = self.kline_page_limit
         async for results in self._get_kline(
             url=f"https://contract.mexc.com/api/v1/contract/kline/{symbol}",
             params={
@@ -11,6 +11,8 @@ class MexcSpotClient(BaseClient):
     exchange_name = "mexc"
     inst_type = InstType.SPOT
     base_url = "https://api.mexc.com"
+    rate_limit = (20, 2)  # 行情接口 20 次 / 2 秒
+    kline_page_limit = 1000
 
     status_map: ClassVar[dict[str, SymbolStatus]] = {
         "1": SymbolStatus.ACTIVE,
@@ -73,7 +75,7 @@ class MexcSpotClient(BaseClient):
             "1h": "60m",
             "1d": "1d",
         }
-        limit = 1000
+        limit = self.kline_page_limit
         async for results in self._get_kline(
             url="/api/v3/klines",
             params={
@@ -15,6 +15,8 @@ class OkxPerpClient(BaseClient):
     exchange_name = "okx"
     inst_type = InstType.PERP
     base_url = "https://www.okx.com/api"
+    rate_limit = (20, 2)  # history-candles 20 次 / 2 秒 / IP
+    kline_page_limit = 1000
 
     status_map: ClassVar[dict[str, SymbolStatus]] = {
         "live": SymbolStatus.ACTIVE,
@@ -82,7 +84,7 @@ class OkxPerpClient(BaseClient):
             "1m": "1m",
             "1h": "1H",
         }
-        limit = 1000
+        limit = self.kline_page_limit
         async for results in self._get_kline(
             url="/v5/market/history-mark-price-candles",
             params={
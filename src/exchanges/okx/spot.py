@@ -12,6 +12,8 @@ class OkxSpotClient(BaseClient):
     exchange_name = "okx"
     inst_type = InstType.SPOT
     base_url = "https://www.okx.com/api"
+    rate_limit = (20, 2)  # history-candles 20 次 / 2 秒 / IP
+    kline_page_limit = 1000
 
     status_map: ClassVar[dict[str, SymbolStatus]] = {
         "live": SymbolStatus.ACTIVE,
@@ -78,7 +80,7 @@ class OkxSpotClient(BaseClient):
             "1m": "1m",
             "1h": "1H",
         }
-        limit = 1000
+        limit = self.kline_page_limit
         async for results in self._get_kline(
             url="/v5/market/history-mark-price-candles",
             params={
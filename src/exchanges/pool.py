@@ -0,0 +1,63 @@
+from functools import lru_cache
+
+from constants import InstType
+
+from utils.http_session import shutdown
+from utils.logger import logger as _logger
+from utils.offload import shutdown_process_pool
+
+from ._base_ import BaseClient
+from .registry import find_client_name, get_client_class
+
+__all__ = ["ClientPool", "get_client_pool"]
+
+
+class ClientPool:
+    """
+    进程级客户端池：每个 (exchange, inst_type) 只创建一个长期存活的客户端，
+    session / Doris 连接 / exchange_id 等缓存在多次 flow 运行之间复用。
+    日志的 job_id 不在创建时固定，由调用方用 utils.logger.use_job 按上下文绑定。
+    """
+
+    def __init__(self, logger=None):
+        self.logger = logger or _logger.bind(job_id="CLIENT_POOL")
+        self._clients: dict[str, BaseClient] = {}
+
+    def get(self, name: str) -> BaseClient:
+        """name: 客户端名称，例如 "binance_perp" """
+        client = self._clients.get(name)
+        if client is None:
+            client = get_client_class(name)(self.logger)
+            self._clients[name] = client
+        return client
+
+    def get_for(self, exchange: str, inst_type: InstType | int) -> BaseClient:
+        name = find_client_name(exchange, inst_type)
+        if name is None:
+            raise KeyError(f"No client for {exchange} {InstType(inst_type).name}")
+        return self.get(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._clients
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    async def close(self):
+        """进程退出时调用：关闭共享 HTTP session、解析进程池与 Doris 连接池"""
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            client.session = None
+        await shutdown()
+        shutdown_process_pool()
+
+        from databases.doris import get_doris
+
+        if get_doris.cache_info().currsize:
+            await get_doris().engine.dispose()
+        self.logger.info(f"Client pool closed ({len(clients)} clients)")
+
+
+@lru_cache
+def get_client_pool() -> ClientPool:
+    return ClientPool()
@@ -0,0 +1,62 @@
+from functools import cache
+from importlib import import_module
+
+__all__ = ["CLIENT_PATHS", "client_names", "find_client_name", "get_client_class"]
+
+ENTRY_POINT_GROUP = "clx_etl.clients"
+
+# 客户端名称 → "模块:类名"，按需导入，flow 只为用到的交易所付出 import 开销
+CLIENT_PATHS: dict[str, str] = {
+    "aster_spot": "exchanges.aster.spot:AsterSpotClient",
+    "aster_perp": "exchanges.aster.perp:AsterPerpClient",
+    "binance_spot": "exchanges.binance.spot:BinanceSpotClient",
+    "binance_perp": "exchanges.binance.perp:BinancePerpClient",
+    "bitget_spot": "exchanges.bitget.spot:BitgetSpotClient",
+    "bitget_perp": "exchanges.bitget.perp:BitgetPerpClient",
+    "bitmart_spot": "exchanges.bitmart.spot:BitmartSpotClient",
+    "bitmart_perp": "exchanges.bitmart.perp:BitmartPerpClient",
+    "bybit_spot": "exchanges.bybit.spot:BybitSpotClient",
+    "bybit_perp": "exchanges.bybit.perp:BybitPerpClient",
+    "coinbase_spot": "exchanges.coinbase.spot:CoinbaseSpotClient",
+    "gate_spot": "exchanges.gate.spot:GateSpotClient",
+    "gate_perp": "exchanges.gate.perp:GatePerpClient",
+    "kraken_spot": "exchanges.kraken.spot:KrakenSpotClient",
+    "mexc_spot": "exchanges.mexc.spot:MexcSpotClient",
+    "mexc_perp": "exchanges.mexc.perp:MexcPerpClient",
+    "okx_spot": "exchanges.okx.spot:OkxSpotClient",
+    "okx_perp": "exchanges.okx.perp:OkxPerpClient",
+    "woox_spot": "exchanges.woox.spot:WooxSpotClient",
+    "woox_perp": "exchanges.woox.perp:WooxPerpClient",
+}
+
+
+def _entry_point_path(name: str) -> str | None:
+    """第三方包可通过 entry point 注册客户端：[project.entry-points."clx_etl.clients"]"""
+    from importlib.metadata import entry_points
+
+    for ep in entry_points(group=ENTRY_POINT_GROUP):
+        if ep.name == name:
+            return ep.value
+    return None
+
+
+@cache
+def get_client_class(name: str):
+    path = CLIENT_PATHS.get(name) or _entry_point_path(name)
+    if path is None:
+        raise KeyError(f"Unknown exchange client: {name}")
+    module_name, _, class_name = path.partition(":")
+    return getattr(import_module(module_name), class_name)
+
+
+def client_names(inst_type: str | None = None) -> list[str]:
+    """inst_type: "spot" / "perp" / None（全部）"""
+    return [n for n in CLIENT_PATHS if inst_type is None or n.endswith(f"_{inst_type}")]
+
+
+def find_client_name(exchange: str, inst_type: int) -> str | None:
+    """(exchange_name, InstType) → 客户端名称，例如 ("binance", 1) → "binance_perp" """
+    from constants import InstType
+
+    name = f"{exchange}_{InstType(inst_type).name.lower()}"
+    return name if name in CLIENT_PATHS else None
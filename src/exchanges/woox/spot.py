@@ -12,6 +12,8 @@ class WooxSpotClient(BaseClient):
     exchange_name = "woox"
     inst_type = InstType.SPOT
     base_url = ""
+    rate_limit = (10, 1)  # 公共接口 10 次 / 秒
+    kline_page_limit = 1000
 
     status_map: ClassVar[dict[str, SymbolStatus]] = {
         "TRADING": SymbolStatus.ACTIVE,
@@ -85,7 +87,7 @@ class WooxSpotClient(BaseClient):
             "timestamp": 1636388280000
         }
         """
-        limit = 1000
+        limit = self.kline_page_limit
         async for results in self._get_kline(
             url="https://api-pub.woox.io/v1/hist/kline",
             params={
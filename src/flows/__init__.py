@@ -0,0 +1,4 @@
+from utils.runtime import install_event_loop
+
+# Prefect worker 直接按模块路径加载 flow，在导入时设置事件循环实现（CLX_EVENT_LOOP）
+install_event_loop()
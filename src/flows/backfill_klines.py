@@ -0,0 +1,294 @@
+import asyncio
+from dataclasses import dataclass, field
+import heapq
+import math
+import os
+import time
+from typing import Literal
+
+from constants import INTERVAL_TO_SECONDS, SymbolStatus
+from prefect import flow
+
+from cluster import get_shard_manager, singleton
+from exchanges._base_ import RATE_LIMIT_SHARE, BaseClient
+from exchanges.pool import get_client_pool
+from metadata import warm_start
+from utils.lanes import Lane, use_lane
+from utils.logger import logger as _logger, use_job
+from utils.runtime import run
+
+from .constants import COINS
+from .listing_queue import ListingUnit, get_listing_queue
+from .sync_klines import (
+    KLINE_BACKFILL_START,
+    KLINE_CLIENTS,
+    KLINE_INTERVALS,
+    KLINE_QUOTE_ASSET,
+    _backfill_kline_unit,
+    _kline_unit,
+)
+from .utils import get_symbols
+
+logger = _logger.bind(job_id="BACKFILL_PLANNER")
+
+# 单页请求的平均耗时（网络往返 + 分页间 sleep），决定单个 worker 的串行吞吐
+PAGE_SECONDS = float(os.getenv("CLX_BACKFILL_PAGE_SECONDS", "0.35"))
+# 每个额度池最多并行的 worker 数
+MAX_WORKERS = int(os.getenv("CLX_BACKFILL_MAX_WORKERS", "8"))
+
+
+@dataclass
+class BackfillJob:
+    client_name: str
+    symbol: str
+    interval: str
+    ranges: list[tuple[int, int]]
+    requests: int
+
+    @property
+    def seconds(self) -> float:
+        return self.requests * PAGE_SECONDS
+
+    @property
+    def unit(self) -> ListingUnit:
+        return self.client_name, self.symbol, self.interval
+
+
+@dataclass
+class BudgetQueue:
+    """共享同一限流额度（rate_limit_key）的回补任务，按 LPT 分配给若干 worker"""
+
+    key: str
+    rate: float  # 额度允许的 K 线请求数 / 秒
+    jobs: list[BackfillJob] = field(default_factory=list)
+    workers: list[list[BackfillJob]] = field(default_factory=list)
+
+    @property
+    def requests(self) -> int:
+        return sum(j.requests for j in self.jobs)
+
+    @property
+    def eta_seconds(self) -> float:
+        """额度上限与最慢 worker 的串行耗时取大"""
+        quota_bound = self.requests / self.rate if self.rate else 0.0
+        worker_bound = max((sum(j.seconds for j in w) for w in self.workers), default=0.0)
+        return max(quota_bound, worker_bound)
+
+    def schedule(self):
+        """
+        worker 数取刚好能吃满额度的并发（rate × 单页耗时），
+        按请求数从大到小依次分给当前负载最小的 worker（LPT），使各 worker 完成时间接近
+        """
+        n = min(MAX_WORKERS, len(self.jobs), max(1, math.ceil(self.rate * PAGE_SECONDS)))
+        self.workers = [[] for _ in range(n)]
+        heap = [(0.0, i) for i in range(n)]
+        for job in sorted(self.jobs, key=lambda j: j.requests, reverse=True):
+            load, i = heapq.heappop(heap)
+            self.workers[i].append(job)
+            heapq.heappush(heap, (load + job.seconds, i))
+
+
+@dataclass
+class BackfillPlan:
+    queues: dict[str, BudgetQueue] = field(default_factory=dict)
+
+    @property
+    def requests(self) -> int:
+        return sum(q.requests for q in self.queues.values())
+
+    @property
+    def eta_seconds(self) -> float:
+        # 不同额度池之间并行执行，总耗时取决于最慢的那个
+        return max((q.eta_seconds for q in self.queues.values()), default=0.0)
+
+    def summary(self) -> str:
+        lines = [
+            f"Backfill plan: {sum(len(q.jobs) for q in self.queues.values())} jobs, {self.requests} requests, "
+            f"ETA {self.eta_seconds / 60:.1f} min "
+            f"(~{time.strftime('%Y-%m-%d %H:%M', time.localtime(time.time() + self.eta_seconds))})"
+        ]
+        for q in sorted(self.queues.values(), key=lambda q: q.eta_seconds, reverse=True):
+            lines.append(
+                f"  {q.key:<40} jobs={len(q.jobs):<5} requests={q.requests:<7} "
+                f"rate={q.rate:.1f}/s workers={len(q.workers)} eta={q.eta_seconds / 60:.1f} min"
+            )
+        return "\n".join(lines)
+
+
+def estimate_requests(ranges: list[tuple[int, int]], interval_ms: int, page_limit: int) -> int:
+    return sum(math.ceil(((end - start) // interval_ms + 1) / page_limit) for start, end in ranges)
+
+
+def kline_request_rate(client: BaseClient) -> float:
+    """按客户端限流额度估算 K 线请求吞吐（请求 / 秒）；未配置限流时只受单页耗时约束"""
+    if client.rate_limit is None:
+        return MAX_WORKERS / PAGE_SECONDS
+    limit, window = client.rate_limit
+    weight = client.request_weight("/klines", {"limit": client.kline_page_limit})
+    return max(1, int(limit * RATE_LIMIT_SHARE)) / window / weight
+
+
+async def collect_jobs(
+    client_names: list[str], intervals: list[str], coins: list[str], start_ms: int = KLINE_BACKFILL_START
+) -> list[tuple[BaseClient, BackfillJob]]:
+    """扫描所有交易所 × 交易对 × 周期的缺口（只查 Doris，不请求交易所）"""
+    pool = get_client_pool()
+    targets = []
+    for name in client_names:
+        client = pool.get(name)
+        symbols = await get_symbols(
+            client.exchange_name, coins, KLINE_QUOTE_ASSET, client.inst_type, [SymbolStatus.ACTIVE]
+        )
+        targets.extend((name, sym.symbol) for sym in symbols)
+    return await scan_gaps(targets, intervals, start_ms)
+
+
+async def scan_unit(
+    client: BaseClient, name: str, symbol: str, interval: str, start_ms: int = KLINE_BACKFILL_START
+) -> BackfillJob | None:
+    """扫描单个工作单元的缺口，没有缺口返回 None"""
+    _, ranges = await client.find_kline_gaps(symbol, interval, start_ms)
+    requests = estimate_requests(ranges, INTERVAL_TO_SECONDS[interval] * 1000, client.kline_page_limit)
+    return BackfillJob(name, symbol, interval, ranges, requests) if requests else None
+
+
+async def scan_gaps(
+    targets: list[tuple[str, str]], intervals: list[str], start_ms: int = KLINE_BACKFILL_START
+) -> list[tuple[BaseClient, BackfillJob]]:
+    """扫描指定 (client_name, symbol) 各周期的缺口，只保留分配给本节点的工作单元"""
+    pool = get_client_pool()
+    shard = await get_shard_manager().ready()
+    jobs = []
+    for interval in intervals:
+        for name, symbol in targets:
+            client = pool.get(name)
+            if not shard.owns(_kline_unit(client, symbol, interval)):
+                continue
+            try:
+                job = await scan_unit(client, name, symbol, interval, start_ms)
+            except Exception as e:
+                logger.warning(f"Gap scan failed for {name} {symbol} {interval}: {e}")
+                continue
+            if job is not None:
+                jobs.append((client, job))
+    return jobs
+
+
+def build_plan(jobs: list[tuple[BaseClient, BackfillJob]]) -> BackfillPlan:
+    plan = BackfillPlan()
+    for client, job in jobs:
+        queue = plan.queues.get(client.rate_limit_key)
+        if queue is None:
+            queue = plan.queues[client.rate_limit_key] = BudgetQueue(client.rate_limit_key, kline_request_rate(client))
+        queue.jobs.append(job)
+    for queue in plan.queues.values():
+        queue.schedule()
+    return plan
+
+
+async def execute_plan(plan: BackfillPlan, start_ms: int = KLINE_BACKFILL_START) -> list[BackfillJob]:
+    """执行回补规划，返回未完成的任务（异常 / 被其他 worker 持有 / 中途失去租约）"""
+    pool = get_client_pool()
+    failed: list[BackfillJob] = []
+
+    async def run_worker(jobs: list[BackfillJob]):
+        for job in jobs:
+            try:
+                ok = await _backfill_kline_unit(pool.get(job.client_name), job.symbol, job.interval, start_ms)
+            except Exception as e:
+                logger.error(f"Backfill failed for {job.client_name} {job.symbol} {job.interval}: {e}")
+                ok = False
+            if not ok:
+                failed.append(job)
+
+    # 回补只使用空闲额度，不影响实时任务
+    with use_lane(Lane.BACKFILL):
+        await asyncio.gather(*(run_worker(w) for q in plan.queues.values() for w in q.workers))
+    return failed
+
+
+@flow(name="backfill-klines")
+@singleton("backfill-klines")
+async def backfill_klines(
+    intervals: list[Literal["1m", "1h", "1d"]] | None = None,
+    client_names: list[str] | None = None,
+    dry_run: bool = False,
+):
+    """
+    全局回补规划：先汇总所有缺口并估算各额度池的请求数和完成时间，
+    再让不同交易所（额度池）并行回补，池内按 LPT 均衡到多个 worker
+    """
+    await warm_start()
+    start = time.time()
+    jobs = await collect_jobs(client_names or KLINE_CLIENTS, intervals or KLINE_INTERVALS, COINS)
+    plan = build_plan(jobs)
+
+    summary = plan.summary()
+    logger.info(summary)
+    if dry_run or not jobs:
+        return plan
+
+    with use_job("KLINE[backfill]"):
+        await execute_plan(plan)
+    logger.info(f"Backfill finished in {(time.time() - start) / 60:.1f} min (estimated {plan.eta_seconds / 60:.1f})")
+    return plan
+
+
+@flow(name="backfill-new-listings")
+@singleton("backfill-new-listings")
+async def backfill_new_listings():
+    """
+    sync_symbols 写入回补队列的新上架交易对交给回补规划执行，与 symbol 同步解耦。
+    只有完成的工作单元从队列删除；扫描失败、回补失败或中途异常退出的保留到下一轮重试
+    """
+    queue = get_listing_queue()
+    units = await queue.pending()
+    if not units:
+        return None
+    await warm_start()
+    pool = get_client_pool()
+    shard = await get_shard_manager().ready()
+
+    jobs, done, failed = [], [], []
+    for name, symbol, interval in units:
+        client = pool.get(name)
+        if not shard.owns(_kline_unit(client, symbol, interval)):
+            continue
+        try:
+            job = await scan_unit(client, name, symbol, interval)
+        except Exception as e:
+            logger.warning(f"Gap scan failed for {name} {symbol} {interval}: {e}")
+            failed.append((name, symbol, interval))
+            continue
+        if job is None:
+            done.append((name, symbol, interval))
+        else:
+            jobs.append((client, job))
+    await queue.done(done)
+
+    plan = build_plan(jobs)
+    logger.info(f"New listings: {len(units)} queued, {len(jobs)} to backfill\n{plan.summary()}")
+    with use_job("KLINE[listing]"):
+        unfinished = {job.unit for job in await execute_plan(plan)}
+    await queue.done([job.unit for _, job in jobs if job.unit not in unfinished])
+    await queue.failed(failed + sorted(unfinished))
+    return plan
+
+
+async def backfill_new_listings_if_queued():
+    """常驻 worker 每分钟检查一次：队列为空时不创建 flow run"""
+    if not await get_listing_queue().any():
+        return None
+    return await backfill_new_listings()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="K 线全局回补")
+    parser.add_argument("--interval", action="append", choices=["1m", "1h", "1d"])
+    parser.add_argument("--client", action="append", help="客户端名称，如 binance_perp，可重复")
+    parser.add_argument("--dry-run", action="store_true", help="只打印规划与预计完成时间")
+    args = parser.parse_args()
+
+    run(backfill_klines(args.interval, args.client, args.dry_run))
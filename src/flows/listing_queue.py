@@ -0,0 +1,88 @@
+from functools import lru_cache
+
+from sqlalchemy import delete, exists, select, tuple_, update
+from sqlalchemy.dialects.mysql import insert
+
+from databases.mysql import KlineBackfillQueue, async_engine, ensure_tables
+
+__all__ = ["ListingUnit", "MySQLListingQueue", "get_listing_queue"]
+
+ListingUnit = tuple[str, str, str]  # (client_name, symbol, interval)
+
+
+class MySQLListingQueue:
+    """
+    新上架交易对的 K 线回补队列（kline_backfill_queue 表）：
+    sync_symbols 入队，backfill_new_listings 回补完成后删除，失败的保留到下一轮重试。
+    按次启动的 flow 进程退出后队列不丢失，多个 worker 共用同一张表
+    """
+
+    def __init__(self):
+        self._table_ready = False
+
+    async def _ensure_table(self):
+        if not self._table_ready:
+            await ensure_tables(KlineBackfillQueue)
+            self._table_ready = True
+
+    async def put(self, units: list[ListingUnit]):
+        if not units:
+            return
+        await self._ensure_table()
+        stmt = insert(KlineBackfillQueue).values(
+            [{"client_name": c, "symbol": s, "interval": i, "attempts": 0} for c, s, i in units]
+        )
+        async with async_engine.begin() as conn:
+            await conn.execute(stmt.on_duplicate_key_update(client_name=stmt.inserted.client_name))
+
+    async def discard(self, client_name: str, symbol: str):
+        """下架 / 暂停：不再回补"""
+        await self._ensure_table()
+        async with async_engine.begin() as conn:
+            await conn.execute(
+                delete(KlineBackfillQueue).where(
+                    KlineBackfillQueue.client_name == client_name, KlineBackfillQueue.symbol == symbol
+                )
+            )
+
+    async def any(self) -> bool:
+        await self._ensure_table()
+        async with async_engine.connect() as conn:
+            return bool((await conn.execute(select(exists().select_from(KlineBackfillQueue)))).scalar())
+
+    async def pending(self, limit: int = 1000) -> list[ListingUnit]:
+        """按入队顺序返回待回补的工作单元（不删除）"""
+        await self._ensure_table()
+        stmt = (
+            select(KlineBackfillQueue.client_name, KlineBackfillQueue.symbol, KlineBackfillQueue.interval)
+            .order_by(KlineBackfillQueue.created_at)
+            .limit(limit)
+        )
+        async with async_engine.connect() as conn:
+            return [tuple(row) for row in (await conn.execute(stmt)).all()]
+
+    @staticmethod
+    def _match(units: list[ListingUnit]):
+        return tuple_(KlineBackfillQueue.client_name, KlineBackfillQueue.symbol, KlineBackfillQueue.interval).in_(
+            units
+        )
+
+    async def done(self, units: list[ListingUnit]):
+        if units:
+            async with async_engine.begin() as conn:
+                await conn.execute(delete(KlineBackfillQueue).where(self._match(units)))
+
+    async def failed(self, units: list[ListingUnit]):
+        """保留在队列中，下一轮重试"""
+        if units:
+            async with async_engine.begin() as conn:
+                await conn.execute(
+                    update(KlineBackfillQueue)
+                    .where(self._match(units))
+                    .values(attempts=KlineBackfillQueue.attempts + 1)
+                )
+
+
+@lru_cache
+def get_listing_queue() -> MySQLListingQueue:
+    return MySQLListingQueue()
@@ -3,28 +3,29 @@ import traceback
 
 from macro_markets.oklink.fetcher import OklinkOnchainInfo
 from prefect import flow, task
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from prefect.cache_policies import NO_CACHE
+from prefect.futures import wait
 
+from cluster import WorkUnit, get_shard_manager, singleton
 from databases.doris import get_stream_loader
-from databases.mysql import sync_engine
-from databases.mysql.models import ExchangeInfo
-
-exchange_names = ["binance", "okx", "bybit", "bitget", "kraken"]
+from utils.prefect_decorators import batch_enabled, run_batch
+from utils.runtime import run
+from utils.stagger import BurstPlanner, sleep_until
 
+from .utils import get_exchange_info
 
-def get_exchange_info(exchange_name: str):
-    with Session(sync_engine) as conn:
-        stmt = select(ExchangeInfo).where(ExchangeInfo.name == exchange_name)
-        return conn.execute(stmt).scalar_one_or_none()
+exchange_names = ["binance", "okx", "bybit", "bitget", "kraken"]
+# Oklink 请求按交易所错开的窗口（秒）
+CEX_INFLOW_WINDOW = 15
 
 
 @task(name="sync-cex-inflow-task", retries=2, retry_delay_seconds=3)
-async def sync_one_cex_inflow(exchange_name: str):
+async def sync_one_cex_inflow(exchange_name: str, not_before: float | None = None):
+    await sleep_until(not_before)
     stream_loader = get_stream_loader()
     oklink_onchain_info = OklinkOnchainInfo()
 
-    exchange_info = get_exchange_info(exchange_name)
+    exchange_info = await get_exchange_info(exchange_name)
 
     try:
         inflow_rows = await oklink_onchain_info.get_inflow(exchange_info)
@@ -35,11 +36,30 @@ async def sync_one_cex_inflow(exchange_name: str):
         return f"{exchange_name} inflow failed: {e}"
 
 
+@task(name="sync-cex-inflow-batch", cache_policy=NO_CACHE)
+async def sync_cex_inflow_batch(names: list[str], start_at: dict[str, float]):
+    return await run_batch(
+        "sync-cex-inflow",
+        names,
+        lambda n: sync_one_cex_inflow.fn(n, start_at[f"cex_inflow:{n}"]),
+        retries=2,
+        retry_delay=3,
+    )
+
+
 @flow(name="sync-cex-inflow")
-async def sync_cex_inflow():
-    for name in exchange_names:
-        sync_one_cex_inflow.submit(name)
+@singleton("sync-cex-inflow")
+async def sync_cex_inflow(batch: bool | None = None):
+    shard = await get_shard_manager().ready()
+    names = [name for name in exchange_names if shard.owns(WorkUnit(name, 0, "*", "cex_inflow"))]
+    start_at = BurstPlanner(CEX_INFLOW_WINDOW).start_times(f"cex_inflow:{n}" for n in names)
+    if batch_enabled(batch):
+        await sync_cex_inflow_batch(names, start_at)
+    else:
+        futures = [sync_one_cex_inflow.submit(name, start_at[f"cex_inflow:{name}"]) for name in names]
+        # prefect wait 是同步阻塞的，放到线程里等待，不阻塞单例租约续约所在的事件循环
+        await asyncio.to_thread(wait, futures)
 
 
 if __name__ == "__main__":
-    asyncio.run(sync_cex_inflow())
+    run(sync_cex_inflow())
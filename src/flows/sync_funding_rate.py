@@ -1,22 +1,50 @@
 import asyncio
 import traceback
 
+from constants import InstType
 from prefect import flow, task
 from prefect.cache_policies import NO_CACHE
+from prefect.futures import wait
 
+from cluster import WorkUnit, get_shard_manager, singleton
 from exchanges._base_ import BaseClient
-from exchanges.binance import BinancePerpClient
-from exchanges.bitget import BitgetPerpClient
-from exchanges.bybit import BybitPerpClient
-from exchanges.okx import OkxPerpClient
-from utils.logger import logger as _logger
+from exchanges.pool import get_client_pool
+from metadata import warm_start
+from utils.deadline import Deadline
+from utils.logger import logger as _logger, use_job
+from utils.prefect_decorators import batch_enabled, run_batch
+from utils.runtime import run
+from utils.stagger import JOB_OFFSET_WINDOW, BurstPlanner, sleep_until, stagger_seconds
+
+# 触发分钟 / 秒（main.JOBS 与 deploy 共用），实际触发秒按 flow 名错开，run 的截止时间为下一次触发
+FUNDING_MINUTES = (0, 1, 5, 30)
+FUNDING_SECOND = 5
+# 按优先级排列，截止时间到了仍未完成的交易所记为 unfinished
+FUNDING_EXCHANGES = ["binance", "okx", "bybit", "bitget"]
+# 各交易所错开启动的窗口（秒）
+FUNDING_EXCHANGE_WINDOW = 8
+
+
+def funding_deadline(now: float | None = None) -> Deadline:
+    """截止到下一次触发，触发秒与调度一致（按 flow 名错开后的秒数）"""
+    second = stagger_seconds([FUNDING_SECOND], "sync-funding-rate", JOB_OFFSET_WINDOW)[0]
+    return Deadline.next_minute(FUNDING_MINUTES, second=second, now=now)
 
 
 @task(name="update-funding-rate", cache_policy=NO_CACHE)
-async def update_funding_rate_task(client_name: str, client: BaseClient):
+async def update_funding_rate_task(
+    client_name: str, client: BaseClient, not_before: float | None = None, deadline: Deadline | None = None
+):
     try:
-        await client.update_funding_rate()
+        await sleep_until(not_before)
+        # 截止时间到了直接取消，不让 task 在单例锁释放后继续写入
+        timeout = None if deadline is None else max(deadline.remaining(), 0)
+        with use_job("FUNDING_RATE"):
+            await asyncio.wait_for(client.update_funding_rate(), timeout=timeout)
         return f"{client_name} ok"
+    except TimeoutError:
+        _logger.warning(f"[{client_name}] Deadline reached, funding rate update cancelled")
+        return f"{client_name} timeout"
     except Exception as e:
         _logger.error(f"[{client_name}] Failed: {e}")
         traceback.print_exc()
@@ -24,21 +52,49 @@ async def update_funding_rate_task(client_name: str, client: BaseClient):
         return f"{client_name} failed"
 
 
+@task(name="update-funding-rate-batch", cache_policy=NO_CACHE)
+async def update_funding_rate_batch(clients: dict[str, BaseClient], start_at: dict[str, float], deadline: Deadline):
+    return await run_batch(
+        "update-funding-rate",
+        list(clients),
+        lambda n: update_funding_rate_task.fn(n, clients[n], start_at[f"funding:{n}"], deadline),
+        deadline=deadline,
+    )
+
+
 @flow(name="sync-funding-rate")
-async def sync_funding_rate():
-    logger = _logger.bind(job_id="FUNDING_RATE")
+@singleton("sync-funding-rate")
+async def sync_funding_rate(batch: bool | None = None):
+    deadline = funding_deadline()
+    await warm_start()
 
+    pool = get_client_pool()
+    shard = await get_shard_manager().ready()
     clients: dict[str, BaseClient] = {
-        "binance": BinancePerpClient(logger),
-        "bitget": BitgetPerpClient(logger),
-        "bybit": BybitPerpClient(logger),
-        "okx": OkxPerpClient(logger),
+        name: pool.get(f"{name}_perp")
+        for name in FUNDING_EXCHANGES
+        if shard.owns(WorkUnit(name, InstType.PERP, "*", "funding_rate"))
     }
 
-    # Prefect 会自动并发执行 submit，不需要 asyncio.gather
-    for name, client in clients.items():
-        update_funding_rate_task.submit(client_name=name, client=client)
+    # Prefect 会自动并发执行 submit，不需要 asyncio.gather；每个 task 在截止时间自行取消，全部结束后再释放单例锁。
+    # prefect wait 是同步阻塞的，放到线程里等待，不阻塞单例租约续约所在的事件循环
+    start_at = BurstPlanner(FUNDING_EXCHANGE_WINDOW).start_times(f"funding:{n}" for n in clients)
+    if batch_enabled(batch):
+        # 未完成的交易所在 batch 结果中记为 timeout
+        await update_funding_rate_batch(clients, start_at, deadline)
+        return
+
+    futures = {
+        name: update_funding_rate_task.submit(
+            client_name=name, client=client, not_before=start_at[f"funding:{name}"], deadline=deadline
+        )
+        for name, client in clients.items()
+    }
+    await asyncio.to_thread(wait, list(futures.values()))
+    unfinished = [name for name, f in futures.items() if f.state.is_completed() and f.result() == f"{name} timeout"]
+    if unfinished:
+        _logger.warning(f"sync_funding_rate: deadline reached, unfinished: {unfinished}")
 
 
 if __name__ == "__main__":
-    asyncio.run(sync_funding_rate())
+    run(sync_funding_rate())
@@ -1,10 +1,12 @@
 from macro_markets.kalshi import KalshiClient
 from prefect import flow
 
+from cluster import singleton
 from utils.logger import logger as _logger
 
 
 @flow(name="sync-kalshi")
+@singleton("sync-kalshi")
 async def sync_kalshi_flow():
     logger = _logger.bind(job_id="KALSHI")
     client = KalshiClient(logger)
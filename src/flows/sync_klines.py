@@ -2,79 +2,180 @@ import asyncio
 import traceback
 from typing import Literal
 
+from constants import SymbolStatus
+
+from cluster import LeaseLostError, WorkUnit, get_shard_manager, job_lock_name, lease_lock
 from exchanges._base_ import BaseClient
-from exchanges.aster import AsterPerpClient
-from exchanges.binance import BinancePerpClient, BinanceSpotClient
-from exchanges.bitget import BitgetPerpClient, BitgetSpotClient
-from exchanges.bitmart import BitmartPerpClient, BitmartSpotClient
-from exchanges.bybit import BybitPerpClient, BybitSpotClient
-from exchanges.gate import GateSpotClient
-from exchanges.kraken import KrakenSpotClient
-from exchanges.mexc import MexcPerpClient, MexcSpotClient
-from exchanges.okx import OkxPerpClient, OkxSpotClient
-from exchanges.woox import WooxPerpClient, WooxSpotClient
-from utils.logger import logger as _logger
+from exchanges.pool import get_client_pool
+from exchanges.registry import find_client_name
+from metadata import SymbolEvent, SymbolEventType, get_symbol_event_bus, warm_start
+from utils.lanes import Lane, use_lane
+from utils.logger import logger as _logger, use_job
 
 from .constants import COINS
+from .listing_queue import get_listing_queue
 from .utils import get_symbols
 
+KLINE_CLIENTS = [
+    "aster_perp",
+    "binance_perp",
+    "bitget_perp",
+    "bitmart_perp",
+    "bybit_perp",
+    "mexc_perp",
+    "okx_perp",
+    "woox_perp",
+    "binance_spot",
+    "bitget_spot",
+    "bitmart_spot",
+    "bybit_spot",
+    "gate_spot",
+    "kraken_spot",
+    "mexc_spot",
+    "okx_spot",
+    "woox_spot",
+]
+
+KLINE_INTERVALS: list[Literal["1m", "1h", "1d"]] = ["1m", "1h"]
+KLINE_QUOTE_ASSET = "USDT"
+# 定时同步 / 回补的默认起点（2025-01-01 00:00:00 UTC）
+KLINE_BACKFILL_START = 1735689600000
+
+# 正在执行的回补任务，下架时取消：(exchange, inst_type, symbol) → tasks
+_backfill_tasks: dict[tuple[str, int, str], list[asyncio.Task]] = {}
+
+
+def _kline_unit(client: BaseClient, symbol: str, interval: str) -> WorkUnit:
+    return WorkUnit(client.exchange_name, client.inst_type, symbol, f"kline_{interval}")
+
+
+async def _update_kline_unit(
+    client: BaseClient, symbol: str, interval: str, start_time: int | None = None
+) -> bool:
+    """
+    单个交易对加工作单元锁：定时同步与上架回补、或多副本之间不会重复拉取同一交易对。
+    租约传入 update_kline，失效（续约失败 / 过期被接管）后立即停止请求和写入。
+    返回是否完整执行（被他人持有 / 中途失去租约时为 False）
+    """
+    unit = _kline_unit(client, symbol, interval)
+    async with lease_lock(unit.key) as lease:
+        if lease is None:
+            return False
+        try:
+            await client.update_kline(symbol, interval, start_time, lease=lease)
+        except LeaseLostError as e:
+            _logger.warning(f"Abort {unit.key}: {e}")
+            return False
+    return True
+
+
+async def _backfill_kline_unit(
+    client: BaseClient, symbol: str, interval: str, start_time: int | None = None
+) -> bool:
+    """
+    回补单个交易对，登记到 _backfill_tasks，下架时只取消该交易对，不影响同一 worker 的其他任务。
+    返回值同 _update_kline_unit；因下架被取消视为完成（不需要重试）
+    """
+    key = (client.exchange_name, client.inst_type, symbol)
+    task = asyncio.create_task(_update_kline_unit(client, symbol, interval, start_time))
+    _backfill_tasks.setdefault(key, []).append(task)
+    try:
+        return await task
+    except asyncio.CancelledError:
+        if asyncio.current_task().cancelling():
+            raise
+        _logger.info(f"Backfill cancelled for {client.exchange_name} {symbol} {interval}")
+        return True
+    finally:
+        tasks = _backfill_tasks.get(key, [])
+        if task in tasks:
+            tasks.remove(task)
+        if not tasks:
+            _backfill_tasks.pop(key, None)
+
+
+async def _catch_up_kline_unit(client: BaseClient, symbol: str, interval: str, start_time: int | None = None):
+    # 定时增量补齐走 CATCH_UP 通道，不挤占分钟级实时任务的额度
+    with use_lane(Lane.CATCH_UP):
+        await _update_kline_unit(client, symbol, interval, start_time)
+
 
 async def update_kline(client: BaseClient, coins: [str], interval: Literal["1m", "1h", "1d"]):
-    symbols = await get_symbols(client.exchange_name, coins, "USDT", client.inst_type)
+    # 只轮询交易中的交易对，下架 / 暂停的交易对不再浪费请求
+    symbols = await get_symbols(client.exchange_name, coins, KLINE_QUOTE_ASSET, client.inst_type, [SymbolStatus.ACTIVE])
+    # 多 worker 时只处理分配给本节点的交易对
+    shard = await get_shard_manager().ready()
+    symbols = [s for s in symbols if shard.owns(_kline_unit(client, s.symbol, interval))]
     for i in symbols:
         try:
-            await client.update_kline(i.symbol, interval, 1735689600000)
+            await _catch_up_kline_unit(client, i.symbol, interval, KLINE_BACKFILL_START)
         except Exception as e:
             _logger.error(f"Failed to update kline for {client.exchange_name} {i}: {e}")
             traceback.print_exc()
             await asyncio.sleep(1)
 
 
+async def sync_klines(interval: Literal["1m", "1h", "1d"]):
+    async with lease_lock(job_lock_name(f"sync-klines-{interval}"), ttl=300) as lease:
+        if lease is None:
+            return
+        await _sync_klines(interval)
+
+
+async def _sync_klines(interval: Literal["1m", "1h", "1d"]):
+    await warm_start()
+    pool = get_client_pool()
+    clients = [pool.get(name) for name in KLINE_CLIENTS]
+
+    with use_job(f"KLINE[{interval}]"):
+        await asyncio.gather(*(update_kline(c, COINS, interval) for c in clients))
+
+
 async def sync_klines_1m():
-    logger = _logger.bind(job_id="KLINE[1m]")
-    clients = [
-        AsterPerpClient(logger),
-        BinancePerpClient(logger),
-        BitgetPerpClient(logger),
-        BitmartPerpClient(logger),
-        BybitPerpClient(logger),
-        MexcPerpClient(logger),
-        OkxPerpClient(logger),
-        WooxPerpClient(logger),
-        BinanceSpotClient(logger),
-        BitgetSpotClient(logger),
-        BitmartSpotClient(logger),
-        BybitSpotClient(logger),
-        GateSpotClient(logger),
-        KrakenSpotClient(logger),
-        MexcSpotClient(logger),
-        OkxSpotClient(logger),
-        WooxSpotClient(logger),
-    ]
-
-    await asyncio.gather(*(update_kline(c, COINS, "1m") for c in clients))
+    await sync_klines("1m")
 
 
 async def sync_klines_1h():
-    logger = _logger.bind(job_id="KLINE[1h]")
-    clients = [
-        AsterPerpClient(logger),
-        BinancePerpClient(logger),
-        BitgetPerpClient(logger),
-        BitmartPerpClient(logger),
-        BybitPerpClient(logger),
-        MexcPerpClient(logger),
-        OkxPerpClient(logger),
-        WooxPerpClient(logger),
-        BinanceSpotClient(logger),
-        BitgetSpotClient(logger),
-        BitmartSpotClient(logger),
-        BybitSpotClient(logger),
-        GateSpotClient(logger),
-        KrakenSpotClient(logger),
-        MexcSpotClient(logger),
-        OkxSpotClient(logger),
-        WooxSpotClient(logger),
-    ]
-
-    await asyncio.gather(*(update_kline(c, COINS, "1h") for c in clients))
+    await sync_klines("1h")
+
+
+# -------------------------------------------------------------------
+# Symbol lifecycle subscribers
+# -------------------------------------------------------------------
+def _is_kline_client(event: SymbolEvent) -> bool:
+    return find_client_name(event.exchange, event.inst_type) in KLINE_CLIENTS
+
+
+async def on_symbol_listed(event: SymbolEvent):
+    """
+    新上架（或恢复交易）的关注交易对写入回补队列（MySQL），由 backfill_new_listings 交给回补规划执行，
+    不在 symbol 同步的 task 里回补（否则 sync-symbols 租约会被长时间占用）
+    """
+    if event.new_status != SymbolStatus.ACTIVE:
+        return
+    if event.base_asset not in COINS or event.quote_asset != KLINE_QUOTE_ASSET:
+        return
+    if not _is_kline_client(event):
+        return
+
+    client_name = find_client_name(event.exchange, event.inst_type)
+    await get_listing_queue().put([(client_name, event.symbol, interval) for interval in KLINE_INTERVALS])
+
+
+async def on_symbol_delisted(event: SymbolEvent):
+    """下架 / 暂停：移出待回补队列并取消正在进行的回补（轮询集合由 catalog 状态过滤自动剔除）"""
+    if event.type == SymbolEventType.STATUS_CHANGED and event.new_status == SymbolStatus.ACTIVE:
+        return
+    if _is_kline_client(event):
+        await get_listing_queue().discard(find_client_name(event.exchange, event.inst_type), event.symbol)
+    # 回补任务可能运行在其他线程的事件循环中
+    for task in _backfill_tasks.pop((event.exchange, event.inst_type, event.symbol), []):
+        task.get_loop().call_soon_threadsafe(task.cancel)
+
+
+def register_symbol_subscribers(bus=None):
+    bus = bus or get_symbol_event_bus()
+    bus.subscribe(SymbolEventType.LISTED, on_symbol_listed)
+    bus.subscribe(SymbolEventType.STATUS_CHANGED, on_symbol_listed)
+    bus.subscribe(SymbolEventType.STATUS_CHANGED, on_symbol_delisted)
+    bus.subscribe(SymbolEventType.DELISTED, on_symbol_delisted)
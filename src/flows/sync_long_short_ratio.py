@@ -2,19 +2,28 @@ import asyncio
 import traceback
 from typing import Literal
 
-from constants import InstType
+from constants import InstType, SymbolStatus
 from prefect import flow, task
 from prefect.cache_policies import NO_CACHE
+from prefect.futures import wait
 
+from cluster import WorkUnit, get_shard_manager, singleton
 from exchanges._base_ import BaseClient
-from exchanges.binance import BinancePerpClient
-from exchanges.bitget import BitgetPerpClient
-from exchanges.bybit import BybitPerpClient
-from exchanges.okx import OkxPerpClient
-from utils.logger import logger as _logger
+from exchanges.pool import get_client_pool
+from metadata import warm_start
+from utils.deadline import Deadline, run_until_deadline
+from utils.logger import logger as _logger, use_job
+from utils.runtime import run
+from utils.stagger import BurstPlanner, sleep_until
 
 from .constants import COINS
-from .utils import get_symbols
+from .utils import get_symbols, rank_symbols
+
+# 每个时间槽的长度，run 的截止时间为当前槽结束
+RATIO_SLOT_SECONDS = {"5m": 300, "1h": 3600, "1d": 86400}
+# 各交易所错开启动的窗口，以及交易所内交易对请求铺开的时长（秒）
+RATIO_EXCHANGE_WINDOW = 10
+RATIO_SPREAD_SECONDS = {"5m": 60, "1h": 120, "1d": 300}
 
 
 @task(
@@ -23,30 +32,41 @@ from .utils import get_symbols
     retry_delay_seconds=3,
     cache_policy=NO_CACHE,
 )
-async def update_long_short_ratio(client_name: str, interval: Literal["5m", "1h", "1d"], coins: list[str]):
+async def update_long_short_ratio(
+    client_name: str,
+    interval: Literal["5m", "1h", "1d"],
+    coins: list[str],
+    deadline: Deadline | None = None,
+    not_before: float | None = None,
+):
     try:
-        # 动态加载 client
-        client: BaseClient = {
-            "binance": BinancePerpClient,
-            "bitget": BitgetPerpClient,
-            "bybit": BybitPerpClient,
-            "okx": OkxPerpClient,
-        }[client_name](_logger)
-
-        symbols = await get_symbols(client_name, coins, "USDT", InstType.PERP)
-
-        for sym in symbols:
-            try:
-                if interval == "5m":
-                    await client.update_long_short_ratio_5m(sym)
-                elif interval == "1h":
-                    await client.update_long_short_ratio_1h(sym)
-                elif interval == "1d":
-                    await client.update_long_short_ratio_1d(sym)
-            except Exception as e:
-                _logger.error(f"[{client_name}] Failed {sym}: {e}")
-                traceback.print_exc()
-                await asyncio.sleep(1)
+        await sleep_until(not_before)
+        # 进程级客户端池，跨 task / flow 运行复用
+        client: BaseClient = get_client_pool().get(f"{client_name}_perp")
+
+        symbols = await get_symbols(client_name, coins, "USDT", InstType.PERP, [SymbolStatus.ACTIVE])
+        # 多 worker 时只处理分配给本节点的交易对
+        shard = await get_shard_manager().ready()
+        symbols = [s for s in symbols if shard.owns(WorkUnit(client_name, InstType.PERP, s.symbol, f"ratio_{interval}"))]
+        # 高成交额交易对优先，截止时间到了剩余的留给下一个时间槽
+        symbols = await rank_symbols(client_name, InstType.PERP, symbols)
+
+        update = {
+            "5m": client.update_long_short_ratio_5m,
+            "1h": client.update_long_short_ratio_1h,
+            "1d": client.update_long_short_ratio_1d,
+        }[interval]
+        deadline = deadline or Deadline.slot(RATIO_SLOT_SECONDS[interval])
+        with use_job(f"LONG_SHORT_RATIO[{interval}]"):
+            report = await run_until_deadline(
+                f"{client_name} ratio_{interval}",
+                symbols,
+                update,
+                deadline,
+                _logger,
+                spread=RATIO_SPREAD_SECONDS[interval],
+            )
+        return report.summary()
 
     except Exception as e:
         _logger.error(f"[{client_name}] Failed overall: {e}")
@@ -59,25 +79,38 @@ def get_client_names() -> list[str]:
 
 
 async def submit_tasks(interval: str):
-    # Prefect 会自动并发执行 submit
-    for name in get_client_names():
-        update_long_short_ratio.submit(name, interval, COINS)
+    await warm_start()
+    deadline = Deadline.slot(RATIO_SLOT_SECONDS[interval])
+    # Prefect 会自动并发执行 submit；等待完成后再释放单例锁，超过截止时间的不再等待
+    # 各交易所按固定顺序错开启动；不同周期的 key 不同，整点同时触发的 5m / 1h 不会撞在同一交易所
+    start_at = BurstPlanner(RATIO_EXCHANGE_WINDOW).start_times(f"ratio_{interval}:{n}" for n in get_client_names())
+    futures = [
+        update_long_short_ratio.submit(name, interval, COINS, deadline, start_at[f"ratio_{interval}:{name}"])
+        for name in get_client_names()
+    ]
+    # prefect wait 是同步阻塞的，放到线程里等待，不阻塞单例租约续约 / 分片心跳所在的事件循环
+    _, not_done = await asyncio.to_thread(wait, futures, timeout=max(deadline.remaining(), 0))
+    if not_done:
+        _logger.warning(f"ratio_{interval}: {len(not_done)} exchange tasks still running at deadline")
 
 
 @flow(name="sync-long-short-ratio-5m")
+@singleton("sync-long-short-ratio-5m")
 async def sync_long_short_ratio_5m():
     await submit_tasks("5m")
 
 
 @flow(name="sync-long-short-ratio-1h")
+@singleton("sync-long-short-ratio-1h")
 async def sync_long_short_ratio_1h():
     await submit_tasks("1h")
 
 
 @flow(name="sync-long-short-ratio-1d")
+@singleton("sync-long-short-ratio-1d")
 async def sync_long_short_ratio_1d():
     await submit_tasks("1d")
 
 
 if __name__ == "__main__":
-    asyncio.run(sync_long_short_ratio_5m())
+    run(sync_long_short_ratio_5m())
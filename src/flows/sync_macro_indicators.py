@@ -1,6 +1,7 @@
 from macro_markets.macro_indicators import get_macro_klines
 from prefect import flow
 
+from cluster import singleton
 from databases.doris import get_stream_loader
 from utils.logger import logger as _logger
 
@@ -8,6 +9,7 @@ logger = _logger.bind(job_id="MACRO_INDICATORS")
 
 
 @flow(name="sync-macro-indicators")
+@singleton("sync-macro-indicators")
 async def sync_macro_indicators():
     logger.info("Starting sync_macro_indicators...")
     results = await get_macro_klines(logger)
@@ -15,6 +17,6 @@ async def sync_macro_indicators():
 
 
 if __name__ == "__main__":
-    import asyncio
+    from utils.runtime import run
 
-    asyncio.run(sync_macro_indicators())
+    run(sync_macro_indicators())
@@ -1,10 +1,12 @@
 from macro_markets.oklink.fetcher import OklinkOnchainInfo
 from prefect import flow
 
+from cluster import singleton
 from databases.doris import get_stream_loader
 
 
 @flow(name="sync-large-transfer")
+@singleton("sync-large-transfer")
 async def sync_onchain_large_transfer():
     stream_loader = get_stream_loader()
     oklink_onchain_info = OklinkOnchainInfo()
@@ -14,6 +16,6 @@ async def sync_onchain_large_transfer():
 
 
 if __name__ == "__main__":
-    import asyncio
+    from utils.runtime import run
 
-    asyncio.run(sync_onchain_large_transfer())
+    run(sync_onchain_large_transfer())
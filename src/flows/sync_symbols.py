@@ -1,59 +1,54 @@
 import asyncio
 
 from prefect import flow, task
+from prefect.cache_policies import NO_CACHE
+from prefect.futures import wait
 
-from exchanges.aster import AsterPerpClient, AsterSpotClient
-from exchanges.binance import BinancePerpClient, BinanceSpotClient
-from exchanges.bitget import BitgetPerpClient, BitgetSpotClient
-from exchanges.bitmart import BitmartPerpClient, BitmartSpotClient
-from exchanges.bybit import BybitPerpClient, BybitSpotClient
-from exchanges.coinbase import CoinbaseSpotClient
-from exchanges.gate import GatePerpClient, GateSpotClient
-from exchanges.kraken import KrakenSpotClient
-from exchanges.mexc import MexcPerpClient, MexcSpotClient
-from exchanges.okx import OkxPerpClient, OkxSpotClient
-from exchanges.woox import WooxPerpClient, WooxSpotClient
-from utils.logger import logger as _logger
+from cluster import WorkUnit, get_shard_manager, singleton
+from exchanges.pool import get_client_pool
+from exchanges.registry import client_names, get_client_class
+from metadata import get_symbol_catalog, get_symbol_event_bus, warm_start, write_snapshot
+from utils.logger import logger as _logger, use_job
+from utils.prefect_decorators import batch_enabled, run_batch
+from utils.runtime import run
 
-CLIENT_REGISTRY = {
-    "aster_spot": AsterSpotClient,
-    "aster_perp": AsterPerpClient,
-    "binance_spot": BinanceSpotClient,
-    "binance_perp": BinancePerpClient,
-    "bitget_spot": BitgetSpotClient,
-    "bitget_perp": BitgetPerpClient,
-    "bitmart_spot": BitmartSpotClient,
-    "bitmart_perp": BitmartPerpClient,
-    "bybit_spot": BybitSpotClient,
-    "bybit_perp": BybitPerpClient,
-    "coinbase_spot": CoinbaseSpotClient,
-    "gate_spot": GateSpotClient,
-    "gate_perp": GatePerpClient,
-    "kraken_spot": KrakenSpotClient,
-    "mexc_spot": MexcSpotClient,
-    "mexc_perp": MexcPerpClient,
-    "okx_spot": OkxSpotClient,
-    "okx_perp": OkxPerpClient,
-    "woox_spot": WooxSpotClient,
-    "woox_perp": WooxPerpClient,
-}
+from .sync_klines import register_symbol_subscribers
 
 
 @task(name="update-symbols-task", retries=2, retry_delay_seconds=3)
 async def update_symbols_task(client_name: str):
-    logger = _logger.bind(job_id=f"SYMBOLS-{client_name}")
+    client = get_client_pool().get(client_name)
 
-    client_class = CLIENT_REGISTRY[client_name]
-    client = client_class(logger)
+    with use_job(f"SYMBOLS-{client_name}"):
+        diff = await client.update_all_symbols()
+    # 等待生命周期事件的处理器执行完（只登记回补队列，很快），避免 task 结束时被中断
+    await get_symbol_event_bus().drain()
+    return f"{client_name} symbols ok ({diff.summary()})"
 
-    await client.update_all_symbols()
-    return f"{client_name} symbols ok"
+
+@task(name="update-symbols-batch", cache_policy=NO_CACHE)
+async def update_symbols_batch(client_names: list[str]):
+    return await run_batch("update-symbols", client_names, update_symbols_task.fn, retries=2, retry_delay=3)
 
 
 @flow(name="sync-symbols")
-async def sync_symbols():
-    for client_name in CLIENT_REGISTRY:
-        update_symbols_task.submit(client_name)
+@singleton("sync-symbols")
+async def sync_symbols(batch: bool | None = None):
+    await warm_start()
+    register_symbol_subscribers()
+    shard = await get_shard_manager().ready()
+    names = [n for n in client_names() if shard.owns(WorkUnit(n, get_client_class(n).inst_type, "*", "symbols"))]
+    if batch_enabled(batch):
+        await update_symbols_batch(names)
+    else:
+        futures = [update_symbols_task.submit(client_name) for client_name in names]
+        # prefect wait 是同步阻塞的，放到线程里等待，不阻塞单例租约续约所在的事件循环
+        await asyncio.to_thread(wait, futures)
+
+    # 同步完成后写本地元数据快照，供其他 flow 进程快速启动
+    await get_symbol_catalog().refresh()
+    size = write_snapshot()
+    _logger.info(f"Metadata snapshot written ({size} bytes)")
 
 
 if __name__ == "__main__":
@@ -62,4 +57,4 @@ if __name__ == "__main__":
         client_name = "binance_spot"
         await update_symbols_task(client_name)
 
-    asyncio.run(sync_symbols_test())
+    run(sync_symbols_test())
@@ -1,27 +1,81 @@
-from constants import InstType
-from sqlalchemy import select
-from sqlalchemy.orm import Session
-
-from databases.mysql import sync_engine
-from databases.mysql.models import ExchangeInfo, ExchangeSymbol
-
-
-async def get_symbols(exchange: str, base_asset: [str], quote_asset: str, inst_type: InstType):
-    with Session(sync_engine) as conn:
-        results = (
-            select(ExchangeSymbol)
-            .join(ExchangeInfo)
-            .where(ExchangeSymbol.base_asset.in_(base_asset))
-            .where(ExchangeSymbol.quote_asset == quote_asset)
-            .where(ExchangeInfo.name == exchange)
-            .where(ExchangeSymbol.inst_type == inst_type.value)
-        )
-        symbols = conn.execute(results).scalars().all()
-    return symbols
+import time
+
+from constants import InstType, SymbolStatus
+
+from databases.doris import get_doris
+from metadata import get_exchange_registry, get_symbol_catalog
+from utils.logger import logger as _logger
+
+from .constants import COINS
+
+
+async def get_symbols(
+    exchange: str,
+    base_asset: [str],
+    quote_asset: str,
+    inst_type: InstType,
+    status: list[SymbolStatus] | None = None,
+):
+    catalog = get_symbol_catalog()
+    await get_exchange_registry().ensure_loaded()
+    await catalog.ensure_fresh()
+    return catalog.query(
+        exchange=exchange,
+        inst_type=inst_type,
+        base_assets=base_asset,
+        quote_asset=quote_asset,
+        status=status,
+    )
 
 
 async def get_exchange_info(exchange: str):
-    with Session(sync_engine) as conn:
-        results = select(ExchangeInfo).where(ExchangeInfo.name == exchange)
-        exchange_info = conn.execute(results).scalar_one_or_none()
-    return exchange_info
+    registry = get_exchange_registry()
+    await registry.ensure_loaded()
+    try:
+        return registry.get(exchange)
+    except KeyError:
+        return None
+
+
+# 交易对优先级（近 24h 成交额）缓存：(exchange, inst_type) → (expires_at, {symbol: quote_volume})
+PRIORITY_TTL = 3600
+_volume_cache: dict[tuple[str, int], tuple[float, dict[str, float]]] = {}
+
+
+async def _recent_quote_volume(exchange: str, inst_type: InstType) -> dict[str, float]:
+    key = (exchange, int(inst_type))
+    cached = _volume_cache.get(key)
+    if cached and cached[0] > time.time():
+        return cached[1]
+
+    try:
+        rows = await get_doris().query(
+            """
+            SELECT symbol, SUM(quote_volume)
+            FROM kline_1h
+            WHERE exchange_id = :exchange_id
+              AND inst_type = :inst_type
+              AND dt >= DATE_SUB(NOW(), INTERVAL 24 HOUR)
+            GROUP BY symbol
+            """,
+            {"exchange_id": get_exchange_registry().id_of(exchange), "inst_type": int(inst_type)},
+        )
+        volumes = {r[0]: float(r[1] or 0) for r in rows}
+    except Exception as e:
+        _logger.warning(f"Symbol priority unavailable for {exchange}, fallback to COINS order: {e}")
+        volumes = {}
+    _volume_cache[key] = (time.time() + PRIORITY_TTL, volumes)
+    return volumes
+
+
+async def rank_symbols(exchange: str, inst_type: InstType, symbols: list) -> list:
+    """
+    按近 24h 成交额从高到低排序（kline_1h 无数据的交易对按 COINS 顺序排在后面），
+    供有截止时间的 flow 优先处理重要交易对
+    """
+    volumes = await _recent_quote_volume(exchange, inst_type)
+    coin_rank = {c: i for i, c in enumerate(COINS)}
+    return sorted(
+        symbols,
+        key=lambda s: (-volumes.get(s.symbol, 0.0), coin_rank.get(s.base_asset, len(coin_rank)), s.symbol),
+    )
@@ -6,6 +6,7 @@ from typing import Literal
 from databases.doris import get_doris, get_stream_loader
 from utils.http_session import get_session
 from utils.logger import logger as _logger
+from utils.offload import offload
 
 OI_THRESHOLDS = {
     # ===== Fed / Rates =====
@@ -65,6 +66,34 @@ STATUS_MAP = {
 HEADERS = {"Accept": "application/json", "User-Agent": "CoinLuxer-PM-ETL/1.0"}
 
 
+def format_markets(resp: dict, updated_ts: int) -> tuple[list[dict], int, str]:
+    """market 分页 → (有成交的行, 本页 market 数, 下一页 cursor)，模块级函数，可在进程池中执行"""
+    markets = resp.get("markets", [])
+    rows = [
+        {
+            "updated_ts": updated_ts,
+            "event_ticker": market["event_ticker"],
+            "ticker": market["ticker"],
+            "status": STATUS_MAP.get(market.get("status")),
+            "last_price": market.get("last_price"),
+            "yes_bid": market.get("yes_bid"),
+            "yes_ask": market.get("yes_ask"),
+            "no_bid": market.get("no_bid"),
+            "no_ask": market.get("no_ask"),
+            "liquidity": market.get("liquidity"),
+            "volume": market.get("volume"),
+            "open_interest": market.get("open_interest"),
+            "custom_strike": market.get("custom_strike"),
+            "rules_primary": market.get("rules_primary"),
+            "close_time": market.get("close_time"),
+            "expiration_time": market.get("expiration_time"),
+        }
+        for market in markets
+        if market.get("volume")
+    ]
+    return rows, len(markets), resp.get("cursor", "")
+
+
 class KalshiClient:
     def __init__(self, logger=None):
         self.logger = logger or _logger.bind(job_id="KALSHI")
@@ -98,7 +127,14 @@ class KalshiClient:
         no_norm = no / s
         return yes_norm, no_norm
 
-    async def send_request(self, method: Literal["GET", "POST"], url: str, body: dict | None = None):
+    async def send_request(
+        self,
+        method: Literal["GET", "POST"],
+        url: str,
+        body: dict | None = None,
+        transform=None,  # 模块级转换函数，大响应体在进程池执行
+        transform_args: tuple = (),
+    ):
         session = await self.get_session()
         resp = await session.request(
             method,
@@ -106,7 +142,7 @@ class KalshiClient:
             headers=HEADERS,
             json=body,
         )
-        return await resp.json()
+        return await offload(await resp.read(), transform, *transform_args)
 
     async def fetch_series_list(self):
         series = await self.send_request("GET", "https://api.elections.kalshi.com/trade-api/v2/series")
@@ -116,38 +152,17 @@ class KalshiClient:
         cursor = ""
         result = []
         for _ in range(20):
-            resp = await self.send_request(
+            rows, count, cursor = await self.send_request(
                 "GET",
                 f"https://api.elections.kalshi.com/trade-api/v2/markets?series_ticker={series_ticker}&cursor={cursor}",
+                transform=format_markets,
+                transform_args=(int(time.time() * 1000),),
             )
-            markets = resp.get("markets", [])
-            if not markets:
+            if not count:
                 break
-            for market in markets:
-                if market.get("volume"):
-                    result.append(
-                        {
-                            "updated_ts": int(time.time() * 1000),
-                            "event_ticker": market["event_ticker"],
-                            "ticker": market["ticker"],
-                            "status": STATUS_MAP.get(market.get("status")),
-                            "last_price": market.get("last_price"),
-                            "yes_bid": market.get("yes_bid"),
-                            "yes_ask": market.get("yes_ask"),
-                            "no_bid": market.get("no_bid"),
-                            "no_ask": market.get("no_ask"),
-                            "liquidity": market.get("liquidity"),
-                            "volume": market.get("volume"),
-                            "open_interest": market.get("open_interest"),
-                            "custom_strike": market.get("custom_strike"),
-                            "rules_primary": market.get("rules_primary"),
-                            "close_time": market.get("close_time"),
-                            "expiration_time": market.get("expiration_time"),
-                        }
-                    )
+            result.extend(rows)
             if len(result) > 100:
                 break
-            cursor = resp.get("cursor", "")
             if not cursor:
                 break
         return result
@@ -1,8 +1,6 @@
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 
-import yfinance as yf
-
 from databases.doris import get_stream_loader
 
 MACRO_SYMBOLS = {
@@ -33,7 +31,9 @@ MACRO_SYMBOLS = {
 
 
 def _download_symbol(yf_symbol: str):
-    """使用同步的 yfinance 下载单个 symbol 的数据"""
+    """使用同步的 yfinance 下载单个 symbol 的数据（yfinance 较重，按需导入）"""
+    import yfinance as yf
+
     return yf.download(
         tickers=yf_symbol,
         interval="1m",
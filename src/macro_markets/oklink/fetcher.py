@@ -7,6 +7,7 @@ from uuid import uuid4
 from databases.doris import get_stream_loader
 from databases.mysql.models import ExchangeInfo
 from utils.http_session import get_session
+from utils.offload import offload
 
 from .decrypt_post import decrypt_oklink_response
 from .generate_apikey import get_api_key
@@ -84,10 +85,8 @@ class OklinkOnchainInfo:
             json=body,
         )
 
-        data = await response.json()
-        if decrypt:
-            data = decrypt_oklink_response(data, self.ts)
-        return data
+        # 地址标签批量解密（逐字段 AES）是 CPU 密集的，大响应体连同 JSON 解析一起交给进程池
+        return await offload(await response.read(), decrypt_oklink_response if decrypt else None, self.ts)
 
     async def get_inflow(self, exchange: ExchangeInfo):
         url = f"https://www.oklink.com/api/explorer/v2/por/{exchange.name}/inflowHistory"
@@ -1,107 +1,160 @@
 from utils.logger import logger  # noqa: I001
 
+import argparse
 import asyncio
+from datetime import datetime, timedelta
+import signal
+import time
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
-from jobs.sync_funding_rate import sync_funding_rate
-from jobs.sync_klines import sync_klines_1h, sync_klines_1m
-from jobs.sync_long_short_ratio import sync_long_short_ratio_1d, sync_long_short_ratio_1h, sync_long_short_ratio_5m
-from jobs.sync_onchain_tx import sync_large_transfer
-from jobs.sync_symbols import sync_symbols
-from jobs.sync_cex_inflow import sync_cex_inflow
-from jobs.sync_macro_indicators import sync_macro_indicators
-from jobs.sync_kalshi import sync_kalshi
-from utils.http_session import shutdown
+from cluster import get_shard_manager
+from exchanges.pool import get_client_pool
+from flows.backfill_klines import backfill_klines, backfill_new_listings_if_queued
+from flows.sync_cex_inflow import sync_cex_inflow
+from flows.sync_funding_rate import FUNDING_MINUTES, FUNDING_SECOND, sync_funding_rate
+from flows.sync_kalshi import sync_kalshi_flow
+from flows.sync_klines import register_symbol_subscribers, sync_klines_1h, sync_klines_1m
+from flows.sync_long_short_ratio import sync_long_short_ratio_1d, sync_long_short_ratio_1h, sync_long_short_ratio_5m
+from flows.sync_macro_indicators import sync_macro_indicators
+from flows.sync_onchain_tx import sync_onchain_large_transfer
+from flows.sync_symbols import sync_symbols
+from metadata import warm_start
+from utils.runtime import run
+from utils.stagger import JOB_OFFSET_WINDOW, stable_offset, stagger_seconds
 from utils.start_logo import print_banner
 
+# -------------------------------------------------------------------
+# 常驻 worker：一个预热好的解释器 + 事件循环，在进程内按计划执行 flow。
+# Prefect flow 直接 await 调用，仍会创建 flow run 并上报到 PREFECT_API_URL。
+# -------------------------------------------------------------------
+JOBS = [
+    {"func": sync_symbols, "trigger": "cron", "minute": "*/10", "second": 0},
+    {"func": sync_klines_1m, "trigger": "interval", "days": 1},
+    {"func": sync_klines_1h, "trigger": "interval", "days": 1},
+    {"func": backfill_new_listings_if_queued, "trigger": "interval", "minutes": 1},
+    # 全量缺口扫描：兜底回补队列之外遗漏的区间
+    {"func": backfill_klines, "trigger": "cron", "hour": 3, "minute": 30, "second": 0},
+    {"func": sync_long_short_ratio_5m, "trigger": "cron", "minute": "*/5", "second": 5, "misfire_grace_time": 30},
+    {"func": sync_long_short_ratio_1h, "trigger": "cron", "minute": 0, "second": "5,30", "misfire_grace_time": 60},
+    {
+        "func": sync_long_short_ratio_1d,
+        "trigger": "cron",
+        "hour": 0,
+        "minute": 0,
+        "second": "5,30",
+        "misfire_grace_time": 300,
+    },
+    {
+        "func": sync_funding_rate,
+        "trigger": "cron",
+        "minute": ",".join(map(str, FUNDING_MINUTES)),
+        "second": FUNDING_SECOND,
+        "misfire_grace_time": 60,
+    },
+    {"func": sync_onchain_large_transfer, "trigger": "interval", "seconds": 30},
+    {"func": sync_cex_inflow, "trigger": "cron", "minute": 0, "second": "5,30", "misfire_grace_time": 60},
+    {"func": sync_kalshi_flow, "trigger": "interval", "seconds": 60},
+    {"func": sync_macro_indicators, "trigger": "interval", "seconds": 30},
+]
+
+
+def job_name(func) -> str:
+    return getattr(func, "name", None) or func.__name__
+
+
+async def run_job(func):
+    """执行单个 flow，记录耗时；异常只记录，不影响调度器"""
+    name = job_name(func)
+    start = time.time()
+    try:
+        await func()
+        logger.info(f"[JOB DONE] {name} elapsed={round(time.time() - start, 3)}s")
+    except Exception as e:
+        logger.error(f"[JOB FAILED] {name} elapsed={round(time.time() - start, 3)}s: {e}")
+
+
+def stagger(spec: dict, trigger: str, name: str) -> dict:
+    """同一时刻触发的 job 按名称确定性地错开，避免整点集中请求交易所 / Doris"""
+    window = spec.pop("offset_window", JOB_OFFSET_WINDOW)
+    if trigger == "cron" and "second" in spec:
+        seconds = [int(s) for s in str(spec["second"]).split(",")]
+        spec["second"] = ",".join(map(str, stagger_seconds(seconds, name, window)))
+    elif trigger == "interval":
+        spec.setdefault("start_date", datetime.now() + timedelta(seconds=stable_offset(name, window)))
+    return spec
+
+
+def build_scheduler() -> AsyncIOScheduler:
+    scheduler = AsyncIOScheduler()
+    for spec in JOBS:
+        spec = dict(spec)
+        func = spec.pop("func")
+        trigger = spec.pop("trigger")
+        spec = stagger(spec, trigger, job_name(func))
+        spec.setdefault("max_instances", 1)
+        spec.setdefault("coalesce", True)
+        scheduler.add_job(run_job, trigger, args=[func], id=job_name(func), name=job_name(func), **spec)
+    return scheduler
+
 
 async def main():
-    scheduler = AsyncIOScheduler()
-    scheduler.add_job(sync_symbols, "interval", days=1, max_instances=1)
-
-    scheduler.add_job(sync_klines_1m, "interval", days=1, max_instances=1)
-    scheduler.add_job(sync_klines_1h, "interval", days=1, max_instances=1)
-
-    scheduler.add_job(
-        sync_long_short_ratio_5m,
-        "cron",
-        minute="*/5",
-        second=5,
-        max_instances=1,
-        misfire_grace_time=30,
-        coalesce=True,
-    )
-
-    scheduler.add_job(
-        sync_long_short_ratio_1h,
-        "cron",
-        minute=0,
-        second="5, 30",
-        max_instances=1,
-        misfire_grace_time=60,
-        coalesce=True,
-    )
-
-    scheduler.add_job(
-        sync_long_short_ratio_1d,
-        "cron",
-        hour=0,
-        minute=0,
-        second="5, 30",
-        max_instances=1,
-        misfire_grace_time=300,
-        coalesce=True,
-    )
-
-    scheduler.add_job(
-        sync_funding_rate,
-        "cron",
-        minute="0,1,5,30",
-        second="5",
-        misfire_grace_time=60,
-        max_instances=1,
-        coalesce=True,
-    )
-
-    scheduler.add_job(
-        sync_large_transfer,
-        "interval",
-        seconds=30,
-        max_instances=1,
-    )
-
-    scheduler.add_job(
-        sync_cex_inflow,
-        "cron",
-        minute=0,
-        second="5, 30",
-        max_instances=1,
-        misfire_grace_time=60,
-        coalesce=True,
-    )
-
-    scheduler.add_job(
-        sync_kalshi,
-        "interval",
-        seconds=60,
-        max_instances=1,
-    )
-
-    scheduler.add_job(
-        sync_macro_indicators,
-        "interval",
-        seconds=30,
-        max_instances=1,
-    )
+    # 启动时一次性加载元数据并注册交易对事件订阅，之后所有 flow 共享
+    await warm_start()
+    register_symbol_subscribers()
+    # 心跳绑定在常驻进程的主事件循环上，flow 内的 ready() / session() 直接复用
+    shard = await get_shard_manager().start()
 
+    scheduler = build_scheduler()
     scheduler.start()
 
-    await asyncio.Event().wait()  # 防止退出
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    logger.info(f"Event loop: {type(loop).__module__}.{type(loop).__name__}")
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    try:
+        await stop.wait()  # 防止退出
+    finally:
+        logger.info("Stopping scheduler...")
+        scheduler.shutdown(wait=False)
+        await shard.stop()
+        await get_client_pool().close()
+
+
+def list_jobs():
+    scheduler = build_scheduler()
+    for job in scheduler.get_jobs():
+        print(f"{job.id:<36} {job.trigger}")
+
+
+def cli(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="clx-etl worker")
+    parser.add_argument("--list-jobs", action="store_true", help="打印调度计划后退出")
+    parser.add_argument("--run", metavar="JOB", help="立即执行一次指定 job 后退出")
+    args = parser.parse_args(argv)
+
+    if args.list_jobs:
+        list_jobs()
+    elif args.run:
+        funcs = {job_name(spec["func"]): spec["func"] for spec in JOBS}
+        if args.run not in funcs:
+            parser.error(f"unknown job {args.run!r}, choose from: {', '.join(funcs)}")
+
+        async def run_once():
+            await warm_start()
+            try:
+                await run_job(funcs[args.run])
+            finally:
+                await get_client_pool().close()
+
+        run(run_once())
+    else:
+        print_banner("worker")
+        logger.info("Starting scheduler...")
+        run(main())
 
 
 if __name__ == "__main__":
-    print_banner()
-    logger.info("Starting scheduler...")
-    asyncio.run(main())
-    shutdown()
+    cli()
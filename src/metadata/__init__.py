@@ -0,0 +1,19 @@
+from .events import SymbolEvent, SymbolEventBus, SymbolEventType, get_symbol_event_bus
+from .exchanges import ExchangeEntry, ExchangeRegistry, get_exchange_registry
+from .snapshot import load_snapshot, warm_start, write_snapshot
+from .symbols import SymbolCatalog, get_symbol_catalog
+
+__all__ = [
+    "ExchangeEntry",
+    "ExchangeRegistry",
+    "SymbolCatalog",
+    "SymbolEvent",
+    "SymbolEventBus",
+    "SymbolEventType",
+    "get_exchange_registry",
+    "get_symbol_catalog",
+    "get_symbol_event_bus",
+    "load_snapshot",
+    "warm_start",
+    "write_snapshot",
+]
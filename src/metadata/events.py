@@ -0,0 +1,77 @@
+import asyncio
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from enum import StrEnum
+from functools import lru_cache
+
+from utils.logger import logger as _logger
+
+__all__ = ["SymbolEvent", "SymbolEventBus", "SymbolEventType", "get_symbol_event_bus"]
+
+
+class SymbolEventType(StrEnum):
+    LISTED = "listed"  # 新上架
+    STATUS_CHANGED = "status_changed"  # 状态变化（暂停 / 恢复 / 待上线 → 交易中）
+    DELISTED = "delisted"  # 交易所不再返回，已标记 CLOSED
+
+
+@dataclass(frozen=True)
+class SymbolEvent:
+    type: SymbolEventType
+    exchange: str
+    exchange_id: int
+    inst_type: int
+    symbol: str
+    base_asset: str | None = None
+    quote_asset: str | None = None
+    old_status: int | None = None
+    new_status: int | None = None
+
+
+Handler = Callable[[SymbolEvent], Awaitable[None]]
+
+
+class SymbolEventBus:
+    """
+    进程内交易对生命周期事件总线：symbol 同步发布，订阅者异步处理（不阻塞同步流程）
+    """
+
+    def __init__(self):
+        self._handlers: dict[SymbolEventType | None, list[Handler]] = defaultdict(list)
+        self._tasks: set[asyncio.Task] = set()
+        self.logger = _logger.bind(job_id="SYMBOL_EVENTS")
+
+    def subscribe(self, event_type: SymbolEventType | None, handler: Handler) -> Callable[[], None]:
+        """event_type=None 订阅全部事件，返回取消订阅函数（重复订阅同一 handler 只生效一次）"""
+        if handler not in self._handlers[event_type]:
+            self._handlers[event_type].append(handler)
+        return lambda: self._handlers[event_type].remove(handler)
+
+    async def _run(self, handler: Handler, event: SymbolEvent):
+        try:
+            await handler(event)
+        except Exception as e:
+            self.logger.error(f"Symbol event handler {handler.__name__} failed for {event}: {e}")
+
+    async def publish(self, event: SymbolEvent):
+        handlers = self._handlers.get(event.type, []) + self._handlers.get(None, [])
+        if not handlers:
+            return
+        self.logger.info(f"{event.type.value}: {event.exchange} {event.symbol} ({event.old_status} → {event.new_status})")
+        for handler in handlers:
+            task = asyncio.get_running_loop().create_task(self._run(handler, event))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def drain(self):
+        """等待当前事件循环中已派发的处理任务完成"""
+        loop = asyncio.get_running_loop()
+        pending = [t for t in self._tasks if t.get_loop() is loop]
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+@lru_cache
+def get_symbol_event_bus() -> SymbolEventBus:
+    return SymbolEventBus()
@@ -0,0 +1,90 @@
+from dataclasses import dataclass
+from functools import lru_cache
+import time
+
+from sqlalchemy import select
+
+from databases.mysql import ExchangeInfo, async_engine, sync_engine
+
+__all__ = ["ExchangeEntry", "ExchangeRegistry", "get_exchange_registry"]
+
+
+@dataclass(frozen=True)
+class ExchangeEntry:
+    id: int
+    name: str
+    venue_type: int
+    display_name: str | None = None
+
+
+class ExchangeRegistry:
+    """
+    进程内交易所注册表：启动时异步加载一次 exchange_info，之后 name → id / venue_type O(1) 查询。
+    exchange_info 变化极少，需要时显式调用 refresh()。
+    查询前必须已加载（await ensure_loaded() / warm_start()），不会在事件循环里隐式发起阻塞查询
+    """
+
+    def __init__(self):
+        self._by_name: dict[str, ExchangeEntry] = {}
+        self._by_id: dict[int, ExchangeEntry] = {}
+        self.loaded_at: float | None = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    def _set(self, rows):
+        self.load_entries(
+            ExchangeEntry(id=r.id, name=r.name, venue_type=r.venue_type, display_name=r.display_name) for r in rows
+        )
+
+    def load_entries(self, entries):
+        entries = list(entries)
+        self._by_name = {e.name: e for e in entries}
+        self._by_id = {e.id: e for e in entries}
+        self.loaded_at = time.time()
+
+    @staticmethod
+    def _stmt():
+        return select(ExchangeInfo.id, ExchangeInfo.name, ExchangeInfo.venue_type, ExchangeInfo.display_name)
+
+    async def refresh(self):
+        async with async_engine.connect() as conn:
+            rows = (await conn.execute(self._stmt())).all()
+        self._set(rows)
+
+    async def ensure_loaded(self):
+        if not self.loaded:
+            await self.refresh()
+
+    def refresh_sync(self):
+        """同步加载，只给不在事件循环中运行的同步调用方（如 Arrow Flight 读取）使用"""
+        with sync_engine.connect() as conn:
+            rows = conn.execute(self._stmt()).all()
+        self._set(rows)
+
+    def _check_loaded(self):
+        if not self.loaded:
+            raise RuntimeError("Exchange registry not loaded, await ensure_loaded() or warm_start() first")
+
+    def get(self, name: str) -> ExchangeEntry:
+        self._check_loaded()
+        try:
+            return self._by_name[name]
+        except KeyError:
+            raise KeyError(f"Unknown exchange: {name}") from None
+
+    def get_by_id(self, exchange_id: int) -> ExchangeEntry:
+        self._check_loaded()
+        return self._by_id[exchange_id]
+
+    def id_of(self, name: str) -> int:
+        return self.get(name).id
+
+    def all(self) -> list[ExchangeEntry]:
+        return list(self._by_name.values())
+
+
+@lru_cache
+def get_exchange_registry() -> ExchangeRegistry:
+    return ExchangeRegistry()
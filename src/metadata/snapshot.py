@@ -0,0 +1,120 @@
+import asyncio
+from dataclasses import asdict
+from datetime import datetime
+import hashlib
+import json
+import os
+import time
+import zlib
+
+from databases.mysql import ExchangeSymbol
+from utils.logger import logger as _logger
+
+from .exchanges import ExchangeEntry, get_exchange_registry
+from .symbols import get_symbol_catalog
+
+__all__ = ["load_snapshot", "warm_start", "write_snapshot"]
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_PATH = os.getenv("METADATA_SNAPSHOT_PATH", "/tmp/clx-etl/metadata.snapshot")
+DATETIME_COLUMNS = ("created_at", "updated_at")
+
+logger = _logger.bind(job_id="METADATA_SNAPSHOT")
+
+_revalidate_task: asyncio.Task | None = None
+
+
+def write_snapshot(path: str = SNAPSHOT_PATH) -> int:
+    """
+    exchange_info + 交易对目录 → 本地快照文件（原子写入），返回文件大小
+    格式：首行 JSON 头（version / created_at / checksum），之后为 zlib 压缩的 JSON 正文
+    """
+    registry = get_exchange_registry()
+    catalog = get_symbol_catalog()
+    columns = [c.name for c in ExchangeSymbol.__table__.columns]
+
+    payload = {
+        "exchanges": [asdict(e) for e in registry.all()],
+        "symbols": [
+            [row.isoformat() if isinstance(row, datetime) else row for row in (getattr(s, c) for c in columns)]
+            for s in catalog.query()
+        ],
+        "columns": columns,
+    }
+    body = zlib.compress(json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8"))
+    header = {
+        "version": SNAPSHOT_VERSION,
+        "created_at": time.time(),
+        "checksum": hashlib.sha256(body).hexdigest(),
+    }
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(json.dumps(header).encode("utf-8") + b"\n" + body)
+    os.replace(tmp, path)
+    return len(body)
+
+
+def load_snapshot(path: str = SNAPSHOT_PATH) -> bool:
+    """
+    加载快照到 registry / catalog；文件不存在、版本不符或校验失败时返回 False
+    """
+    try:
+        with open(path, "rb") as f:
+            header_line, body = f.read().split(b"\n", 1)
+        header = json.loads(header_line)
+    except (FileNotFoundError, ValueError) as e:
+        logger.info(f"No usable metadata snapshot at {path}: {e}")
+        return False
+
+    if header.get("version") != SNAPSHOT_VERSION or hashlib.sha256(body).hexdigest() != header.get("checksum"):
+        logger.warning(f"Metadata snapshot {path} has wrong version or checksum, ignored")
+        return False
+
+    payload = json.loads(zlib.decompress(body))
+    columns = payload["columns"]
+    datetime_idx = [i for i, c in enumerate(columns) if c in DATETIME_COLUMNS]
+
+    symbols = []
+    for values in payload["symbols"]:
+        for i in datetime_idx:
+            if values[i] is not None:
+                values[i] = datetime.fromisoformat(values[i])
+        symbols.append(ExchangeSymbol(**dict(zip(columns, values, strict=True))))
+
+    get_exchange_registry().load_entries(ExchangeEntry(**e) for e in payload["exchanges"])
+    catalog = get_symbol_catalog()
+    catalog.clear()
+    catalog.apply(symbols)
+    # 以快照时间作为刷新时间：过期后 ensure_fresh() 会按 updated_at 增量补齐
+    catalog.refreshed_at = header["created_at"]
+    return True
+
+
+async def _revalidate():
+    try:
+        await get_exchange_registry().refresh()
+        await get_symbol_catalog().refresh()
+    except Exception as e:
+        logger.warning(f"Metadata revalidation failed: {e}")
+
+
+async def warm_start(path: str = SNAPSHOT_PATH, revalidate: bool = True):
+    """
+    进程启动：优先从本地快照加载元数据（毫秒级），后台再向 MySQL 增量校验；
+    没有可用快照时退化为直接从 MySQL 加载。已加载过则什么都不做。
+    """
+    global _revalidate_task
+    registry = get_exchange_registry()
+    catalog = get_symbol_catalog()
+    if registry.loaded and catalog.loaded:
+        return
+
+    if load_snapshot(path):
+        if revalidate and (_revalidate_task is None or _revalidate_task.done()):
+            _revalidate_task = asyncio.get_running_loop().create_task(_revalidate())
+        return
+
+    await registry.ensure_loaded()
+    await catalog.ensure_fresh()
@@ -0,0 +1,240 @@
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+import os
+import time
+
+from constants import InstType, SymbolStatus
+from sqlalchemy import select
+
+from databases.mysql import ExchangeSymbol, get_session
+
+from .exchanges import get_exchange_registry
+
+__all__ = ["SymbolCatalog", "SymbolDiff", "diff_symbols", "get_symbol_catalog"]
+
+SymbolKey = tuple[int, int, str]  # (exchange_id, inst_type, symbol)
+
+# 一次同步最多下架在架交易对的比例（至少允许 DELIST_MIN_COUNT 个）；超过视为接口返回不完整，本轮不下架
+DELIST_MAX_RATIO = float(os.getenv("CLX_SYMBOL_DELIST_MAX_RATIO", "0.1"))
+DELIST_MIN_COUNT = int(os.getenv("CLX_SYMBOL_DELIST_MIN_COUNT", "5"))
+
+
+def _normalize(value):
+    """比较用：数值统一成 Decimal（"0.0100" == 0.01），其余转字符串"""
+    if value is None:
+        return None
+    try:
+        return Decimal(str(value)).normalize()
+    except InvalidOperation:
+        return str(value)
+
+
+@dataclass
+class SymbolDiff:
+    added: list[dict] = field(default_factory=list)
+    changed: list[dict] = field(default_factory=list)
+    delisted: list[ExchangeSymbol] = field(default_factory=list)
+    withheld: list[ExchangeSymbol] = field(default_factory=list)  # 疑似响应不完整，本轮未下架
+    unchanged: int = 0
+
+    def summary(self) -> str:
+        text = (
+            f"added={len(self.added)} changed={len(self.changed)} "
+            f"delisted={len(self.delisted)} unchanged={self.unchanged}"
+        )
+        return text + (f" withheld={len(self.withheld)}" if self.withheld else "")
+
+
+def diff_symbols(
+    current: Iterable[ExchangeSymbol],
+    fetched: list[dict],
+    fields: list[str],
+    max_delist_ratio: float = DELIST_MAX_RATIO,
+    min_delist_count: int = DELIST_MIN_COUNT,
+) -> SymbolDiff:
+    """
+    对比交易所返回的交易对与当前已入库状态：
+    - added：库中不存在
+    - changed：fields 中任一字段变化
+    - delisted：库中存在、交易所已不再返回、且状态不是 CLOSED
+    - withheld：缺失数量超过 max(min_delist_count, 在架数 × max_delist_ratio) 时，
+      视为接口截断 / 过滤条件变化，全部保留原状态不下架（下架会取消回补，误判代价大）
+    """
+    diff = SymbolDiff()
+    existing = {row.symbol: row for row in current}
+    seen = set()
+
+    for row in fetched:
+        seen.add(row["symbol"])
+        old = existing.get(row["symbol"])
+        if old is None:
+            diff.added.append(row)
+        elif any(_normalize(getattr(old, f)) != _normalize(row.get(f)) for f in fields):
+            diff.changed.append(row)
+        else:
+            diff.unchanged += 1
+
+    if fetched:
+        missing = [row for symbol, row in existing.items() if symbol not in seen and row.status != SymbolStatus.CLOSED]
+        listed = sum(1 for row in existing.values() if row.status != SymbolStatus.CLOSED)
+        if len(missing) > max(min_delist_count, listed * max_delist_ratio):
+            diff.withheld = missing
+        else:
+            diff.delisted = missing
+    return diff
+
+
+class SymbolCatalog:
+    """
+    进程内交易对目录：一次加载 exchange_symbol，按 (exchange, inst_type) / base / quote / status 建索引，
+    之后按 updated_at 增量刷新，flow 在内存中查询。
+    """
+
+    def __init__(self, max_age: float | None = None):
+        self.max_age = max_age if max_age is not None else float(os.getenv("SYMBOL_CATALOG_MAX_AGE", "300"))
+        self._symbols: dict[SymbolKey, ExchangeSymbol] = {}
+        self._by_market: dict[tuple[int, int], set[SymbolKey]] = defaultdict(set)
+        self._by_base: dict[str, set[SymbolKey]] = defaultdict(set)
+        self._by_quote: dict[str, set[SymbolKey]] = defaultdict(set)
+        self._by_status: dict[int | None, set[SymbolKey]] = defaultdict(set)
+        self.max_updated_at: datetime | None = None
+        self.refreshed_at: float | None = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.refreshed_at is not None
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+    # -----------------------------
+    # Index maintenance
+    # -----------------------------
+    @staticmethod
+    def _key(row: ExchangeSymbol) -> SymbolKey:
+        return row.exchange_id, int(row.inst_type), row.symbol
+
+    def _index(self, key: SymbolKey, row: ExchangeSymbol):
+        self._by_market[key[:2]].add(key)
+        self._by_base[row.base_asset].add(key)
+        self._by_quote[row.quote_asset].add(key)
+        self._by_status[row.status].add(key)
+
+    def _unindex(self, key: SymbolKey, row: ExchangeSymbol):
+        self._by_market[key[:2]].discard(key)
+        self._by_base[row.base_asset].discard(key)
+        self._by_quote[row.quote_asset].discard(key)
+        self._by_status[row.status].discard(key)
+
+    def apply(self, rows: Iterable[ExchangeSymbol]):
+        """写入 / 覆盖一批交易对（按主键去重）"""
+        for row in rows:
+            key = self._key(row)
+            old = self._symbols.get(key)
+            if old is not None:
+                self._unindex(key, old)
+            self._symbols[key] = row
+            self._index(key, row)
+            if row.updated_at and (self.max_updated_at is None or row.updated_at > self.max_updated_at):
+                self.max_updated_at = row.updated_at
+
+    def apply_values(self, values: Iterable[dict]):
+        """把刚写入 MySQL 的行同步到内存（保留未包含字段，如 created_at / onboard_time）"""
+        columns = {c.name for c in ExchangeSymbol.__table__.columns}
+        rows = []
+        for value in values:
+            old = self.get(value["exchange_id"], value["inst_type"], value["symbol"])
+            merged = {c: getattr(old, c) for c in columns} if old is not None else {}
+            merged.update({k: v for k, v in value.items() if k in columns})
+            rows.append(ExchangeSymbol(**merged))
+        self.apply(rows)
+
+    def clear(self):
+        self._symbols.clear()
+        for index in (self._by_market, self._by_base, self._by_quote, self._by_status):
+            index.clear()
+        self.max_updated_at = None
+
+    # -----------------------------
+    # Loading
+    # -----------------------------
+    async def refresh(self, full: bool = False) -> int:
+        """
+        增量刷新：只拉取 updated_at >= 上次最大值的行（同一秒内的更新也不会漏掉）
+        返回本次拉取的行数
+        """
+        stmt = select(ExchangeSymbol)
+        if full or self.max_updated_at is None:
+            full = True
+        else:
+            stmt = stmt.where(ExchangeSymbol.updated_at >= self.max_updated_at)
+
+        async with get_session() as session:
+            rows = (await session.execute(stmt)).scalars().all()
+
+        if full:
+            self.clear()
+        self.apply(rows)
+        self.refreshed_at = time.time()
+        return len(rows)
+
+    async def ensure_fresh(self):
+        # 查询按 exchange_id 索引，交易所注册表与 catalog 一起保证已加载
+        await get_exchange_registry().ensure_loaded()
+        if not self.loaded:
+            await self.refresh(full=True)
+        elif time.time() - self.refreshed_at > self.max_age:
+            await self.refresh()
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+    def get(self, exchange_id: int, inst_type: InstType | int, symbol: str) -> ExchangeSymbol | None:
+        return self._symbols.get((exchange_id, int(inst_type), symbol))
+
+    def market(self, exchange_id: int, inst_type: InstType | int) -> list[ExchangeSymbol]:
+        return [self._symbols[k] for k in self._by_market.get((exchange_id, int(inst_type)), ())]
+
+    def query(
+        self,
+        exchange: str | None = None,
+        inst_type: InstType | int | None = None,
+        base_assets: Iterable[str] | None = None,
+        quote_asset: str | None = None,
+        status: Iterable[SymbolStatus] | SymbolStatus | None = None,
+    ) -> list[ExchangeSymbol]:
+        candidates: list[set[SymbolKey]] = []
+
+        if exchange is not None:
+            exchange_id = get_exchange_registry().id_of(exchange)
+            if inst_type is not None:
+                candidates.append(self._by_market.get((exchange_id, int(inst_type)), set()))
+            else:
+                candidates.append({k for k in self._symbols if k[0] == exchange_id})
+        elif inst_type is not None:
+            candidates.append({k for k in self._symbols if k[1] == int(inst_type)})
+
+        if base_assets is not None:
+            candidates.append(set().union(*(self._by_base.get(b, set()) for b in base_assets)))
+        if quote_asset is not None:
+            candidates.append(self._by_quote.get(quote_asset, set()))
+        if status is not None:
+            statuses = [status] if isinstance(status, int) else status
+            candidates.append(set().union(*(self._by_status.get(int(s), set()) for s in statuses)))
+
+        if not candidates:
+            keys = set(self._symbols)
+        else:
+            candidates.sort(key=len)
+            keys = candidates[0].intersection(*candidates[1:])
+
+        return [self._symbols[k] for k in sorted(keys)]
+
+
+@lru_cache
+def get_symbol_catalog() -> SymbolCatalog:
+    return SymbolCatalog()
@@ -0,0 +1,107 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+import os
+import time
+import traceback
+
+from utils.logger import logger as _logger
+
+__all__ = ["Deadline", "DeadlineReport", "run_until_deadline"]
+
+# 提前多少秒收尾，给写入 Doris / 上报留时间
+DEADLINE_MARGIN = float(os.getenv("CLX_DEADLINE_MARGIN", "10"))
+
+
+@dataclass(frozen=True)
+class Deadline:
+    """按调度时间槽计算的截止时间（unix 秒），可直接作为 Prefect task 参数传递"""
+
+    at: float
+
+    @classmethod
+    def after(cls, seconds: float) -> "Deadline":
+        return cls(time.time() + seconds)
+
+    @classmethod
+    def slot(cls, period: float, margin: float = DEADLINE_MARGIN, now: float | None = None) -> "Deadline":
+        """固定周期任务（如每 5 分钟）：截止到当前时间槽结束"""
+        now = time.time() if now is None else now
+        return cls((now // period + 1) * period - margin)
+
+    @classmethod
+    def next_minute(
+        cls, minutes: Iterable[int], second: int = 0, margin: float = DEADLINE_MARGIN, now: float | None = None
+    ) -> "Deadline":
+        """cron 分钟列表（如资金费率 0,1,5,30）：截止到下一次触发"""
+        current = datetime.fromtimestamp(time.time() if now is None else now)
+        base = current.replace(minute=0, second=second, microsecond=0)
+        fires = sorted(base + timedelta(hours=h, minutes=m) for h in (0, 1) for m in minutes)
+        nxt = next(f for f in fires if f > current)
+        return cls(nxt.timestamp() - margin)
+
+    def remaining(self) -> float:
+        return self.at - time.time()
+
+    def expired(self, reserve: float = 0.0) -> bool:
+        return self.remaining() <= reserve
+
+
+@dataclass
+class DeadlineReport:
+    name: str
+    done: list = field(default_factory=list)
+    failed: list = field(default_factory=list)
+    skipped: list = field(default_factory=list)
+
+    def summary(self) -> str:
+        return f"{self.name}: done={len(self.done)} failed={len(self.failed)} skipped={len(self.skipped)}"
+
+
+async def run_until_deadline(
+    name: str,
+    units: list,
+    worker: Callable[[object], Awaitable],
+    deadline: Deadline,
+    logger=None,
+    spread: float = 0.0,
+) -> DeadlineReport:
+    """
+    按 units 顺序（调用方已按优先级排好）逐个执行，
+    剩余时间不够再跑一个单元（按已完成单元的平均耗时估算）时停止，剩余单元记为 skipped 并上报。
+    时间槽型数据下一轮会重新拉取最新值，宁可按时拿到重要交易对，也不要完整但过期的数据。
+    spread > 0 时把各单元的启动时间均匀铺开到 spread 秒内（不超过截止时间），避免槽开始时集中请求。
+    """
+    logger = logger or _logger
+    report = DeadlineReport(name)
+    elapsed = 0.0
+    begin = time.time()
+    step = min(spread, max(deadline.remaining(), 0)) / len(units) if units and spread > 0 else 0.0
+
+    for i, unit in enumerate(units):
+        if step:
+            delay = begin + i * step - time.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+        estimate = elapsed / len(report.done + report.failed) if i else 0.0
+        if deadline.expired(reserve=estimate):
+            report.skipped = list(units[i:])
+            break
+
+        start = time.time()
+        try:
+            await worker(unit)
+            report.done.append(unit)
+        except Exception as e:
+            logger.error(f"[{name}] Failed {unit}: {e}")
+            traceback.print_exc()
+            report.failed.append(unit)
+        elapsed += time.time() - start
+
+    if report.skipped:
+        unfinished = [getattr(u, "symbol", u) for u in report.skipped]
+        logger.warning(f"[{name}] Deadline reached, unfinished: {unfinished}")
+    logger.info(report.summary())
+    return report
@@ -2,6 +2,8 @@ import aiohttp
 from aiohttp import ClientTimeout
 
 session: aiohttp.ClientSession | None = None
+# SOCKS 代理需要独立的 connector，每个代理一个 session
+proxy_sessions: dict[str, aiohttp.ClientSession] = {}
 
 DEFAULT_API_HEADERS = {
     "Accept": "application/json",
@@ -22,6 +24,31 @@ async def get_session():
     return session
 
 
+async def get_session_for(proxy) -> tuple[aiohttp.ClientSession, str | None]:
+    """
+    按出口返回 (session, 请求时传入的 proxy 参数)：
+    直连 / HTTP 代理共用默认 session；SOCKS 代理使用 aiohttp-socks 的独立 connector
+    """
+    if proxy is None or proxy.url is None:
+        return await get_session(), None
+    if not proxy.is_socks:
+        return await get_session(), proxy.url
+
+    s = proxy_sessions.get(proxy.url)
+    if s is None or s.closed:
+        try:
+            from aiohttp_socks import ProxyConnector
+        except ImportError as e:
+            raise ImportError('SOCKS egress requires: pip install "clx-etl[socks]"') from e
+        s = proxy_sessions[proxy.url] = aiohttp.ClientSession(
+            connector=ProxyConnector.from_url(proxy.url),
+            timeout=ClientTimeout(total=15),
+            headers=DEFAULT_API_HEADERS,
+            raise_for_status=False,
+        )
+    return s, None
+
+
 async def http_get(url, **kwargs):
     session = await get_session()
     async with session.get(url, **kwargs) as resp:
@@ -32,3 +59,6 @@ async def shutdown():
     global session
     if session:
         await session.close()
+    for s in proxy_sessions.values():
+        await s.close()
+    proxy_sessions.clear()
@@ -0,0 +1,135 @@
+import asyncio
+from collections import Counter
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+import os
+import threading
+
+__all__ = [
+    "LANE_CEILING",
+    "Lane",
+    "LaneGate",
+    "current_lane",
+    "demote_lane",
+    "lane_ceiling",
+    "use_lane",
+    "wake_waiters",
+]
+
+
+class Lane(IntEnum):
+    """请求优先级通道，数值越小优先级越高"""
+
+    LIVE = 0  # 分钟级实时轮询（多空比、资金费率等）
+    CATCH_UP = 1  # 定时增量补齐（sync_klines）
+    BACKFILL = 2  # 历史回补（新上架、大区间缺口）
+
+
+# 各通道最多可使用的额度比例：实时通道独占剩余部分，回补只能用到总额度的一半
+LANE_CEILING = {
+    Lane.LIVE: 1.0,
+    Lane.CATCH_UP: float(os.getenv("CLX_LANE_CEILING_CATCH_UP", "0.8")),
+    Lane.BACKFILL: float(os.getenv("CLX_LANE_CEILING_BACKFILL", "0.5")),
+}
+
+_current_lane: ContextVar[Lane] = ContextVar("clx_lane", default=Lane.LIVE)
+
+
+def current_lane() -> Lane:
+    return _current_lane.get()
+
+
+@contextmanager
+def use_lane(lane: Lane | None = None):
+    """
+    在当前上下文内切换通道，退出时恢复；期间创建的 asyncio task 继承该通道。
+    不传 lane 时只建立恢复点，配合 demote_lane 在中途降级。
+    """
+    token = _current_lane.set(current_lane() if lane is None else lane)
+    try:
+        yield
+    finally:
+        _current_lane.reset(token)
+
+
+def demote_lane(lane: Lane):
+    """只降不升：例如增量任务发现缺口很大时转为回补通道，需在 use_lane 范围内调用"""
+    if lane > current_lane():
+        _current_lane.set(lane)
+
+
+def lane_ceiling(total: int, lane: Lane) -> int:
+    return max(1, int(total * LANE_CEILING[lane]))
+
+
+class LaneGate:
+    """
+    按通道限制并发槽位（如 Doris StreamLoad 并发）：
+    低优先级通道只能占用 ceiling 以内的槽位，且有更高优先级在等待时让出。
+    等待者挂在 future 上，槽位释放 / 等待者离开时唤醒重新检查，不轮询；
+    StreamLoader 是进程级单例，会被 prefect 工作线程里的不同事件循环共用，状态加锁、跨循环唤醒
+    """
+
+    def __init__(self, slots: int):
+        self.slots = slots
+        self.inflight = 0
+        self.waiting = Counter()
+        self._lock = threading.Lock()
+        self._waiters: set[asyncio.Future] = set()
+
+    def _higher_waiting(self, lane: Lane) -> bool:
+        return any(self.waiting[lane_] for lane_ in Lane if lane_ < lane)
+
+    def _notify_all(self):
+        """在持有锁时调用"""
+        wake_waiters(self._waiters)
+
+    @asynccontextmanager
+    async def slot(self, lane: Lane | None = None):
+        lane = current_lane() if lane is None else lane
+        ceiling = lane_ceiling(self.slots, lane)
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            self.waiting[lane] += 1
+        try:
+            while True:
+                with self._lock:
+                    if self.inflight < ceiling and not self._higher_waiting(lane):
+                        self.inflight += 1
+                        break
+                    fut = loop.create_future()
+                    self._waiters.add(fut)
+                try:
+                    await fut
+                finally:
+                    with self._lock:
+                        self._waiters.discard(fut)
+        finally:
+            with self._lock:
+                self.waiting[lane] -= 1
+                # 高优先级等待者离开（拿到槽位或被取消）后，低优先级可能可以继续
+                self._notify_all()
+
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.inflight -= 1
+                self._notify_all()
+
+
+def wake_waiters(waiters: set[asyncio.Future]):
+    """跨事件循环唤醒等待者（调用方持有保护 waiters 的 threading.Lock）"""
+    for fut in waiters:
+        try:
+            fut.get_loop().call_soon_threadsafe(_wake, fut)
+        except RuntimeError:
+            # 等待者所在的事件循环已关闭
+            pass
+
+
+def _wake(fut: asyncio.Future):
+    if not fut.done():
+        fut.set_result(None)
@@ -1,3 +1,5 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
 import logging
 from logging.handlers import TimedRotatingFileHandler
 import os
@@ -144,3 +146,20 @@ def setup_logging():
 
 
 logger = setup_logging()
+
+# 当前调用方的 job_id：池化客户端跨 flow 共享，日志按调用方上下文绑定（见 BaseClient.logger）
+_current_job: ContextVar[str | None] = ContextVar("clx_job_id", default=None)
+
+
+def current_job() -> str | None:
+    return _current_job.get()
+
+
+@contextmanager
+def use_job(job_id: str):
+    """在当前上下文内设置 job_id，退出时恢复；期间创建的 asyncio task / Prefect task 继承"""
+    token = _current_job.set(job_id)
+    try:
+        yield
+    finally:
+        _current_job.reset(token)
@@ -0,0 +1,56 @@
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import json
+import multiprocessing
+import os
+
+from utils.logger import logger as _logger
+
+__all__ = ["OFFLOAD_MIN_BYTES", "offload", "parse_and_transform", "shutdown_process_pool"]
+
+# 响应体达到该字节数时，JSON 解析与转换放到进程池，避免阻塞事件循环上其他请求
+OFFLOAD_MIN_BYTES = int(os.getenv("CLX_OFFLOAD_MIN_BYTES", str(256 * 1024)))
+# 进程池大小，默认留一个核给事件循环；0 表示全部在当前进程内执行
+OFFLOAD_WORKERS = int(os.getenv("CLX_OFFLOAD_WORKERS", str(max(1, (os.cpu_count() or 1) - 1))))
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def parse_and_transform(body: bytes, transform: Callable | None = None, args: tuple = ()):
+    """
+    在子进程中执行：解析 JSON 并转换为入库行。
+    transform 必须是模块级函数（按引用 pickle），签名为 transform(data, *args)
+    """
+    data = json.loads(body)
+    return transform(data, *args) if transform is not None else data
+
+
+def _get_pool() -> ProcessPoolExecutor | None:
+    global _pool
+    if _pool is None and OFFLOAD_WORKERS > 0:
+        # spawn：父进程已有事件循环与线程，fork 出的子进程可能继承到被持有的锁
+        _pool = ProcessPoolExecutor(OFFLOAD_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+async def offload(body: bytes, transform: Callable | None = None, *args):
+    """小响应体直接在当前进程解析；大响应体发到进程池，进程池异常时回退到本地执行"""
+    pool = _get_pool() if len(body) >= OFFLOAD_MIN_BYTES else None
+    if pool is None:
+        return parse_and_transform(body, transform, args)
+
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, parse_and_transform, body, transform, args)
+    except BrokenProcessPool as e:
+        _logger.warning(f"Process pool broken, parsing inline: {e}")
+        shutdown_process_pool()
+        return parse_and_transform(body, transform, args)
+
+
+def shutdown_process_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
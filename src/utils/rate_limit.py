@@ -0,0 +1,237 @@
+import asyncio
+from collections import Counter
+from functools import lru_cache
+import math
+import os
+import threading
+import time
+
+from utils.lanes import Lane, current_lane, lane_ceiling, wake_waiters
+from utils.logger import logger as _logger
+
+__all__ = [
+    "LocalTokenStore",
+    "MySQLTokenStore",
+    "RateLimiter",
+    "RedisTokenStore",
+    "get_rate_limiter",
+    "get_token_store",
+]
+
+logger = _logger.bind(job_id="RATE_LIMIT")
+
+# 共享存储不可用时每个进程只使用总额度的这一比例（按共享同一出口额度的 worker 数设置，如 4 个 → 0.25），
+# 避免 N 个 worker 各自按全额请求导致 N 倍超限
+FALLBACK_SHARE = float(os.getenv("CLX_RATE_LIMIT_FALLBACK_SHARE", "0.25"))
+
+
+class LocalTokenStore:
+    """
+    进程内额度存储（单机 / 测试用），与共享存储接口一致：
+    lease(key, window_start, limit, n) → 本窗口实际发放的额度（0..n）
+    """
+
+    def __init__(self):
+        self._used: dict[str, tuple[int, int]] = {}  # key → (window_start, used)
+
+    async def lease(self, key: str, window_start: int, limit: int, n: int) -> int:
+        start, used = self._used.get(key, (window_start, 0))
+        if start != window_start:
+            used = 0
+        granted = max(0, min(n, limit - used))
+        self._used[key] = (window_start, used + granted)
+        return granted
+
+
+class MySQLTokenStore:
+    """
+    集群共享额度：rate_limit_window 表按 (key, window_start) 计数，行锁内原子发放
+    """
+
+    def __init__(self):
+        self._table_ready = False
+        self._windows: dict[str, int] = {}
+
+    async def lease(self, key: str, window_start: int, limit: int, n: int) -> int:
+        from sqlalchemy import delete, select, update
+        from sqlalchemy.dialects.mysql import insert
+
+        from databases.mysql import RateLimitWindow, async_engine, ensure_tables
+
+        if not self._table_ready:
+            await ensure_tables(RateLimitWindow)
+            self._table_ready = True
+
+        async with async_engine.begin() as conn:
+            stmt = insert(RateLimitWindow).values(key=key, window_start=window_start, used=0)
+            await conn.execute(stmt.on_duplicate_key_update(used=RateLimitWindow.used))
+            if self._windows.get(key) != window_start:
+                # 本进程进入新窗口时顺带清理该 key 的历史窗口
+                self._windows[key] = window_start
+                await conn.execute(
+                    delete(RateLimitWindow).where(
+                        RateLimitWindow.key == key, RateLimitWindow.window_start < window_start
+                    )
+                )
+
+            used = (
+                await conn.execute(
+                    select(RateLimitWindow.used)
+                    .where(RateLimitWindow.key == key, RateLimitWindow.window_start == window_start)
+                    .with_for_update()
+                )
+            ).scalar_one()
+            granted = max(0, min(n, limit - used))
+            if granted:
+                await conn.execute(
+                    update(RateLimitWindow)
+                    .where(RateLimitWindow.key == key, RateLimitWindow.window_start == window_start)
+                    .values(used=RateLimitWindow.used + granted)
+                )
+        return granted
+
+
+class RedisTokenStore:
+    """
+    Redis 兼容存储（INCRBY + EXPIRE），需要可选依赖 redis
+    """
+
+    def __init__(self, url: str):
+        try:
+            from redis.asyncio import from_url
+        except ImportError as e:
+            raise ImportError("Redis token store requires: pip install redis") from e
+        self._redis = from_url(url)
+
+    async def lease(self, key: str, window_start: int, limit: int, n: int) -> int:
+        name = f"clx:rl:{key}:{window_start}"
+        async with self._redis.pipeline(transaction=True) as pipe:
+            used, _ = await pipe.incrby(name, n).expire(name, 3600).execute()
+        # 超出部分不回退，只按本次 incr 前的余量发放
+        return max(0, min(n, limit - (used - n)))
+
+
+@lru_cache
+def get_token_store():
+    """
+    CLX_RATE_LIMIT_STORE=local（默认，进程内）| mysql | redis（CLX_REDIS_URL）
+    """
+    kind = os.getenv("CLX_RATE_LIMIT_STORE", "local")
+    if kind == "mysql":
+        return MySQLTokenStore()
+    if kind == "redis":
+        return RedisTokenStore(os.getenv("CLX_REDIS_URL", "redis://127.0.0.1:6379/0"))
+    return LocalTokenStore()
+
+
+class RateLimiter:
+    """
+    固定窗口限流（limit 权重 / window 秒）。
+    共享存储时按批次租用额度（batch），本地扣减，用完再租，跨节点协调不会每个请求多一次往返；
+    批次按窗口剩余时间缩小，窗口切换时作废的已租额度不会明显挤占其他节点。
+    共享存储不可用时退化为进程内额度（总额度 × FALLBACK_SHARE），不阻塞请求。
+    按优先级通道（utils.lanes）划分：低优先级通道只能把窗口总用量租到各自 ceiling 为止，
+    且有更高优先级请求在等待时让出（挂在 future 上，高优先级请求离开时唤醒，不轮询），回补只消耗空闲额度。
+    """
+
+    def __init__(self, key: str, limit: int, window: float, store=None, batch: int | None = None):
+        self.key = key
+        self.limit = limit
+        self.window = window
+        self.store = store or get_token_store()
+        self.batch = batch or max(1, limit // int(os.getenv("CLX_RATE_LIMIT_BATCH_DIV", "20")))
+        self._fallback = LocalTokenStore()
+        self._window_start: int | None = None
+        self._tokens = Counter()  # lane → 本窗口已租未用的额度
+        self._exhausted: set[Lane] = set()
+        self._waiting = Counter()
+        # 各通道等待计数和让出中的低优先级等待者，跨线程事件循环共享，与 LaneGate 一样加锁、跨循环唤醒
+        self._lock = threading.Lock()
+        self._waiters: set[asyncio.Future] = set()
+
+    def _current_window(self, now: float) -> int:
+        return int(now // self.window * self.window)
+
+    def _batch_size(self, now: float, window_start: int, ceiling: int) -> int:
+        """剩余时间占窗口的比例 × 批次：临近窗口结束时只租大致用得完的量"""
+        remaining = max(window_start + self.window - now, 0.0) / self.window
+        return max(1, math.ceil(min(self.batch, ceiling) * remaining))
+
+    async def _lease(self, window_start: int, ceiling: int, n: int) -> int:
+        try:
+            return await self.store.lease(self.key, window_start, ceiling, n)
+        except Exception as e:
+            fallback = max(1, int(ceiling * FALLBACK_SHARE))
+            logger.warning(f"Token store unavailable for {self.key}, using local budget {fallback}: {e}")
+            return await self._fallback.lease(self.key, window_start, fallback, n)
+
+    def _higher_waiting(self, lane: Lane) -> bool:
+        return any(self._waiting[lane_] for lane_ in Lane if lane_ < lane)
+
+    async def acquire(self, cost: int = 1, lane: Lane | None = None):
+        """
+        额度扣减不加锁：并发协程最多多租一个批次，总量仍由存储端按窗口封顶
+        （Prefect task 可能运行在不同线程的事件循环中，asyncio.Lock 不能跨循环共享）
+        """
+        lane = current_lane() if lane is None else lane
+        ceiling = lane_ceiling(self.limit, lane)
+        cost = min(cost, ceiling)
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            self._waiting[lane] += 1
+        try:
+            while True:
+                now = time.time()
+                window_start = self._current_window(now)
+                if window_start != self._window_start:
+                    # 新窗口：上一窗口剩余的租用额度作废
+                    self._window_start = window_start
+                    self._tokens.clear()
+                    self._exhausted.clear()
+
+                with self._lock:
+                    fut = None
+                    if self._higher_waiting(lane):
+                        fut = loop.create_future()
+                        self._waiters.add(fut)
+                if fut is not None:
+                    try:
+                        await fut
+                    finally:
+                        with self._lock:
+                            self._waiters.discard(fut)
+                    continue
+
+                if self._tokens[lane] >= cost:
+                    self._tokens[lane] -= cost
+                    return
+
+                if lane not in self._exhausted:
+                    want = max(self._batch_size(now, window_start, ceiling), cost - self._tokens[lane])
+                    granted = await self._lease(window_start, ceiling, want)
+                    if window_start == self._window_start:
+                        self._tokens[lane] += granted
+                        if granted < want:
+                            self._exhausted.add(lane)
+                    continue
+
+                wait = window_start + self.window - now
+                logger.debug(f"Rate limit {self.key} exhausted for {lane.name}, waiting {wait:.2f}s")
+                await asyncio.sleep(max(wait, 0.01))
+        finally:
+            with self._lock:
+                self._waiting[lane] -= 1
+                # 高优先级请求离开（拿到额度或被取消）后，让出中的低优先级请求重新检查
+                wake_waiters(self._waiters)
+
+
+_limiters: dict[str, RateLimiter] = {}
+
+
+def get_rate_limiter(key: str, limit: int, window: float) -> RateLimiter:
+    """同一 key 在进程内共享一个 limiter（spot / perp 客户端共用同一出口 IP 额度时）"""
+    limiter = _limiters.get(key)
+    if limiter is None:
+        limiter = _limiters[key] = RateLimiter(key, limit, window)
+    return limiter
@@ -0,0 +1,43 @@
+import asyncio
+from collections.abc import Callable, Coroutine
+import os
+
+__all__ = ["EVENT_LOOP", "install_event_loop", "loop_factory", "run"]
+
+# auto：已安装 uvloop 时使用；uvloop：必须使用（未安装直接报错）；asyncio：标准事件循环
+EVENT_LOOP = os.getenv("CLX_EVENT_LOOP", "auto").lower()
+
+
+def loop_factory(kind: str | None = None) -> Callable[[], asyncio.AbstractEventLoop] | None:
+    """返回事件循环工厂，None 表示使用 asyncio 默认循环"""
+    kind = (kind or EVENT_LOOP).lower()
+    if kind == "asyncio":
+        return None
+    try:
+        import uvloop
+    except ImportError as e:
+        if kind == "uvloop":
+            raise ImportError('CLX_EVENT_LOOP=uvloop requires: pip install "clx-etl[uvloop]"') from e
+        return None
+    return uvloop.new_event_loop
+
+
+def install_event_loop(kind: str | None = None) -> str:
+    """
+    设置全局事件循环策略，之后 asyncio.run / Prefect 引擎创建的循环都使用该实现。
+    Prefect 部署的 flow 进程不经过 run()，在导入 flows 包时调用。
+    """
+    factory = loop_factory(kind)
+    if factory is None:
+        return "asyncio"
+
+    import uvloop
+
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return "uvloop"
+
+
+def run(main: Coroutine):
+    """所有 __main__ 入口统一使用，代替 asyncio.run"""
+    install_event_loop()
+    return asyncio.run(main)
@@ -0,0 +1,68 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Iterable
+import hashlib
+import time
+
+__all__ = ["JOB_OFFSET_WINDOW", "BurstPlanner", "sleep_until", "stable_offset", "stagger_seconds"]
+
+# 整点 / 整分同时触发的 job 错开的窗口（秒）
+JOB_OFFSET_WINDOW = 10
+
+
+def stable_offset(key: str, window: float) -> float:
+    """key → [0, window) 内的固定偏移：同一 job / 交易所每次部署、每个副本都落在同一位置"""
+    if window <= 0:
+        return 0.0
+    h = int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+    return (h % 10_000) / 10_000 * window
+
+
+def stagger_seconds(seconds: Iterable[int], key: str, window: int) -> list[int]:
+    """
+    秒级 cron 的整秒偏移（只往后推，数据就绪时间不变）：
+    [5, 30] + key 偏移 3 → [8, 33]，超出 59 的截断到 59
+    """
+    offset = int(stable_offset(key, window))
+    return sorted({min(s + offset, 59) for s in seconds})
+
+
+async def sleep_until(ts: float | None):
+    if ts is not None and ts > time.time():
+        await asyncio.sleep(ts - time.time())
+
+
+class BurstPlanner:
+    """
+    把一个时间槽内的请求分散到 [earliest, earliest + window) 内，而不是在槽开始的同一秒全部发出：
+    - offsets(keys)：按 key 哈希排序后均匀分配偏移，结果确定（多副本 / 多次运行一致）
+    - run(items, worker)：每个 item 在各自偏移时刻启动，并发执行
+    earliest 表示数据就绪所需的等待（如交易所在整点后几秒才生成上一周期数据）。
+    """
+
+    def __init__(self, window: float, earliest: float = 0.0, start: float | None = None):
+        self.window = window
+        self.earliest = earliest
+        self.start = time.time() if start is None else start
+
+    def offsets(self, keys: Iterable[str]) -> dict[str, float]:
+        keys = sorted(set(keys), key=lambda k: stable_offset(k, 1))
+        if not keys:
+            return {}
+        step = self.window / len(keys)
+        return {k: self.earliest + i * step for i, k in enumerate(keys)}
+
+    def start_times(self, keys: Iterable[str]) -> dict[str, float]:
+        """offsets 对应的绝对时间（unix 秒），可作为 Prefect task 参数传递"""
+        return {k: self.start + offset for k, offset in self.offsets(keys).items()}
+
+    async def wait(self, offset: float):
+        await sleep_until(self.start + offset)
+
+    async def run(self, items: list, worker: Callable[[object], Awaitable], key: Callable[[object], str] = str):
+        offsets = self.offsets(key(i) for i in items)
+
+        async def _run(item):
+            await self.wait(offsets[key(item)])
+            return await worker(item)
+
+        return await asyncio.gather(*(_run(i) for i in items), return_exceptions=True)
@@ -0,0 +1,87 @@
+"""测试用的内存版 job_lease / worker_member"""
+
+import asyncio
+import time
+from typing import ClassVar
+
+from cluster import Lease
+
+
+class MemoryLease(Lease):
+    """job_lease 表的内存版本：同样的 token 自增与按 token 条件续约"""
+
+    table: ClassVar[dict[str, tuple[str, int, float]]] = {}
+
+    async def acquire(self) -> bool:
+        now = time.monotonic()
+        _, token, expires = self.table.get(self.name, ("", 0, 0.0))
+        if expires > now:
+            return False
+        self.token = token + 1
+        self.table[self.name] = (self.owner, self.token, now + self.ttl)
+        self._valid_until = now + self.ttl
+        self._task = asyncio.get_running_loop().create_task(self._renew_loop())
+        return True
+
+    async def renew(self) -> bool:
+        now = time.monotonic()
+        owner, token, _ = self.table.get(self.name, ("", 0, 0.0))
+        if (owner, token) != (self.owner, self.token):
+            return False
+        self.table[self.name] = (owner, token, now + self.ttl)
+        self._valid_until = now + self.ttl
+        return True
+
+    async def release(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self.table.get(self.name, ("", 0, 0.0))[:2] == (self.owner, self.token):
+            self.table[self.name] = (self.owner, self.token, 0.0)
+
+
+class MemoryMembership:
+    def __init__(self, worker_id: str, ttl: int = 30, alive: set[str] | None = None):
+        self.worker_id = worker_id
+        self.ttl = ttl
+        # 多个成员共用同一个 alive 集合即模拟同一张成员表
+        self.alive: set[str] = set() if alive is None else alive
+
+    async def heartbeat(self):
+        self.alive.add(self.worker_id)
+
+    async def members(self) -> list[str]:
+        return sorted(self.alive)
+
+    async def leave(self):
+        self.alive.discard(self.worker_id)
+
+
+class MemoryListingQueue:
+    """kline_backfill_queue 表的内存版本"""
+
+    def __init__(self):
+        self.rows: dict[tuple[str, str, str], int] = {}  # unit → attempts
+
+    async def put(self, units):
+        for unit in units:
+            self.rows.setdefault(tuple(unit), 0)
+
+    async def discard(self, client_name, symbol):
+        for unit in [u for u in self.rows if u[:2] == (client_name, symbol)]:
+            del self.rows[unit]
+
+    async def any(self) -> bool:
+        return bool(self.rows)
+
+    async def pending(self, limit: int = 1000):
+        return list(self.rows)[:limit]
+
+    async def done(self, units):
+        for unit in units:
+            self.rows.pop(tuple(unit), None)
+
+    async def failed(self, units):
+        for unit in units:
+            if tuple(unit) in self.rows:
+                self.rows[tuple(unit)] += 1
@@ -0,0 +1,43 @@
+import asyncio
+
+from exchanges._base_ import BaseClient
+from utils.logger import current_job, use_job
+
+
+class BoundLogger:
+    def __init__(self, **extra):
+        self.extra = extra
+
+    def bind(self, **extra):
+        return BoundLogger(**{**self.extra, **extra})
+
+
+class PooledClient:
+    """共享同一个客户端实例，只借用 BaseClient.logger 的按上下文绑定"""
+
+    logger = BaseClient.logger
+
+    def __init__(self):
+        self.logger = BoundLogger(job_id="CLIENT_POOL", exchange="binance")
+
+
+def test_logger_binds_job_of_each_call_site():
+    client = PooledClient()
+    seen = {}
+
+    async def call_site(job_id: str):
+        with use_job(job_id):
+            await asyncio.sleep(0)
+            # 子 task 继承调用方的 job 上下文
+            seen[job_id] = await asyncio.create_task(asyncio.sleep(0, client.logger.extra["job_id"]))
+
+    async def main():
+        await asyncio.gather(call_site("KLINE[1m]"), call_site("SYMBOLS-binance_perp"))
+
+    asyncio.run(main())
+    assert seen == {"KLINE[1m]": "KLINE[1m]", "SYMBOLS-binance_perp": "SYMBOLS-binance_perp"}
+    assert client.logger.extra == {"job_id": "CLIENT_POOL", "exchange": "binance"}
+    assert current_job() is None
+    # 同一 job 复用已绑定的 logger
+    with use_job("KLINE[1m]"):
+        assert client.logger is client.logger
@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from databases.doris import DorisStreamLoader, StreamLoadError, StreamLoadOutcome
+
+
+@pytest.fixture
+def loader(monkeypatch):
+    monkeypatch.setenv("DORIS_HOST", "127.0.0.1")
+    monkeypatch.setenv("DORIS_USER", "root")
+    monkeypatch.delenv("DORIS_SPOOL_DIR", raising=False)
+    return DorisStreamLoader()
+
+
+def test_bulk_stats_count_spooled_chunks_separately(loader):
+    async def send_rows(rows, table, column_names=None, **kwargs):
+        # 第二个分区的写入落盘
+        status = "spooled" if rows[0]["dt"].startswith("2025-01-02") else "success"
+        return StreamLoadOutcome(table=table, label=rows[0]["dt"], status=status, attempts=1, rows=len(rows))
+
+    loader.send_rows = send_rows
+    rows = [{"dt": f"2025-01-0{d} 00:0{i}:00", "v": i} for d in (1, 2, 3) for i in range(3)]
+
+    stats = asyncio.run(loader.send_rows_partitioned(rows, "kline_1m", max_rows=10))
+    assert (stats.loads, stats.rows) == (2, 6)
+    assert (stats.spooled, stats.spooled_rows) == (1, 3)
+
+
+class FakeResponse:
+    def __init__(self, status: int):
+        self.status = status
+
+
+def respond(loader, status: int, result: dict | None = None):
+    calls = []
+
+    async def send(url, data, headers, auth):
+        calls.append(url)
+        return FakeResponse(status), result or {"Status": "Fail", "Message": "error"}
+
+    loader._send_streamload_request_async = send
+    loader.retry_backoff = 0
+    return calls
+
+
+@pytest.mark.parametrize("status", [400, 401, 403, 404])
+def test_client_errors_are_fatal(loader, status):
+    calls = respond(loader, status)
+    with pytest.raises(StreamLoadError) as e:
+        asyncio.run(loader.load("kline_1m", b"1", ["a"], "label", retries=3))
+    assert not e.value.retryable
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize("status", [408, 429, 500, 503])
+def test_timeouts_throttling_and_server_errors_are_retried(loader, status):
+    calls = respond(loader, status)
+    with pytest.raises(StreamLoadError) as e:
+        asyncio.run(loader.load("kline_1m", b"1", ["a"], "label", retries=3))
+    assert e.value.retryable
+    assert len(calls) == 3
+
+
+def test_non_json_client_error_is_fatal(loader):
+    calls = []
+
+    async def send(url, data, headers, auth):
+        calls.append(url)
+        raise StreamLoadError("StreamLoad response not JSON (HTTP 401): <html>", retryable=False)
+
+    loader._send_streamload_request_async = send
+    with pytest.raises(StreamLoadError) as e:
+        asyncio.run(loader.load("kline_1m", b"1", ["a"], "label", retries=3))
+    assert not e.value.retryable
+    assert len(calls) == 1
+
+
+def test_zero_retries_still_attempts_once(loader):
+    calls = respond(loader, 200, {"Status": "Success", "NumberLoadedRows": 1})
+    outcome = asyncio.run(loader.load("kline_1m", b"1", ["a"], "label", retries=0))
+    assert outcome.status == "success"
+    assert len(calls) == 1
+
+    calls = respond(loader, 503)
+    with pytest.raises(StreamLoadError):
+        asyncio.run(loader.load("kline_1m", b"1", ["a"], "label", retries=0))
+    assert len(calls) == 1
+
+
+def test_retries_rotate_backends(monkeypatch):
+    monkeypatch.setenv("DORIS_HOST", "127.0.0.1")
+    monkeypatch.setenv("DORIS_USER", "root")
+    monkeypatch.setenv("DORIS_BE_HOSTS", "be1:8040,be2:8040")
+    monkeypatch.delenv("DORIS_SPOOL_DIR", raising=False)
+    loader = DorisStreamLoader()
+
+    calls = respond(loader, 503)
+    with pytest.raises(StreamLoadError):
+        asyncio.run(loader.load("kline_1m", b"1", ["a"], "label", retries=3))
+    assert [url.split("/")[2] for url in calls] == ["be1:8040", "be2:8040", "be1:8040"]
@@ -0,0 +1,30 @@
+import asyncio
+
+import pytest
+
+from metadata.exchanges import ExchangeEntry, ExchangeRegistry
+
+
+def test_lookup_before_load_raises_instead_of_blocking(monkeypatch):
+    registry = ExchangeRegistry()
+    monkeypatch.setattr(registry, "refresh_sync", lambda: pytest.fail("must not fall back to a blocking query"))
+
+    with pytest.raises(RuntimeError, match="ensure_loaded"):
+        registry.id_of("binance")
+    with pytest.raises(RuntimeError):
+        registry.get_by_id(1)
+
+
+def test_ensure_loaded_then_lookup(monkeypatch):
+    registry = ExchangeRegistry()
+
+    async def refresh():
+        registry.load_entries([ExchangeEntry(id=1, name="binance", venue_type=0)])
+
+    monkeypatch.setattr(registry, "refresh", refresh)
+    asyncio.run(registry.ensure_loaded())
+
+    assert registry.id_of("binance") == 1
+    assert registry.get_by_id(1).name == "binance"
+    with pytest.raises(KeyError):
+        registry.get("nope")
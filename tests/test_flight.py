@@ -0,0 +1,57 @@
+from datetime import datetime
+
+import pytest
+
+from databases.doris.flight import DorisFlightReader
+
+
+class FakeCursor:
+    def __init__(self, executed):
+        self.executed = executed
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, parameters=None):
+        self.executed.append((sql, parameters))
+
+    def fetch_arrow_table(self):
+        return "table"
+
+
+class FakeConnection:
+    def __init__(self):
+        self.executed = []
+
+    def cursor(self):
+        return FakeCursor(self.executed)
+
+
+@pytest.fixture
+def reader(monkeypatch):
+    reader = DorisFlightReader()
+    reader._conn = FakeConnection()
+    monkeypatch.setattr(DorisFlightReader, "_exchange_id", staticmethod(lambda exchange: 7))
+    return reader
+
+
+def test_values_are_bound_not_inlined(reader):
+    symbol = "BTC'; DROP TABLE kline_1m; --"
+    assert reader.read_klines("binance", symbol, "1m", datetime(2025, 1, 1), 1735776000000, inst_type=1) == "table"
+
+    [(sql, params)] = reader._conn.executed
+    assert "DROP" not in sql
+    assert sql == (
+        "SELECT * FROM kline_1m WHERE exchange_id = ? AND symbol = ? AND dt >= ? AND dt < ? AND inst_type = ? ORDER BY dt"
+    )
+    assert params[:3] == [7, symbol, "2025-01-01 00:00:00"]
+    assert params[4] == 1
+
+
+def test_invalid_column_names_rejected(reader):
+    with pytest.raises(ValueError, match="column"):
+        reader.read_klines("binance", "BTCUSDT", "1m", "2025-01-01", "2025-02-01", columns=["open`, (SELECT 1)"])
+    assert reader._conn.executed == []
@@ -0,0 +1,40 @@
+import asyncio
+from datetime import datetime
+import time
+
+from flows import sync_funding_rate as funding
+from utils.deadline import DEADLINE_MARGIN, Deadline
+from utils.stagger import JOB_OFFSET_WINDOW, stagger_seconds
+
+
+class SlowClient:
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.written = False
+
+    async def update_funding_rate(self):
+        await asyncio.sleep(self.seconds)
+        self.written = True
+
+
+def test_task_is_cancelled_at_deadline():
+    client = SlowClient(5)
+    start = time.time()
+    result = asyncio.run(funding.update_funding_rate_task.fn("binance", client, deadline=Deadline.after(0.1)))
+    assert result == "binance timeout"
+    assert not client.written
+    assert time.time() - start < 1
+
+
+def test_task_finishes_before_deadline():
+    client = SlowClient(0)
+    assert asyncio.run(funding.update_funding_rate_task.fn("binance", client, deadline=Deadline.after(5))) == "binance ok"
+    assert client.written
+
+
+def test_deadline_uses_staggered_trigger_second():
+    second = stagger_seconds([funding.FUNDING_SECOND], "sync-funding-rate", JOB_OFFSET_WINDOW)[0]
+    now = datetime(2026, 1, 1, 8, 2, 0).timestamp()
+    deadline = funding.funding_deadline(now=now)
+    expected = datetime(2026, 1, 1, 8, 5, second).timestamp()
+    assert deadline.at == expected - DEADLINE_MARGIN
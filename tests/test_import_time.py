@@ -0,0 +1,17 @@
+import os
+
+import pytest
+
+from benchmarks.import_time import IMPORT_BASELINE_MS, budget_ms, measure
+
+pytestmark = [
+    pytest.mark.benchmark,
+    pytest.mark.skipif(os.getenv("CLX_BENCHMARKS") != "1", reason="set CLX_BENCHMARKS=1 to run import-time budgets"),
+]
+
+
+@pytest.mark.parametrize("module", list(IMPORT_BASELINE_MS))
+def test_import_time_within_budget(module):
+    elapsed, detail = measure(module)
+    heaviest = ", ".join(f"{name} {us / 1000:.0f}ms" for us, name in sorted(detail, reverse=True)[:5])
+    assert elapsed <= budget_ms(module), f"{module} imports in {elapsed:.0f} ms (heaviest: {heaviest})"
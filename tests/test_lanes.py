@@ -0,0 +1,101 @@
+import asyncio
+import threading
+
+from utils.lanes import Lane, LaneGate
+
+
+def test_backfill_limited_to_ceiling_and_released_without_polling():
+    gate = LaneGate(4)  # 回补最多 2 个槽位
+    order = []
+
+    async def hold(lane: Lane, name: str, release: asyncio.Event):
+        async with gate.slot(lane):
+            order.append(name)
+            await release.wait()
+
+    async def main():
+        release = asyncio.Event()
+        tasks = [asyncio.create_task(hold(Lane.BACKFILL, f"b{i}", release)) for i in range(3)]
+        await asyncio.sleep(0.01)
+        assert order == ["b0", "b1"]
+        assert gate.inflight == 2
+
+        release.set()
+        await asyncio.wait_for(asyncio.gather(*tasks), timeout=1)
+        assert order == ["b0", "b1", "b2"]
+        assert gate.inflight == 0
+
+    asyncio.run(main())
+
+
+def test_live_waiter_goes_before_backfill():
+    gate = LaneGate(1)
+    order = []
+
+    async def use(lane: Lane, name: str):
+        async with gate.slot(lane):
+            order.append(name)
+            await asyncio.sleep(0)
+
+    async def main():
+        first = asyncio.Event()
+
+        async def holder():
+            async with gate.slot(Lane.LIVE):
+                first.set()
+                await asyncio.sleep(0.02)
+
+        h = asyncio.create_task(holder())
+        await first.wait()
+        backfill = asyncio.create_task(use(Lane.BACKFILL, "backfill"))
+        await asyncio.sleep(0)
+        live = asyncio.create_task(use(Lane.LIVE, "live"))
+        await asyncio.wait_for(asyncio.gather(h, backfill, live), timeout=1)
+
+    asyncio.run(main())
+    assert order == ["live", "backfill"]
+
+
+def test_cancelled_waiter_leaves_no_state():
+    gate = LaneGate(1)
+
+    async def main():
+        async with gate.slot(Lane.LIVE):
+            waiter = asyncio.create_task(gate.slot(Lane.LIVE).__aenter__())
+            await asyncio.sleep(0.01)
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+        assert gate.inflight == 0
+        assert sum(gate.waiting.values()) == 0
+        assert not gate._waiters
+
+    asyncio.run(main())
+
+
+def test_release_wakes_waiter_on_another_loop():
+    gate = LaneGate(1)
+    acquired = threading.Event()
+    release = threading.Event()
+
+    async def holder():
+        async with gate.slot(Lane.LIVE):
+            acquired.set()
+            await asyncio.to_thread(release.wait)
+
+    thread = threading.Thread(target=lambda: asyncio.run(holder()))
+    thread.start()
+    acquired.wait(1)
+
+    async def waiter():
+        async def use():
+            async with gate.slot(Lane.LIVE):
+                return True
+
+        task = asyncio.create_task(use())
+        await asyncio.sleep(0.02)
+        assert not task.done()
+        release.set()
+        return await asyncio.wait_for(task, timeout=1)
+
+    assert asyncio.run(waiter())
+    thread.join(1)
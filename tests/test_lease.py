@@ -0,0 +1,143 @@
+import asyncio
+import time
+
+from constants import InstType
+from fakes import MemoryLease
+import pytest
+
+from cluster import LeaseLostError
+from exchanges import _base_
+from exchanges._base_ import BaseClient
+from utils.logger import logger
+
+
+@pytest.fixture(autouse=True)
+def _clear_table():
+    MemoryLease.table = {}
+
+
+def test_ensure_fails_after_expiry_without_renew():
+    async def main():
+        lease = MemoryLease("unit", "a", ttl=1)
+        assert await lease.acquire()
+        lease.ensure()
+        # 事件循环被阻塞，续约没有机会执行
+        time.sleep(1.05)  # noqa: ASYNC251
+        with pytest.raises(LeaseLostError):
+            lease.ensure()
+        await lease.release()
+
+    asyncio.run(main())
+
+
+def test_takeover_locks_out_old_holder():
+    async def main():
+        a = MemoryLease("unit", "a", ttl=1)
+        b = MemoryLease("unit", "b", ttl=1)
+        assert await a.acquire()
+        assert not await b.acquire()
+
+        time.sleep(1.05)  # noqa: ASYNC251
+        assert await b.acquire()
+        assert b.token == a.token + 1
+
+        assert not await a.renew()
+        with pytest.raises(LeaseLostError):
+            a.ensure()
+        b.ensure()
+        await a.release()
+        await b.release()
+
+    asyncio.run(main())
+
+
+def test_renew_failure_marks_lost():
+    async def main():
+        lease = MemoryLease("unit", "a", ttl=0.3)
+        assert await lease.acquire()
+        # 他人接管：token 变化，下一次续约失败
+        MemoryLease.table["unit"] = ("b", lease.token + 1, time.monotonic() + 10)
+        await asyncio.sleep(0.15)
+        assert lease.lost
+        with pytest.raises(LeaseLostError):
+            lease.ensure()
+        await lease.release()
+
+    asyncio.run(main())
+
+
+class FakeLoader:
+    bulk_max_rows = 2
+    bulk_concurrency = 4
+
+    def __init__(self, on_write=None):
+        self.written = []
+        self.loads = 0
+        self.on_write = on_write
+
+    async def send_rows_partitioned(self, rows, table):
+        self.written.extend(rows)
+        self.loads += 1
+        if self.on_write:
+            self.on_write()
+
+
+class FakeCatalog:
+    async def ensure_fresh(self):
+        pass
+
+    def get(self, *args):
+        return None
+
+
+class FakeClient(BaseClient):
+    exchange_name = "fake"
+    inst_type = InstType.PERP
+    base_url = "http://fake"
+
+    def __init__(self, loader):
+        self._exchange_id = 1
+        self.logger = logger
+        self.doris_stream_loader = loader
+        self.requests = 0
+
+    async def get_all_symbols(self):
+        return []
+
+    async def get_kline(self, symbol, interval="1m", start_ms=None, end_ms=None):
+        for page in range(5):
+            self.requests += 1
+            yield [{"timestamp": (page * 2 + i) * 60_000} for i in range(2)]
+
+
+def test_update_kline_stops_after_takeover(monkeypatch):
+    monkeypatch.setattr(_base_, "get_symbol_catalog", lambda: FakeCatalog())
+
+    async def main():
+        lease = MemoryLease("kline_1m:fake:1:BTCUSDT", "a", ttl=60)
+        assert await lease.acquire()
+
+        def take_over():
+            # 第一次写入后租约过期并被 b 接管
+            lease._valid_until = 0.0
+            MemoryLease.table[lease.name] = ("b", lease.token + 1, time.monotonic() + 60)
+
+        client = FakeClient(FakeLoader(on_write=take_over))
+        with pytest.raises(LeaseLostError):
+            await client.update_kline("BTCUSDT", "1m", lease=lease)
+        await lease.release()
+        return client
+
+    client = asyncio.run(main())
+    assert client.requests == 1
+    assert len(client.doris_stream_loader.written) == 2
+
+
+def test_update_kline_without_lease_writes_everything(monkeypatch):
+    monkeypatch.setattr(_base_, "get_symbol_catalog", lambda: FakeCatalog())
+    client = FakeClient(FakeLoader())
+    asyncio.run(client.update_kline("BTCUSDT", "1m"))
+    assert client.requests == 5
+    assert len(client.doris_stream_loader.written) == 10
+    # 攒满 bulk_max_rows 即写入，不按 bulk_max_rows × bulk_concurrency 缓冲
+    assert client.doris_stream_loader.loads == 5
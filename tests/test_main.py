@@ -0,0 +1,120 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+import pytest
+
+import main
+from utils.stagger import JOB_OFFSET_WINDOW, stagger_seconds
+
+
+def test_build_scheduler_registers_every_job():
+    scheduler = main.build_scheduler()
+    jobs = {job.id: job for job in scheduler.get_jobs()}
+
+    assert set(jobs) == {main.job_name(spec["func"]) for spec in main.JOBS}
+    for spec in main.JOBS:
+        job = jobs[main.job_name(spec["func"])]
+        assert job.func is main.run_job
+        assert job.args == (spec["func"],)
+        assert job.max_instances == 1
+        assert job.coalesce is True
+        expected = CronTrigger if spec["trigger"] == "cron" else IntervalTrigger
+        assert isinstance(job.trigger, expected)
+
+
+def test_build_scheduler_does_not_mutate_jobs():
+    before = [dict(spec) for spec in main.JOBS]
+    main.build_scheduler()
+    assert main.JOBS == before
+
+
+def test_stagger_cron_seconds_only_shift_later():
+    spec = main.stagger({"minute": 0, "second": "5,30"}, "cron", "sync-cex-inflow")
+    seconds = [int(s) for s in spec["second"].split(",")]
+
+    assert seconds == stagger_seconds([5, 30], "sync-cex-inflow", JOB_OFFSET_WINDOW)
+    assert 5 <= seconds[0] < 5 + JOB_OFFSET_WINDOW
+    assert all(0 <= s <= 59 for s in seconds)
+    # 同一个名称每次结果相同
+    assert main.stagger({"second": "5,30"}, "cron", "sync-cex-inflow") == {"second": spec["second"]}
+
+
+def test_stagger_window_zero_keeps_schedule():
+    spec = main.stagger({"minute": "*/5", "second": 5, "offset_window": 0}, "cron", "sync-long-short-ratio-5m")
+    assert spec == {"minute": "*/5", "second": "5"}
+
+
+def test_stagger_interval_sets_start_date_within_window():
+    before = datetime.now()
+    spec = main.stagger({"seconds": 30}, "interval", "sync-macro-indicators")
+    after = datetime.now()
+
+    assert before <= spec["start_date"] <= after + timedelta(seconds=JOB_OFFSET_WINDOW)
+
+
+def test_run_job_isolates_exceptions():
+    calls = []
+
+    async def ok():
+        calls.append("ok")
+
+    async def boom():
+        calls.append("boom")
+        raise RuntimeError("exchange down")
+
+    async def run_both():
+        await main.run_job(boom)
+        await main.run_job(ok)
+
+    asyncio.run(run_both())
+    assert calls == ["boom", "ok"]
+
+
+def test_cli_list_jobs(capsys):
+    main.cli(["--list-jobs"])
+    out = capsys.readouterr().out
+
+    for spec in main.JOBS:
+        assert main.job_name(spec["func"]) in out
+
+
+@pytest.fixture
+def fake_runtime(monkeypatch):
+    events = []
+
+    async def warm_start():
+        events.append("warm_start")
+
+    class Pool:
+        async def close(self):
+            events.append("close")
+
+    monkeypatch.setattr(main, "warm_start", warm_start)
+    monkeypatch.setattr(main, "get_client_pool", lambda: Pool())
+    return events
+
+
+def test_cli_run_executes_single_job(monkeypatch, fake_runtime):
+    async def fake_job():
+        fake_runtime.append("job")
+
+    monkeypatch.setattr(main, "JOBS", [{"func": fake_job, "trigger": "interval", "seconds": 30}])
+    main.cli(["--run", "fake_job"])
+    assert fake_runtime == ["warm_start", "job", "close"]
+
+
+def test_cli_run_failing_job_still_closes_pool(monkeypatch, fake_runtime):
+    async def broken_job():
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(main, "JOBS", [{"func": broken_job, "trigger": "interval", "seconds": 30}])
+    main.cli(["--run", "broken_job"])
+    assert fake_runtime == ["warm_start", "close"]
+
+
+def test_cli_run_unknown_job(monkeypatch, fake_runtime):
+    with pytest.raises(SystemExit):
+        main.cli(["--run", "no-such-job"])
+    assert fake_runtime == []
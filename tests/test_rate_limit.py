@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from utils import rate_limit
+from utils.lanes import Lane
+from utils.rate_limit import LocalTokenStore, RateLimiter
+
+
+class BrokenStore:
+    async def lease(self, key, window_start, limit, n):
+        raise ConnectionError("mysql down")
+
+
+class RecordingStore(LocalTokenStore):
+    def __init__(self):
+        super().__init__()
+        self.requested = []
+
+    async def lease(self, key, window_start, limit, n):
+        self.requested.append(n)
+        return await super().lease(key, window_start, limit, n)
+
+
+def test_fallback_uses_conservative_share(monkeypatch):
+    monkeypatch.setattr(rate_limit, "FALLBACK_SHARE", 0.25)
+    limiter = RateLimiter("test:fallback", limit=100, window=3600, store=BrokenStore())
+
+    async def main():
+        for _ in range(25):
+            await asyncio.wait_for(limiter.acquire(lane=Lane.LIVE), timeout=1)
+        # 超出本进程的保守额度后等待下一窗口，而不是按全额继续发请求
+        with pytest.raises(TimeoutError):
+            await asyncio.wait_for(limiter.acquire(lane=Lane.LIVE), timeout=0.2)
+
+    asyncio.run(main())
+
+
+def test_batch_shrinks_towards_window_end():
+    limiter = RateLimiter("test:batch", limit=2000, window=60, store=LocalTokenStore())
+    assert limiter.batch == 100
+
+    assert limiter._batch_size(0.0, 0, 2000) == 100
+    assert limiter._batch_size(30.0, 0, 2000) == 50
+    assert limiter._batch_size(57.0, 0, 2000) == 5
+    assert limiter._batch_size(60.0, 0, 2000) == 1
+    # ceiling 比批次小时以 ceiling 为准
+    assert limiter._batch_size(0.0, 0, 40) == 40
+
+
+def test_lease_request_sized_to_remaining_window(monkeypatch):
+    store = RecordingStore()
+    limiter = RateLimiter("test:sized", limit=2000, window=60, store=store)
+    # 固定在窗口 90% 处
+    monkeypatch.setattr(rate_limit.time, "time", lambda: 120.0 + 54.0)
+
+    asyncio.run(limiter.acquire(lane=Lane.LIVE))
+    assert store.requested == [10]
+
+
+class BlockingStore(LocalTokenStore):
+    def __init__(self):
+        super().__init__()
+        self.release = asyncio.Event()
+
+    async def lease(self, key, window_start, limit, n):
+        await self.release.wait()
+        return await super().lease(key, window_start, limit, n)
+
+
+def test_lower_lane_waits_without_polling_and_wakes_on_release(monkeypatch):
+    store = BlockingStore()
+    limiter = RateLimiter("test:wake", limit=100, window=3600, store=store)
+    sleeps = []
+    real_sleep = asyncio.sleep
+
+    async def counting_sleep(seconds, *args):
+        sleeps.append(seconds)
+        await real_sleep(seconds, *args)
+
+    async def main():
+        live = asyncio.create_task(limiter.acquire(lane=Lane.LIVE))
+        await real_sleep(0)
+        backfill = asyncio.create_task(limiter.acquire(lane=Lane.BACKFILL))
+        monkeypatch.setattr(rate_limit.asyncio, "sleep", counting_sleep)
+        await real_sleep(0.2)
+        # 实时请求等待期间回补请求挂起，不轮询
+        assert not backfill.done()
+        assert sleeps == []
+
+        store.release.set()
+        await asyncio.wait_for(asyncio.gather(live, backfill), timeout=1)
+
+    asyncio.run(main())
+    assert not limiter._waiters
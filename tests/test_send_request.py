@@ -0,0 +1,74 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+from email.utils import format_datetime
+import time
+
+import pytest
+
+from exchanges._base_ import BaseClient, parse_retry_after
+from utils.logger import logger
+
+
+def test_retry_after_seconds_and_http_date():
+    assert parse_retry_after("3", 5) == 3
+    assert parse_retry_after(None, 5) == 5
+    assert parse_retry_after("soon", 5) == 5
+    at = format_datetime(datetime.now(UTC) + timedelta(seconds=30), usegmt=True)
+    assert 25 < parse_retry_after(at, 5) <= 30
+    # 已过去的时间不再等待
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT", 5) == 0
+
+
+class FakeResponse:
+    status = 429
+
+    def __init__(self, retry_after: str):
+        self.headers = {"Retry-After": retry_after}
+
+    async def text(self):
+        return "rate limited"
+
+
+class FakeSession:
+    def __init__(self, retry_after: str):
+        self.headers = {}
+        self.retry_after = retry_after
+        self.calls = 0
+
+    async def get(self, url, headers=None, proxy=None):
+        self.calls += 1
+        return FakeResponse(self.retry_after)
+
+
+class FakeClient:
+    base_url = "https://api.example.com"
+    logger = logger
+
+    def __init__(self, session: FakeSession):
+        self.session = session
+
+    async def _get_session(self):
+        return self.session
+
+    _sticky_key = staticmethod(BaseClient._sticky_key)
+
+    def request_weight(self, endpoint, params):
+        return 1
+
+    def rate_limiter_for(self, proxy):
+        return None
+
+
+def test_rate_limited_http_date_backs_off_without_sleeping_after_last_attempt(monkeypatch):
+    sleeps = []
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    session = FakeSession(format_datetime(datetime.fromtimestamp(time.time() + 2, UTC), usegmt=True))
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(BaseClient.send_request(FakeClient(session), "GET", "/ping", retries=2))
+    assert session.calls == 2
+    assert len(sleeps) == 1 and 0 < sleeps[0] <= 2
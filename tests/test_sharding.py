@@ -0,0 +1,129 @@
+import asyncio
+
+from fakes import MemoryMembership
+import pytest
+
+from cluster import ShardManager, WorkUnit
+
+
+def test_sharding_requires_stable_worker_id(monkeypatch):
+    monkeypatch.delenv("CLX_WORKER_ID", raising=False)
+    with pytest.raises(RuntimeError, match="CLX_WORKER_ID"):
+        ShardManager(enabled=True)
+    assert ShardManager(enabled=False).worker_id
+
+
+def test_session_joins_and_leaves():
+    membership = MemoryMembership("w1")
+    shard = ShardManager("w1", enabled=True, membership=membership, heartbeat_interval=60)
+
+    async def main():
+        async with shard.session():
+            assert membership.alive == {"w1"}
+            assert shard.heartbeat_running
+        assert membership.alive == set()
+        assert not shard.heartbeat_running
+
+    asyncio.run(main())
+
+
+def test_ready_does_not_start_heartbeat():
+    membership = MemoryMembership("w1")
+    shard = ShardManager("w1", enabled=True, membership=membership, heartbeat_interval=60)
+
+    async def main():
+        await shard.ready()
+        assert membership.alive == {"w1"}
+        assert not shard.heartbeat_running
+
+    asyncio.run(main())
+
+
+def test_session_is_noop_when_long_lived_heartbeat_runs():
+    membership = MemoryMembership("w1")
+    shard = ShardManager("w1", enabled=True, membership=membership, heartbeat_interval=60)
+
+    async def main():
+        await shard.start()
+        async with shard.session():
+            pass
+        # flow 结束不会让常驻 worker 离开集群
+        assert membership.alive == {"w1"}
+        assert shard.heartbeat_running
+        await shard.stop()
+
+    asyncio.run(main())
+
+
+def test_heartbeat_on_closed_loop_is_not_running():
+    membership = MemoryMembership("w1")
+    shard = ShardManager("w1", enabled=True, membership=membership, heartbeat_interval=60)
+
+    # 短生命周期的循环结束后，心跳视为未运行，下一个长期循环可以重新启动
+    asyncio.run(shard.start())
+    assert not shard.heartbeat_running
+
+    async def main():
+        await shard.start()
+        assert shard.heartbeat_running
+        await shard.stop()
+
+    asyncio.run(main())
+
+
+def test_owns_splits_units_between_members():
+    units = [WorkUnit("binance", 1, f"S{i}USDT", "kline_1m") for i in range(200)]
+    shards = []
+    for worker_id in ("w1", "w2"):
+        shard = ShardManager(worker_id, enabled=True, membership=MemoryMembership(worker_id))
+        shard.ring.rebuild(["w1", "w2"])
+        shards.append(shard)
+
+    owned = [shard.filter(units) for shard in shards]
+    assert len(owned[0]) + len(owned[1]) == len(units)
+    assert not set(owned[0]) & set(owned[1])
+
+
+def test_every_unit_processed_once_per_cycle_with_two_members(monkeypatch):
+    from contextvars import ContextVar
+
+    from fakes import MemoryLease
+
+    from cluster import lease as lease_mod, singleton
+
+    MemoryLease.table = {}
+    alive: set[str] = set()
+    shards = {w: ShardManager(w, enabled=True, membership=MemoryMembership(w, alive=alive)) for w in ("w1", "w2")}
+    current: ContextVar[ShardManager] = ContextVar("shard")
+    monkeypatch.setattr(lease_mod, "Lease", MemoryLease)
+    monkeypatch.setattr(lease_mod, "get_shard_manager", current.get)
+
+    units = [WorkUnit("binance", 1, f"S{i}USDT", "funding_rate") for i in range(100)]
+    processed = []
+
+    @singleton("sync-test")
+    async def flow():
+        shard = await current.get().ready()
+        await asyncio.sleep(0.01)  # 两个运行在时间上重叠
+        processed.extend(u for u in units if shard.owns(u))
+        return shard.worker_id
+
+    async def run_on(worker_id: str):
+        current.set(shards[worker_id])
+        return await flow()
+
+    async def main():
+        # 常驻 worker 模式：每个 worker 启动时加入集群并保持心跳
+        for shard in shards.values():
+            await shard.start()
+        await shards["w1"].sync()
+        try:
+            return await asyncio.wait_for(asyncio.gather(run_on("w1"), run_on("w2")), timeout=1)
+        finally:
+            for shard in shards.values():
+                await shard.stop()
+
+    # 两个 worker 同时运行同一个 flow：都拿到各自的单例锁，合起来恰好覆盖全部工作单元，没有重复
+    assert asyncio.run(main()) == ["w1", "w2"]
+    assert sorted(processed) == sorted(units)
+    assert set(MemoryLease.table) == {"job:sync-test:w1", "job:sync-test:w2"}
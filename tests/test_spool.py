@@ -0,0 +1,105 @@
+import asyncio
+import os
+
+from databases.doris.spool import DorisSpool, SpoolFullError
+from utils.logger import logger
+
+
+class FakeLoader:
+    def __init__(self):
+        self.loaded = []
+
+    async def load(self, table, payload, columns, label, spool=True, **headers):
+        self.loaded.append(label)
+
+
+def make_spool(tmp_path, segment_bytes: int = 64) -> DorisSpool:
+    return DorisSpool(str(tmp_path), max_bytes=1 << 20, segment_bytes=segment_bytes, logger=logger)
+
+
+def test_size_tracked_without_listing_directory(tmp_path, monkeypatch):
+    spool = make_spool(tmp_path, segment_bytes=1 << 20)
+
+    def no_listdir(path):
+        raise AssertionError("append should not list the spool directory")
+
+    spool.append("kline_1m", "l0", ["a"], b"x" * 100)
+    monkeypatch.setattr(os, "listdir", no_listdir)
+    # 同一段内继续追加不需要 listdir / stat
+    spool.append("kline_1m", "l1", ["a"], b"y" * 100)
+    monkeypatch.undo()
+
+    on_disk = sum(os.path.getsize(tmp_path / n) for n in os.listdir(tmp_path) if n.endswith(".spool"))
+    assert spool.size_bytes == on_disk
+    assert make_spool(tmp_path).size_bytes == on_disk
+
+
+def test_replay_releases_bytes(tmp_path):
+    spool = make_spool(tmp_path)
+    for i in range(5):
+        spool.append("kline_1m", f"l{i}", ["a"], os.urandom(80))
+    loader = FakeLoader()
+
+    assert asyncio.run(spool.replay(loader)) == 5
+    assert loader.loaded == [f"l{i}" for i in range(5)]
+    assert spool.size_bytes == 0
+    assert not spool.pending
+
+
+def test_replay_restarts_after_loop_closed(tmp_path):
+    spool = make_spool(tmp_path)
+    spool.append("kline_1m", "l0", ["a"], b"x")
+    loader = FakeLoader()
+
+    async def start_and_leave():
+        # 循环在重放执行前就结束
+        spool.start_replay(loader, interval=0.01)
+
+    asyncio.run(start_and_leave())
+    assert not spool.replay_running
+
+    async def start_and_wait():
+        task = spool.start_replay(loader, interval=0.01)
+        assert spool.replay_running
+        await asyncio.wait_for(task, timeout=1)
+
+    asyncio.run(start_and_wait())
+    assert loader.loaded == ["l0"]
+    assert not spool.pending
+
+
+
+def test_concurrent_append_from_two_threads(tmp_path, monkeypatch):
+    import threading
+    import time
+
+    spool = DorisSpool(str(tmp_path), max_bytes=20_000, segment_bytes=1_000, logger=logger)
+    # fsync 期间释放 GIL，让另一个线程在同一次 append 的检查与计数之间插入
+    monkeypatch.setattr(os, "fsync", lambda fd: time.sleep(0.001))
+    barrier = threading.Barrier(2)
+    appended = {"1m": [], "5m": []}
+
+    def writer(name: str):
+        barrier.wait()
+        for i in range(200):
+            try:
+                spool.append(f"kline_{name}", f"{name}-{i:03d}", ["a"], os.urandom(100))
+                appended[name].append(f"{name}-{i:03d}")
+            except SpoolFullError:
+                pass
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in appended]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    on_disk = sum(os.path.getsize(tmp_path / n) for n in os.listdir(tmp_path) if n.endswith(".spool"))
+    assert spool.size_bytes == on_disk <= spool.max_bytes
+    assert spool.pending == {f"kline_{n}": len(labels) for n, labels in appended.items()}
+
+    loader = FakeLoader()
+    assert asyncio.run(spool.replay(loader)) == sum(map(len, appended.values()))
+    assert sorted(loader.loaded) == sorted(appended["1m"] + appended["5m"])
+    assert spool.size_bytes == 0
+    assert not spool.metrics["corrupt_records"]
@@ -0,0 +1,156 @@
+import asyncio
+
+from constants import InstType, SymbolStatus
+from fakes import MemoryListingQueue
+import pytest
+
+from cluster import lease as lease_mod
+from flows import backfill_klines, sync_klines
+from metadata import SymbolEvent, SymbolEventType
+
+
+def listed(symbol: str = "BTCUSDT", base: str = "BTC") -> SymbolEvent:
+    return SymbolEvent(
+        SymbolEventType.LISTED,
+        "binance",
+        1,
+        InstType.PERP,
+        symbol,
+        base_asset=base,
+        quote_asset="USDT",
+        new_status=SymbolStatus.ACTIVE,
+    )
+
+
+def delisted(symbol: str = "BTCUSDT") -> SymbolEvent:
+    return SymbolEvent(SymbolEventType.DELISTED, "binance", 1, InstType.PERP, symbol)
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    queue = MemoryListingQueue()
+    monkeypatch.setattr(sync_klines, "get_listing_queue", lambda: queue)
+    monkeypatch.setattr(backfill_klines, "get_listing_queue", lambda: queue)
+    sync_klines._backfill_tasks.clear()
+    return queue
+
+
+def test_listing_is_queued_not_backfilled_inline(queue):
+    asyncio.run(sync_klines.on_symbol_listed(listed()))
+    assert sync_klines._backfill_tasks == {}
+    assert set(queue.rows) == {("binance_perp", "BTCUSDT", i) for i in sync_klines.KLINE_INTERVALS}
+
+
+def test_untracked_listing_is_ignored(queue):
+    asyncio.run(sync_klines.on_symbol_listed(listed("PEPEUSDT", "PEPE")))
+    assert queue.rows == {}
+
+
+def test_delisting_removes_queued_listing(queue):
+    async def main():
+        await sync_klines.on_symbol_listed(listed())
+        await sync_klines.on_symbol_delisted(delisted())
+
+    asyncio.run(main())
+    assert queue.rows == {}
+
+
+def test_delisting_cancels_running_backfill(queue, monkeypatch):
+    started = asyncio.Event()
+
+    async def slow_unit(client, symbol, interval, start_time=None):
+        started.set()
+        await asyncio.sleep(60)
+
+    monkeypatch.setattr(sync_klines, "_update_kline_unit", slow_unit)
+
+    class Client:
+        exchange_name = "binance"
+        inst_type = InstType.PERP
+
+    async def main():
+        worker = asyncio.create_task(sync_klines._backfill_kline_unit(Client(), "BTCUSDT", "1m"))
+        await started.wait()
+        await sync_klines.on_symbol_delisted(delisted())
+        # 只取消该交易对的回补，worker 本身继续执行后续任务
+        assert await asyncio.wait_for(worker, timeout=1)
+
+    asyncio.run(main())
+    assert sync_klines._backfill_tasks == {}
+
+
+class FakeClient:
+    exchange_name = "binance"
+    inst_type = InstType.PERP
+    rate_limit = None
+    rate_limit_key = "binance:fapi"
+    kline_page_limit = 100
+
+    async def find_kline_gaps(self, symbol, interval, start_ms):
+        if symbol == "SCANFAILUSDT":
+            raise ConnectionError("doris down")
+        if symbol == "FULLUSDT":
+            return None, []
+        return None, [(0, 3_600_000)]
+
+
+@pytest.fixture
+def planner(queue, monkeypatch):
+    client = FakeClient()
+
+    class Pool:
+        def get(self, name):
+            return client
+
+    async def warm_start():
+        pass
+
+    monkeypatch.setattr(lease_mod, "LOCKS_ENABLED", False)
+    monkeypatch.setattr(backfill_klines, "warm_start", warm_start)
+    monkeypatch.setattr(backfill_klines, "get_client_pool", lambda: Pool())
+    return queue
+
+
+def test_backfill_new_listings_keeps_unfinished_units(planner, monkeypatch):
+    async def backfill_unit(client, symbol, interval, start_ms):
+        if symbol == "BROKENUSDT":
+            raise RuntimeError("exchange down")
+        return symbol != "BUSYUSDT"  # 被其他 worker 持有
+
+    monkeypatch.setattr(backfill_klines, "_backfill_kline_unit", backfill_unit)
+    symbols = ["OKUSDT", "FULLUSDT", "BROKENUSDT", "BUSYUSDT", "SCANFAILUSDT"]
+    asyncio.run(planner.put([("binance_perp", s, "1m") for s in symbols]))
+
+    asyncio.run(backfill_klines.backfill_new_listings.fn())
+    assert planner.rows == {
+        ("binance_perp", "BROKENUSDT", "1m"): 1,
+        ("binance_perp", "BUSYUSDT", "1m"): 1,
+        ("binance_perp", "SCANFAILUSDT", "1m"): 1,
+    }
+
+
+def test_backfill_new_listings_requeues_on_abort(planner, monkeypatch):
+    async def execute_plan(plan):
+        raise RuntimeError("worker crashed")
+
+    monkeypatch.setattr(backfill_klines, "execute_plan", execute_plan)
+    asyncio.run(planner.put([("binance_perp", "OKUSDT", "1m")]))
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(backfill_klines.backfill_new_listings.fn())
+    assert list(planner.rows) == [("binance_perp", "OKUSDT", "1m")]
+
+
+def test_empty_queue_skips_flow_run(planner, monkeypatch):
+    calls = []
+
+    async def flow():
+        calls.append("run")
+
+    monkeypatch.setattr(backfill_klines, "backfill_new_listings", flow)
+    asyncio.run(backfill_klines.backfill_new_listings_if_queued())
+    assert calls == []
+
+    asyncio.run(planner.put([("binance_perp", "OKUSDT", "1m")]))
+    asyncio.run(backfill_klines.backfill_new_listings_if_queued())
+    assert calls == ["run"]
@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+
+from constants import SymbolStatus
+
+from metadata.symbols import diff_symbols
+
+
+def stored(n: int, status: SymbolStatus = SymbolStatus.ACTIVE) -> list:
+    return [SimpleNamespace(symbol=f"S{i}USDT", status=status) for i in range(n)]
+
+
+def fetched(n: int) -> list[dict]:
+    return [{"symbol": f"S{i}USDT"} for i in range(n)]
+
+
+def test_small_shrink_delists_missing_symbols():
+    diff = diff_symbols(stored(100), fetched(97), [], max_delist_ratio=0.1, min_delist_count=5)
+    assert [row.symbol for row in diff.delisted] == ["S97USDT", "S98USDT", "S99USDT"]
+    assert diff.withheld == []
+
+
+def test_truncated_response_is_withheld():
+    # 分页截断：只返回了一半
+    diff = diff_symbols(stored(100), fetched(50), [], max_delist_ratio=0.1, min_delist_count=5)
+    assert diff.delisted == []
+    assert len(diff.withheld) == 50
+    assert "withheld=50" in diff.summary()
+
+
+def test_min_count_allows_delisting_on_small_markets():
+    diff = diff_symbols(stored(10), fetched(6), [], max_delist_ratio=0.1, min_delist_count=5)
+    assert len(diff.delisted) == 4
+
+
+def test_closed_symbols_do_not_count_as_listed():
+    current = stored(20) + [SimpleNamespace(symbol=f"OLD{i}", status=SymbolStatus.CLOSED) for i in range(100)]
+    diff = diff_symbols(current, fetched(14), [], max_delist_ratio=0.1, min_delist_count=5)
+    assert diff.delisted == []
+    assert len(diff.withheld) == 6
+
+
+def test_empty_response_never_delists():
+    diff = diff_symbols(stored(10), [], [])
+    assert diff.delisted == [] and diff.withheld == []